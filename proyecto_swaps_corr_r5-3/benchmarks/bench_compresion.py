@@ -0,0 +1,78 @@
+# benchmarks/bench_compresion.py
+"""Compara la lectura de insumos planos contra los mismos insumos comprimidos (gz, xz, bz2, zip).
+
+Genera los archivos de bench_csv_engine, los comprime con cada formato y los lee con
+safe_read_csv y el esquema declarado (descompresión en streaming, sin temporales).
+Reporta tamaño, mejor tiempo de N repeticiones y MB/s sobre el tamaño sin comprimir.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_compresion.py --filas 1000000 --repeticiones 3
+"""
+from __future__ import annotations
+import argparse
+import bz2
+import gzip
+import lzma
+import shutil
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_csv_engine import _TMP, generar  # noqa: E402  (prepara INPUT_DIR/OUTPUT_DIR y code/)
+
+from pkg.esquemas import opciones_lectura  # noqa: E402
+from pkg.utils import safe_read_csv  # noqa: E402
+
+_COMPRESORES = {
+    ".gz": lambda p: gzip.open(p, "wb", compresslevel=6),
+    ".xz": lambda p: lzma.open(p, "wb", preset=6),
+    ".bz2": lambda p: bz2.open(p, "wb", compresslevel=9),
+}
+
+
+def comprimir(path: Path, sufijo: str) -> Path:
+    destino = path.with_name(path.name + sufijo)
+    if sufijo == ".zip":
+        with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as z:
+            z.write(path, path.name)
+        return destino
+    with open(path, "rb") as origen, _COMPRESORES[sufijo](destino) as f:
+        shutil.copyfileobj(origen, f, 1024 * 1024)
+    return destino
+
+
+def medir(path: Path, archivo: str, repeticiones: int) -> float:
+    opciones = opciones_lectura(path, archivo, "procesar_swaps")
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        safe_read_csv(path, **opciones)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--formatos", default=".gz,.xz,.bz2,.zip")
+    args = parser.parse_args(argv)
+
+    archivos = generar(args.filas, _TMP)
+    print(f"{'archivo':<8} {'formato':<7} {'MB':>8} {'ratio':>6} {'lectura (s)':>12} {'MB/s':>8} {'vs plano':>9}")
+    for archivo, plano in archivos.items():
+        mb = plano.stat().st_size / 1e6
+        base = medir(plano, archivo, args.repeticiones)
+        print(f"{archivo:<8} {'plano':<7} {mb:>8.1f} {1:>5.1f}x {base:>12.2f} {mb / base:>8.0f} {1:>8.2f}x")
+        for sufijo in args.formatos.split(","):
+            path = comprimir(plano, sufijo)
+            segundos = medir(path, archivo, args.repeticiones)
+            mb_c = path.stat().st_size / 1e6
+            print(f"{archivo:<8} {sufijo:<7} {mb_c:>8.1f} {mb / mb_c:>5.1f}x {segundos:>12.2f} "
+                  f"{mb / segundos:>8.0f} {base / segundos:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
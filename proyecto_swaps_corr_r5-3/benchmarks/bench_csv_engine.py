@@ -0,0 +1,83 @@
+# benchmarks/bench_csv_engine.py
+"""Compara el motor C de pandas contra el lector CSV multihilo de pyarrow en safe_read_csv.
+
+Genera archivos con la forma de flujos_swap_gbo (.csv) y COL_ESTIM_FLOWS (.dat),
+los lee con el esquema declarado de cada uno y reporta el mejor tiempo de N repeticiones.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_csv_engine.py --filas 2000000 --repeticiones 3
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_TMP = Path(tempfile.mkdtemp(prefix="bench_csv_"))
+for _key in ("INPUT_DIR", "OUTPUT_DIR", "LOG_DIR"):
+    os.environ.setdefault(_key, str(_TMP))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "code"))
+
+from pkg.esquemas import opciones_lectura  # noqa: E402
+from pkg.utils import safe_read_csv, _pa  # noqa: E402
+
+
+def generar(filas: int, destino: Path) -> dict:
+    rng = np.random.default_rng(0)
+    contratos = rng.integers(100_000, 100_000 + max(filas // 20, 1), filas)
+    fechas = pd.Timestamp("2025-09-10") + pd.to_timedelta(rng.integers(-30, 720, filas), "D")
+    flujos = destino / "flujos_swap_gbo_20250910.csv"
+    pd.DataFrame({
+        "cod_emp": contratos,
+        "fecha_cobro": fechas.strftime("%d/%m/%Y"),
+        "moneda": rng.choice(["COP", "USD", "UVR"], filas),
+        "der_vp": rng.normal(0, 1e6, filas).round(2),
+        "obl_vp": rng.normal(0, 1e6, filas).round(2),
+        "der_intereses": rng.normal(0, 1e4, filas).round(4),
+        "obl_intereses": rng.normal(0, 1e4, filas).round(4),
+        "tasa": rng.random(filas).round(6),
+    }).to_csv(flujos, sep=";", index=False, encoding="latin1")
+    dat = destino / "COL_ESTIM_FLOWS_10092025.dat"
+    pd.DataFrame({
+        "M_CONTRACT_": contratos,
+        "M_DATE": fechas.strftime("%d/%m/%Y"),
+        "M_DISCFLOWC": rng.normal(0, 1e6, filas).round(3),
+        "M_FLOW_COL": rng.normal(0, 1e4, filas).round(3),
+    }).to_csv(dat, sep=";", index=False, encoding="latin1")
+    return {"flujos": flujos, "dat": dat}
+
+
+def medir(path: Path, archivo: str, motor: str, repeticiones: int) -> float:
+    opciones = opciones_lectura(path, archivo, "procesar_swaps")
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        safe_read_csv(path, engine=motor, **opciones)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args(argv)
+    if _pa is None:
+        raise SystemExit("pyarrow no está instalado: no hay motor alternativo que comparar.")
+
+    archivos = generar(args.filas, _TMP)
+    print(f"{'archivo':<8} {'filas':>10} {'MB':>8} {'c (s)':>8} {'pyarrow (s)':>12} {'speedup':>8}")
+    for archivo, path in archivos.items():
+        c = medir(path, archivo, "c", args.repeticiones)
+        pa = medir(path, archivo, "pyarrow", args.repeticiones)
+        mb = path.stat().st_size / 1e6
+        print(f"{archivo:<8} {args.filas:>10} {mb:>8.1f} {c:>8.2f} {pa:>12.2f} {c / pa:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_escala.py
+"""Benchmark de escala del proceso completo (procesar_swaps + actualizar_informe).
+
+Para cada escala genera datos sintéticos (ver generar_datos.py), ejecuta el proceso de
+una fecha en un proceso hijo y reporta el tiempo por etapa (run_metrics_<fecha>.json) y
+el pico de memoria: RSS máximo del hijo y, en una segunda corrida con METRICAS_MEMORIA=1,
+el pico de tracemalloc por etapa de run_memoria_<fecha>.json (esa corrida es más lenta,
+por eso no se usa para tiempos).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_escala.py --escalas 1e3,1e4,1e5,1e6 --salida resultados.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from generar_datos import generar
+
+CODE_DIR = Path(__file__).resolve().parents[1] / "code"
+
+# Se ejecuta en el hijo: importa el proceso con las rutas ya fijadas por entorno
+_HIJO = """
+import json, resource, sys
+from main import procesar_fecha
+from pkg.utils import cargar_env
+fecha, estado, _ = procesar_fecha(cargar_env())
+pico_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"fecha": fecha, "estado": estado, "rss_max_mb": pico_kb / 1024}))
+"""
+
+
+def ejecutar(directorio: Path, memoria: bool) -> dict:
+    """Ejecuta una fecha sobre directorio/input y devuelve resultado del hijo + métricas."""
+    salida = directorio / ("output_mem" if memoria else "output")
+    salida.mkdir(exist_ok=True)
+    env = dict(os.environ,
+               INPUT_DIR=str(directorio / "input"), OUTPUT_DIR=str(salida), LOG_DIR=str(directorio / "logs"),
+               METRICAS_MEMORIA="1" if memoria else "0", CACHE_DIR="")
+    proc = subprocess.run([sys.executable, "-c", _HIJO], cwd=CODE_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+    resultado = json.loads(proc.stdout.strip().splitlines()[-1])
+    with open(salida / f"run_metrics_{resultado['fecha']}.json", encoding="utf-8") as f:
+        resultado["metricas"] = json.load(f)
+    if memoria:
+        with open(salida / f"run_memoria_{resultado['fecha']}.json", encoding="utf-8") as f:
+            resultado["memoria"] = json.load(f)
+    return resultado
+
+
+def medir_escala(filas: int, raiz: Path, memoria: bool) -> dict:
+    directorio = raiz / f"escala_{filas}"
+    generar(directorio / "input", filas)
+    tiempos = ejecutar(directorio, memoria=False)
+    fila = {
+        "filas": filas,
+        "estado": tiempos["estado"],
+        "total_s": tiempos["metricas"]["total_s"],
+        "rss_max_mb": round(tiempos["rss_max_mb"], 1),
+        "etapas": {n: {"pared_s": e["pared_s"], "filas_por_s": e["filas_por_s"]}
+                   for n, e in tiempos["metricas"]["etapas"].items()},
+    }
+    if memoria:
+        picos = ejecutar(directorio, memoria=True)["memoria"]["etapas"]
+        for nombre, m in picos.items():
+            fila["etapas"].setdefault(nombre, {})["pico_mb"] = round(m["pico_tracemalloc_bytes"] / 1e6, 1)
+    return fila
+
+
+def imprimir(resultados: list) -> None:
+    etapas = list(dict.fromkeys(n for r in resultados for n in r["etapas"]))
+    print(f"{'filas':>10} {'total s':>8} {'RSS MB':>8}  " + "  ".join(f"{n[:18]:>18}" for n in etapas))
+    for r in resultados:
+        celdas = []
+        for n in etapas:
+            e = r["etapas"].get(n, {})
+            celda = f"{e.get('pared_s', 0):.2f}s"
+            if "pico_mb" in e:
+                celda += f"/{e['pico_mb']:.0f}MB"
+            celdas.append(f"{celda:>18}")
+        print(f"{r['filas']:>10} {r['total_s']:>8.2f} {r['rss_max_mb']:>8.1f}  " + "  ".join(celdas))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", default="1e3,1e4,1e5,1e6",
+                        help="Filas por escala, separadas por coma (hasta 1e7).")
+    parser.add_argument("--sin-memoria", action="store_true",
+                        help="Omite la corrida con tracemalloc (picos por etapa).")
+    parser.add_argument("--directorio", default=None, help="Dónde generar los datos (por defecto, temporal).")
+    parser.add_argument("--salida", default=None, help="Archivo JSON con los resultados.")
+    args = parser.parse_args(argv)
+
+    raiz = Path(args.directorio or tempfile.mkdtemp(prefix="bench_escala_"))
+    resultados = [medir_escala(int(float(e)), raiz, not args.sin_memoria) for e in args.escalas.split(",")]
+    imprimir(resultados)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
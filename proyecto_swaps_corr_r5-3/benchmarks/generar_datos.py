@@ -0,0 +1,120 @@
+# benchmarks/generar_datos.py
+"""Generador de datos sintéticos con la forma de los archivos reales del proceso.
+
+Escribe en --destino los tres archivos de una fecha:
+    flujos_swap_gbo_aaaammdd.csv   flujos por contrato con calendario mensual
+    COL_ESTIM_FLOWS_ddmmaaaa.dat   estimaciones para (contrato, fecha) de los flujos
+    Informe_R5_GBO_aammdd.csv      una fila por contrato (más algunas sin flujos)
+
+Los archivos se generan por bloques, así que 1e7 filas no requieren 1e7 filas en memoria.
+Incluye claves duplicadas en el .dat (gana la última) y fechas inválidas en ambos archivos.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/generar_datos.py --filas 1000000 --destino /tmp/swaps_1e6
+"""
+from __future__ import annotations
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BLOQUE = 1_000_000
+PRIMER_CONTRATO = 100_000
+
+
+def _escribir_por_bloques(path: Path, filas: int, generar_bloque) -> None:
+    """Escribe `filas` filas llamando a generar_bloque(n, desde) por bloques de BLOQUE filas."""
+    with open(path, "w", encoding="latin1", newline="") as f:
+        for desde in range(0, max(filas, 1), BLOQUE):
+            n = min(BLOQUE, filas - desde)
+            generar_bloque(n, desde).to_csv(f, sep=";", index=False, header=desde == 0)
+
+
+def _fechas(rng, fecha: pd.Timestamp, n: int, fechas_malas: float) -> np.ndarray:
+    """Fechas dd/mm/aaaa en calendario mensual (2 meses atrás a 24 adelante) con una
+    fracción de valores que no son fecha."""
+    meses = rng.integers(-2, 25, n)
+    dias = pd.DatetimeIndex(fecha + pd.to_timedelta(meses * 30, "D"))
+    texto = np.asarray(dias.strftime("%d/%m/%Y"), dtype=object)
+    texto[rng.random(n) < fechas_malas] = "31/02/2025"
+    return texto
+
+
+def generar(destino, filas: int = 100_000, contratos: int | None = None, flujos_por_contrato: int = 20,
+            duplicados: float = 0.01, fechas_malas: float = 0.001, fecha: str = "20250910",
+            semilla: int = 0) -> dict:
+    """Genera los archivos de `fecha` (aaaammdd) en `destino` y devuelve sus rutas."""
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    base = pd.Timestamp(datetime.strptime(fecha, "%Y%m%d"))
+    contratos = contratos or max(filas // flujos_por_contrato, 1)
+    rng = np.random.default_rng(semilla)
+
+    def bloque_flujos(n, desde):
+        # contratos consecutivos: las filas de un contrato quedan juntas como en el archivo real
+        cod = PRIMER_CONTRATO + (np.arange(desde, desde + n) * contratos // max(filas, 1))
+        return pd.DataFrame({
+            "cod_emp": cod,
+            "fecha_cobro": _fechas(rng, base, n, fechas_malas),
+            "moneda": rng.choice(["COP", "USD", "UVR"], n),
+            "der_vp": rng.normal(0, 1e6, n).round(2),
+            "obl_vp": rng.normal(0, 1e6, n).round(2),
+            "der_intereses": rng.normal(0, 1e4, n).round(4),
+            "obl_intereses": rng.normal(0, 1e4, n).round(4),
+        })
+
+    def bloque_dat(n, desde):
+        cod = PRIMER_CONTRATO + rng.integers(0, contratos, n)
+        fechas = _fechas(rng, base, n, fechas_malas)
+        # repite la clave de la fila anterior en una fracción de filas
+        dup = np.flatnonzero(rng.random(n) < duplicados)
+        dup = dup[dup > 0]
+        cod[dup], fechas[dup] = cod[dup - 1], fechas[dup - 1]
+        return pd.DataFrame({
+            "M_CONTRACT_": cod,
+            "M_DATE": fechas,
+            "M_DISCFLOWC": np.where(rng.random(n) < 0.05, 0, rng.normal(0, 1e6, n).round(3)),
+            "M_FLOW_COL": rng.normal(0, 1e4, n).round(3),
+        })
+
+    archivos = {
+        "flujos": destino / f"flujos_swap_gbo_{base:%Y%m%d}.csv",
+        "dat": destino / f"COL_ESTIM_FLOWS_{base:%d%m%Y}.dat",
+        "informe": destino / f"Informe_R5_GBO_{base:%y%m%d}.csv",
+    }
+    _escribir_por_bloques(archivos["flujos"], filas, bloque_flujos)
+    _escribir_por_bloques(archivos["dat"], filas, bloque_dat)
+
+    sin_flujos = max(contratos // 20, 1)
+    pd.DataFrame({
+        "codigo_operacion": np.arange(PRIMER_CONTRATO, PRIMER_CONTRATO + contratos + sin_flujos),
+        "cupon": 0.0,
+        "cupon_1": 0.0,
+        "contraparte": "BANCO",
+    }).to_csv(archivos["informe"], sep=";", index=False, encoding="latin1")
+    return archivos
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=float, default=100_000, help="Filas de flujos y de .dat (admite 1e6).")
+    parser.add_argument("--contratos", type=int, default=None,
+                        help="Contratos distintos (por defecto filas / flujos-por-contrato).")
+    parser.add_argument("--flujos-por-contrato", type=int, default=20)
+    parser.add_argument("--duplicados", type=float, default=0.01, help="Fracción de claves repetidas en el .dat.")
+    parser.add_argument("--fechas-malas", type=float, default=0.001, help="Fracción de fechas inválidas.")
+    parser.add_argument("--fecha", default="20250910", help="Fecha de los archivos (aaaammdd).")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--destino", required=True)
+    args = parser.parse_args(argv)
+
+    archivos = generar(args.destino, int(args.filas), args.contratos, args.flujos_por_contrato,
+                       args.duplicados, args.fechas_malas, args.fecha, args.semilla)
+    for nombre, path in archivos.items():
+        print(f"{nombre:<8} {path} ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict
 import os
-from dotenv import load_dotenv
-from logger import get_logger
-
-ENV_PATH = Path(__file__).resolve().parent / ".env"
-load_dotenv(ENV_PATH)
+from logger import get_logger, cargar_dotenv
 
 log = get_logger(__name__)
 
@@ -27,6 +23,7 @@ def ensure_dir(path: Path, key: str, create: bool) -> Path:
     return path
 
 def load_paths() -> Dict[str, str]:
+    cargar_dotenv()
     input_dir = os.getenv("INPUT_DIR", "../input")
     output_dir = os.getenv("OUTPUT_DIR", "../output")
     log_dir = os.getenv("LOG_DIR", "../logs")
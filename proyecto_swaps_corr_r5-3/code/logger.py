@@ -1,40 +1,312 @@
 # code/logger.py
+"""Logging del proyecto.
+
+Una sola cadena de handlers, en el logger raíz (configurar_logging): los loggers de
+módulo (get_logger(__name__)) no tienen handlers propios y propagan, así que cada
+registro se escribe una única vez. LOG_LEVEL fija el nivel general y LOG_NIVELES
+el de módulos puntuales, p.ej. LOG_NIVELES=pkg.catalogo=WARNING,pkg.servicio=DEBUG.
+
+Los loggers no escriben en el hilo que registra: un QueueHandler encola el registro y un
+QueueListener (hilo "logging") le da formato y lo escribe en el archivo rotativo y en
+consola. Así la E/S de disco y la rotación no frenan el procesamiento.
+
+El hilo arranca con el primer registro y se detiene con detener_logging(), que vacía la
+cola; se llama al salir del intérprete (atexit), al terminar un proceso del pool de
+multiprocessing y desde main.py al finalizar, haya o no error.
+
+El archivo rota por tamaño y por día (_ArchivoRotativo); los rotados se comprimen y depuran
+en un tercer hilo para que ni siquiera la escritura del log espere a gzip/xz.
+"""
 from __future__ import annotations
+import atexit
 import os
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
 from pathlib import Path
-from dotenv import load_dotenv
 
 ENV_PATH = Path(__file__).resolve().parent / ".env"
-load_dotenv(ENV_PATH)
+_dotenv_cargado = False
 
-def get_logger(name: str | None = None) -> logging.Logger:
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+def cargar_dotenv() -> None:
+    """Carga code/.env una sola vez, en el primer uso (no al importar)."""
+    global _dotenv_cargado
+    if _dotenv_cargado:
+        return
+    from dotenv import load_dotenv  # ~40 ms: solo cuando alguien lee la configuración
+    load_dotenv(ENV_PATH)
+    _dotenv_cargado = True
+
+_EXTENSIONES = {"gzip": ".gz", "xz": ".xz"}
+
+def _comprimir(ruta: str, compresion: str) -> None:
+    """Comprime un log rotado en streaming (.gz/.xz) y borra el original."""
+    if compresion == "gzip":
+        import gzip
+        abrir = gzip.open
+    else:
+        import lzma
+        abrir = lzma.open
+    destino = ruta + _EXTENSIONES[compresion]
+    with open(ruta, "rb") as origen, abrir(destino + ".tmp", "wb") as salida:
+        shutil.copyfileobj(origen, salida, 1024 * 1024)
+    st = os.stat(ruta)
+    os.utime(destino + ".tmp", ns=(st.st_atime_ns, st.st_mtime_ns))  # la antigüedad es la del contenido
+    os.replace(destino + ".tmp", destino)
+    os.remove(ruta)
+
+def _depurar(base: str, copias: int, dias: float) -> None:
+    """Retención de logs rotados (<base>.<aaaammdd-hhmmss>[.gz|.xz]): los `copias` más
+    recientes y, si dias > 0, solo los modificados en los últimos `dias` días."""
+    carpeta, nombre = os.path.split(base)
+    rotados = []
+    for entrada in os.scandir(carpeta):
+        if entrada.name.startswith(nombre + ".") and not entrada.name.endswith(".tmp"):
+            rotados.append((entrada.stat().st_mtime, entrada.path))
+    rotados.sort(reverse=True)
+    limite = time.time() - dias * 86400
+    for i, (mtime, ruta) in enumerate(rotados):
+        if (copias and i >= copias) or (dias > 0 and mtime < limite):
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+def _archivar(ruta: str | None, base: str, compresion: str, copias: int, dias: float) -> None:
+    try:
+        if ruta is not None and compresion in _EXTENSIONES:
+            _comprimir(ruta, compresion)
+        _depurar(base, copias, dias)
+    except Exception as e:  # no hay logger al que avisar sin volver a entrar en la cadena
+        print(f"No se pudo archivar el log rotado {ruta}: {e}", file=sys.stderr)
+
+_archivista = None  # ThreadPoolExecutor de un hilo para comprimir y depurar fuera del logging
+
+def _encolar_archivo(*args) -> None:
+    global _archivista
+    if _archivista is None:
+        from concurrent.futures import ThreadPoolExecutor  # el intérprete espera sus tareas al salir
+        _archivista = ThreadPoolExecutor(max_workers=1, thread_name_prefix="logging-archivo")
+    _archivista.submit(_archivar, *args)
+
+def esperar_archivado() -> None:
+    """Espera a que terminen las compresiones y depuraciones pendientes."""
+    global _archivista
+    archivista, _archivista = _archivista, None
+    if archivista is not None:
+        archivista.shutdown(wait=True)
+
+class _ArchivoRotativo(BaseRotatingHandler):
+    """Archivo de log que rota por tamaño (max_bytes > 0) y/o al cambiar el día.
+
+    La rotación solo renombra el archivo a <base>.<aaaammdd-hhmmss> (un rename, sin la
+    cadena .1 -> .2 -> ... de RotatingFileHandler); la compresión gzip/xz y la retención
+    por cantidad y antigüedad corren en otro hilo. Crea LOG_DIR y abre el archivo recién
+    con el primer registro, y en ese momento archiva lo que una ejecución anterior haya
+    dejado rotado sin comprimir."""
+
+    def __init__(self, filename, max_bytes=0, diario=True, compresion="gzip", copias=30, dias=0.0):
+        super().__init__(filename, "a", encoding="utf-8", delay=True)
+        self.max_bytes = max_bytes
+        self.diario = diario
+        self.compresion = compresion
+        self.copias = copias
+        self.dias = dias
+        self._corte = None  # timestamp de la próxima medianoche
+        self._abierto = False
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        if not self._abierto:
+            self._abierto = True
+            self._archivar_pendientes()
+        return super()._open()
+
+    def _archivar_pendientes(self):
+        nombre = os.path.basename(self.baseFilename)
+        for entrada in os.scandir(os.path.dirname(self.baseFilename)):
+            sufijo = entrada.name[len(nombre) + 1:]
+            if entrada.name.startswith(nombre + ".") and sufijo.replace("-", "").replace("_", "").isdigit():
+                _encolar_archivo(entrada.path, self.baseFilename, self.compresion, self.copias, self.dias)
+        _encolar_archivo(None, self.baseFilename, self.compresion, self.copias, self.dias)
+
+    @staticmethod
+    def _medianoche_siguiente(instante: float) -> float:
+        dia = datetime.fromtimestamp(instante).date() + timedelta(days=1)
+        return datetime.combine(dia, datetime.min.time()).timestamp()
+
+    def shouldRollover(self, record):
+        if self.diario:
+            if self._corte is None:
+                # un archivo que ya existía corta en la medianoche siguiente a su última escritura
+                existente = os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0
+                self._corte = self._medianoche_siguiente(
+                    os.path.getmtime(self.baseFilename) if existente else record.created)
+            if record.created >= self._corte:
+                return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.stream.tell() >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            destino = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S')}"
+            n = 1
+            while any(os.path.exists(destino + s) for s in ("", ".gz", ".xz")):
+                destino = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S')}_{n}"
+                n += 1
+            os.replace(self.baseFilename, destino)
+            _encolar_archivo(destino, self.baseFilename, self.compresion, self.copias, self.dias)
+        self._corte = self._medianoche_siguiente(time.time())
+
+def _crear_destinos() -> list:
+    """Handlers que escriben de verdad (archivo rotativo y consola), según el .env."""
+    cargar_dotenv()
     log_dir = os.getenv("LOG_DIR", "../logs")
     log_file = os.getenv("LOG_FILE", "swaps.log")
-    max_bytes = int(os.getenv("LOG_MAX_BYTES", "1000000"))
-    backup_count = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    max_bytes = int(os.getenv("LOG_MAX_BYTES", "50000000"))
+    backup_count = int(os.getenv("LOG_BACKUP_COUNT", "30"))
+    diario = os.getenv("LOG_ROTAR_DIARIO", "1") == "1"
+    compresion = os.getenv("LOG_COMPRESION", "gzip").lower()
+    dias = float(os.getenv("LOG_RETENCION_DIAS", "90"))
+    if compresion not in _EXTENSIONES and compresion != "ninguna":
+        raise ValueError(f"LOG_COMPRESION debe ser gzip, xz o ninguna (no {compresion!r})")
 
     base = Path(__file__).resolve().parents[1]
     if log_dir.startswith("../"):
         log_dir_path = (base / "code" / log_dir).resolve()
     else:
         log_dir_path = (base / log_dir).resolve()
-    log_dir_path.mkdir(parents=True, exist_ok=True)
-
-    logger = logging.getLogger(name if name else "app")
-    logger.setLevel(getattr(logging, log_level, logging.INFO))
-
-    if logger.handlers:
-        return logger
 
     fmt = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
-    fh = RotatingFileHandler(log_dir_path / log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    fh = _ArchivoRotativo(log_dir_path / log_file, max_bytes=max_bytes, diario=diario, compresion=compresion,
+                          copias=backup_count, dias=dias)
     fh.setFormatter(fmt)
     ch = logging.StreamHandler()
     ch.setFormatter(fmt)
+    return [fh, ch]
+
+_lock = threading.Lock()
+_destinos: list | None = None        # handlers reales, uno de cada tipo por proceso
+_cola: queue.SimpleQueue | None = None
+_escucha: QueueListener | None = None
+_cerrado = False                     # tras atexit los registros se escriben en el mismo hilo
+
+def _iniciar() -> queue.SimpleQueue | None:
+    """Cola activa, arrancando el hilo de escritura si hace falta (None si ya se cerró)."""
+    global _destinos, _cola, _escucha
+    with _lock:
+        if _cerrado:
+            return None
+        if _escucha is None:
+            if _destinos is None:
+                _destinos = _crear_destinos()
+            cola = queue.SimpleQueue()
+            escucha = QueueListener(cola, *_destinos, respect_handler_level=True)
+            escucha.start()
+            escucha._thread.name = "logging"
+            _cola, _escucha = cola, escucha
+            if "multiprocessing" in sys.modules:
+                # los procesos del pool terminan con os._exit, sin atexit: se vacía la cola antes
+                from multiprocessing import util
+                util.Finalize(None, _al_salir, exitpriority=100)
+        return _cola
+
+def detener_logging() -> None:
+    """Escribe lo que quede en la cola y detiene el hilo (vuelve a arrancar si se registra algo más)."""
+    global _cola, _escucha
+    with _lock:
+        escucha, _cola, _escucha = _escucha, None, None
+    if escucha is not None:
+        escucha.stop()  # los handlers hacen flush tras cada registro
+
+def _al_salir() -> None:
+    global _cerrado
+    detener_logging()
+    with _lock:
+        _cerrado = True
+    esperar_archivado()
+
+atexit.register(_al_salir)
+
+def _tras_fork() -> None:
+    # el hilo de escritura no sobrevive a fork: el hijo arranca el suyo (los handlers se heredan)
+    global _cola, _escucha, _lock, _archivista
+    _lock = threading.Lock()
+    _cola = _escucha = _archivista = None
 
-    logger.addHandler(fh)
-    logger.addHandler(ch)
-    return logger
+os.register_at_fork(after_in_child=_tras_fork)
+
+# Argumentos que se pueden formatear en el hilo de logging sin que cambie el texto
+_INMUTABLES = (str, int, float, bool, bytes, type(None))
+
+class _ColaHandler(QueueHandler):
+    """Encola el registro: formato y escritura quedan para el hilo de logging.
+    Solo se difiere getMessage() si el mensaje no tiene argumentos o todos son escalares
+    inmutables (los f-strings del proyecto); si no, o si hay excepción, el mensaje se
+    formatea aquí como en QueueHandler.prepare, con el estado del momento de la llamada."""
+
+    def __init__(self):
+        super().__init__(None)
+
+    def prepare(self, record):
+        args = record.args
+        valores = args.values() if isinstance(args, dict) else (args or ())
+        if record.exc_info is None and record.stack_info is None \
+                and all(isinstance(v, _INMUTABLES) for v in valores):
+            return record
+        record = super().prepare(record)
+        record.stack_info = None  # ya va en msg (Python < 3.12 no lo limpia)
+        return record
+
+    def enqueue(self, record):
+        cola = _iniciar()
+        if cola is not None:
+            cola.put_nowait(record)
+            return
+        for h in _destinos or ():
+            if record.levelno >= h.level:
+                h.handle(record)
+
+_COLA_HANDLER = _ColaHandler()
+
+def _niveles_por_modulo(texto: str) -> dict:
+    """'pkg.catalogo=WARNING,pkg.metricas=DEBUG' -> {'pkg.catalogo': 30, 'pkg.metricas': 10}."""
+    niveles = {}
+    for par in filter(None, (p.strip() for p in texto.split(","))):
+        nombre, _, nivel = par.partition("=")
+        valor = logging.getLevelName(nivel.strip().upper())
+        if not isinstance(valor, int):
+            raise ValueError(f"LOG_NIVELES: nivel inválido en '{par}'")
+        niveles[nombre.strip()] = valor
+    return niveles
+
+def configurar_logging() -> logging.Logger:
+    """Arma la única cadena de handlers: el handler de cola va solo en el logger raíz y los
+    loggers de módulo propagan hacia él sin handlers propios, así cada registro se escribe
+    una vez (también los de logging.info(...) directo). Nivel general LOG_LEVEL y, por
+    módulo, LOG_NIVELES. Es idempotente: volver a llamarla solo reaplica los niveles."""
+    cargar_dotenv()
+    raiz = logging.getLogger()
+    raiz.setLevel(getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO))
+    if _COLA_HANDLER not in raiz.handlers:
+        raiz.addHandler(_COLA_HANDLER)
+    for nombre, nivel in _niveles_por_modulo(os.getenv("LOG_NIVELES", "")).items():
+        logging.getLogger(nombre).setLevel(nivel)
+    return raiz
+
+def get_logger(name: str | None = None) -> logging.Logger:
+    if _COLA_HANDLER not in logging.getLogger().handlers:
+        configurar_logging()
+    return logging.getLogger(name if name else "app")
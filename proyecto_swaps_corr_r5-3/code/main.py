@@ -1,46 +1,311 @@
-from file_path import load_paths
-from logger import get_logger
+from logger import get_logger, detener_logging
 import os
+import argparse
 import logging
-from pkg.procesar_swaps import procesar_swaps
-from pkg.actualizar_informe import actualizar_informe
-from pkg.utils import cargar_env, setup_logging
-
-def main():
-    try:
-            log = get_logger(__name__)
-            rutas = load_paths()
-            log.info('Inicializando proceso con rutas: %s', rutas)
-            rutas = cargar_env()
-            setup_logging(rutas['LOG_DIR'])
-            logging.info("----- INICIO DEL PROCESO DE SWAPS -----")
-
-            # Proceso de modificación de flujos
-            flujos_csv_modificado, fecha = procesar_swaps(
-                rutas['INPUT_DIR'],
-                rutas['OUTPUT_DIR']
-            )
-
-            # Si existe archivo de informe R5, continúa el flujo
-            if flujos_csv_modificado and fecha:
-                informe_actualizado = actualizar_informe(
-                    rutas['INPUT_DIR'],
-                    rutas['OUTPUT_DIR'],
-                    flujos_csv_modificado,
-                    fecha
-                )
-                if informe_actualizado:
-                    logging.info("Proceso completado y archivos generados exitosamente.")
-                else:
-                    logging.warning("Archivo de informe R5 no encontrado. Proceso finalizado solo con swaps.")
-            else:
-                logging.error("Error al procesar el archivo de flujos de swaps.")
-
-            logging.info("----- FIN DEL PROCESO -----")
-
-        if __name__ == "__main__":
-            main()
+import signal
+from pkg.catalogo import catalogo, descubrir_fechas, nombre_salida
+from pkg.utils import cargar_env, setup_logging, get_config
+from pkg.metricas import Metricas
+from pkg.perfil import Perfil, TODO
+from pkg import manifiesto
+from pkg.vigilancia import Vigilante
+from contextlib import nullcontext
+
+# pandas, las etapas, multiprocessing y http.server se importan dentro de las funciones
+# que los usan: --validar, --listar y la omisión por manifiesto arrancan sin cargarlos
+# (tests/test_arranque.py controla el presupuesto con python -X importtime).
+
+def _insumos_previos(rutas, fecha):
+    """(fecha, archivos, entradas, previo) para el manifiesto de la fecha a procesar (indicada,
+    o la más reciente disponible, como procesar_swaps); si no hay insumos, entradas es None."""
+    fechas = descubrir_fechas(rutas['INPUT_DIR'])
+    if fecha is None and fechas:
+        fecha = max(fechas)
+    if fecha not in fechas:
+        return fecha, None, None, None
+    previo = manifiesto.cargar(rutas['OUTPUT_DIR'], fecha)
+    entradas = manifiesto.huellas_entradas(rutas['INPUT_DIR'], fechas[fecha], previo)
+    return fecha, fechas[fecha], entradas, previo
+
+def procesar_fecha(rutas, fecha=None, perfil=None, forzar=False, metricas=None):
+    """Ejecuta procesar_swaps + actualizar_informe para una fecha (o la más reciente si es None).
+    Los flujos procesados pasan en memoria al informe mientras el CSV se escribe en otro hilo.
+    Las métricas por etapa quedan en OUTPUT_DIR/run_metrics_<fecha>.json.
+    perfil: None, 'todo' o el nombre de una etapa a perfilar con cProfile (archivos en LOG_DIR).
+    Si el manifiesto de la fecha coincide con los insumos actuales y las salidas están intactas,
+    no se reprocesa (salvo forzar=True).
+    metricas: Metricas donde registrar las etapas, si quien llama quiere consultarlas.
+    Retorna (fecha, estado, detalle) con estado en {'OK', 'SIN_INFORME', 'ERROR'}: SIN_INFORME solo
+    si la fecha no tiene Informe_R5_GBO; un informe que no se pudo actualizar es ERROR (resumen del
+    lote, código de salida distinto de 0 y 500 en --servir)."""
+    entradas = None
+    try:
+        fecha_prevista, archivos, entradas, previo = _insumos_previos(rutas, fecha)
+        if entradas is not None and not forzar and manifiesto.vigente(previo, entradas, rutas['OUTPUT_DIR']):
+            logging.info(f"{fecha_prevista}: insumos, código y ajustes sin cambios desde {previo['creado']}; "
+                         "se omite el proceso (use --force para reprocesar).")
+            if metricas is not None:
+                metricas.terminar()
+            return fecha_prevista, previo['estado'], "sin cambios"
+    except Exception:
+        logging.exception("No se pudo verificar el manifiesto; se procesa la fecha")
+        entradas = None
+
+    perfilador = Perfil(perfil) if perfil else None
+    if metricas is None:
+        metricas = Metricas()
+    metricas.perfil = perfilador
+    with perfilador.medir() if perfil == TODO else nullcontext():
+        resultado = _procesar_fecha(rutas, fecha, metricas)
+    try:
+        metricas.guardar(rutas['OUTPUT_DIR'], resultado[0])
+    except Exception:
+        logging.exception("No se pudo guardar el archivo de métricas")
+    if perfilador is not None:
+        try:
+            perfilador.guardar(rutas['LOG_DIR'], resultado[0])
+        except Exception:
+            logging.exception("No se pudo guardar el perfil")
+    fecha_proc, estado, _ = resultado
+    if entradas is not None and estado != 'ERROR' and fecha_proc == fecha_prevista:
+        salidas = [nombre_salida(archivos['flujos'])] + ([nombre_salida(archivos['informe'])] if estado == 'OK' else [])
+        try:
+            manifiesto.guardar(rutas['OUTPUT_DIR'], fecha_proc, entradas, salidas, estado)
+        except Exception:
+            logging.exception("No se pudo guardar el manifiesto de la ejecución")
+    return resultado
+
+def _procesar_fecha(rutas, fecha, metricas):
+    from pkg.procesar_swaps import procesar_swaps
+    from pkg.actualizar_informe import actualizar_informe
+
+    # Proceso de modificación de flujos
+    flujos_csv_modificado, fecha_proc, df_flujo, escritura = procesar_swaps(
+        rutas['INPUT_DIR'],
+        rutas['OUTPUT_DIR'],
+        fecha=fecha,
+        en_memoria=True,
+        metricas=metricas
+    )
+
+    # Si existe archivo de informe R5, continúa el flujo
+    if not (flujos_csv_modificado and fecha_proc):
+        logging.error("Error al procesar el archivo de flujos de swaps.")
+        return fecha, 'ERROR', "procesar_swaps no generó el archivo de flujos"
+
+    informe_actualizado = actualizar_informe(
+        rutas['INPUT_DIR'],
+        rutas['OUTPUT_DIR'],
+        flujos_csv_modificado,
+        fecha_proc,
+        df_flujo=df_flujo,
+        metricas=metricas
+    )
+
+    # El CSV de flujos se escribió en paralelo al informe: se espera antes de dar la fecha por terminada
+    try:
+        escritura.result()
+    except Exception as e:
+        logging.exception(f"Error escribiendo el archivo de flujos {flujos_csv_modificado}")
+        return fecha_proc, 'ERROR', f"escritura de flujos: {e}"
+
+    if informe_actualizado:
+        logging.info("Proceso completado y archivos generados exitosamente.")
+        return fecha_proc, 'OK', flujos_csv_modificado
+    if informe_actualizado is not None:
+        # informe presente pero no se pudo actualizar: ERROR, para que el manifiesto no la dé por hecha
+        logging.error("No se pudo actualizar el informe R5; la fecha queda en ERROR.")
+        return fecha_proc, 'ERROR', "actualizar_informe falló"
+    logging.warning("Archivo de informe R5 no encontrado. Proceso finalizado solo con swaps.")
+    return fecha_proc, 'SIN_INFORME', flujos_csv_modificado
+
+def _procesar_fecha_seguro(rutas, fecha, perfil=None, forzar=False):
+    """Envoltura para los procesos del pool: nunca propaga excepciones al padre."""
+    try:
+        return procesar_fecha(rutas, fecha, perfil, forzar)
+    except Exception as e:
+        logging.exception(f"Error no controlado procesando {fecha}")
+        return fecha, 'ERROR', str(e)
+
+def procesar_lote(rutas, workers=None, perfil=None, forzar=False):
+    """Modo lote: procesa todas las fechas con par flujos/.dat en INPUT_DIR,
+    una fecha por proceso, y registra un resumen por fecha.
+    Retorna True si ninguna fecha terminó en ERROR."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    fechas = descubrir_fechas(rutas['INPUT_DIR'])
+    if not fechas:
+        logging.error("No se encontraron pares de flujos/estimaciones en input/")
+        return False
+    for fecha, archivos in fechas.items():
+        if archivos['informe'] is None:
+            logging.warning(f"{fecha}: sin Informe_R5_GBO, solo se procesarán los swaps.")
+
+    if workers is not None and workers < 1:
+        raise ValueError(f"workers debe ser al menos 1 (no {workers})")
+    workers = min(workers if workers is not None else os.cpu_count() or 1, len(fechas))
+    logging.info(f"Modo lote: {len(fechas)} fechas con {workers} procesos")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [pool.submit(_procesar_fecha_seguro, rutas, fecha, perfil, forzar) for fecha in fechas]
+        resultados = [f.result() for f in futuros]
+
+    logging.info("----- RESUMEN POR FECHA -----")
+    for fecha, estado, detalle in resultados:
+        nivel = logging.ERROR if estado == 'ERROR' else logging.INFO
+        logging.log(nivel, f"{fecha}: {estado} ({detalle})")
+    return all(estado != 'ERROR' for _, estado, _ in resultados)
+
+def vigilar(rutas, perfil=None, forzar=False, pendientes=False):
+    """Modo residente: procesa cada fecha nueva de INPUT_DIR cuando sus archivos están completos
+    y estables (ver pkg.vigilancia); con `pendientes`, también las ya presentes al arrancar.
+    Termina con Ctrl+C o SIGTERM."""
+    vigilante = Vigilante(rutas['INPUT_DIR'], lambda fecha: procesar_fecha(rutas, fecha, perfil, forzar),
+                          existentes=pendientes)
+    signal.signal(signal.SIGTERM, lambda *_: vigilante.parar.set())
+    try:
+        vigilante.ejecutar()
+    except KeyboardInterrupt:
+        logging.info("Vigilancia interrumpida por el usuario")
+    return True
+
+def servir(rutas, perfil=None):
+    """Servicio local: procesa fechas a pedido vía HTTP en localhost o socket Unix (ver pkg.servicio)."""
+    from pkg.servicio import crear_servidor
+    from pkg import procesar_swaps, actualizar_informe  # noqa: F401  (pandas cargado antes del primer pedido)
+
+    def procesar(fecha, forzar):
+        archivos = descubrir_fechas(rutas['INPUT_DIR']).get(fecha)
+        if archivos is None:
+            raise FileNotFoundError(f"No hay flujos y .dat para {fecha} en {rutas['INPUT_DIR']}")
+        metricas = Metricas()
+        fecha_proc, estado, detalle = procesar_fecha(rutas, fecha, perfil, forzar, metricas)
+        salidas = {}
+        if estado != 'ERROR':
+            salidas['flujos'] = os.path.join(rutas['OUTPUT_DIR'], nombre_salida(archivos['flujos']))
+        if estado == 'OK':
+            salidas['informe'] = os.path.join(rutas['OUTPUT_DIR'], nombre_salida(archivos['informe']))
+        return {"fecha": fecha_proc, "estado": estado, "detalle": detalle, "salidas": salidas,
+                "etapas": metricas.como_dict(fecha_proc)["etapas"]}
+
+    servidor = crear_servidor(procesar)
+
+    def _terminar(*_):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, _terminar)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Servicio detenido")
+    finally:
+        servidor.server_close()
+    return True
+
+# Configuración que se muestra con --validar: (variable, valor por defecto)
+_CONFIG_VISIBLE = (
+    ("CSV_ENGINE", "c"),
+    ("FLUJOS_CHUNK_ROWS", "0"),
+    ("INCREMENTAL", "0"),
+    ("LOG_LEVEL", "INFO"),
+    ("METRICAS_MEMORIA", "0"),
+    ("SALIDA_COMPRESION", "ninguna"),
+    ("SALIDA_CSV_MOTOR", "pandas"),
+)
+
+def validar():
+    """Subcomando liviano: verifica rutas y dependencias opcionales sin importar pandas."""
+    from importlib.util import find_spec
+
+    try:
+        rutas = cargar_env()
+    except (FileNotFoundError, NotADirectoryError) as e:
+        print(f"ERROR: {e}")
+        return False
+    for clave, ruta in rutas.items():
+        print(f"{clave:<18} {ruta}")
+    for clave, defecto in _CONFIG_VISIBLE:
+        print(f"{clave:<18} {get_config(clave, defecto)}")
+    faltantes = [m for m in ("pandas", "numpy") if find_spec(m) is None]
+    print(f"{'pyarrow':<18} {'disponible' if find_spec('pyarrow') else 'no instalado'}")
+    if faltantes:
+        print(f"ERROR: faltan dependencias: {', '.join(faltantes)}")
+        return False
+    print("Configuración válida.")
+    return True
+
+def listar(rutas):
+    """Subcomando liviano: lista las fechas de INPUT_DIR y qué archivos tiene cada una."""
+    cat = catalogo(rutas['INPUT_DIR'])
+    for fecha in sorted(cat.por_fecha):
+        archivos = cat.archivos(fecha)
+        presentes = " ".join(tipo for tipo, nombre in archivos.items() if nombre)
+        estado = "completa" if archivos['flujos'] and archivos['dat'] else "incompleta"
+        print(f"{fecha}  {estado:<10}  {presentes}")
+    return True
+
+def _entero_positivo(texto):
+    """Tipo de argparse para --workers: entero >= 1."""
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"se esperaba un entero, no {texto!r}")
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"debe ser al menos 1 (no {valor})")
+    return valor
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Procesamiento de flujos de swaps e informe R5.")
+    parser.add_argument("--lote", action="store_true",
+                        help="Procesa todas las fechas disponibles en INPUT_DIR en paralelo.")
+    parser.add_argument("--workers", type=_entero_positivo, default=None,
+                        help="Procesos para el modo lote (por defecto, número de CPUs).")
+    parser.add_argument("--profile", nargs="?", const=TODO, default=None, metavar="ETAPA",
+                        help="Perfila con cProfile la ejecución completa o solo ETAPA (p.ej. cruce); "
+                             "deja perfil_<fecha>.pstats y .folded en LOG_DIR.")
+    parser.add_argument("--vigilar", action="store_true",
+                        help="Queda residente y procesa cada fecha nueva de INPUT_DIR cuando sus archivos están estables.")
+    parser.add_argument("--pendientes", action="store_true",
+                        help="Con --vigilar, procesa también las fechas ya presentes al arrancar.")
+    parser.add_argument("--servir", action="store_true",
+                        help="Queda residente atendiendo pedidos de proceso por fecha (HTTP local o socket Unix).")
+    parser.add_argument("--force", action="store_true",
+                        help="Reprocesa aunque el manifiesto indique que insumos y código no cambiaron.")
+    parser.add_argument("--validar", action="store_true",
+                        help="Verifica rutas, configuración y dependencias, y termina (no procesa).")
+    parser.add_argument("--listar", action="store_true",
+                        help="Lista las fechas disponibles en INPUT_DIR y sus archivos, y termina.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if args.validar:
+        return 0 if validar() else 1
+    try:
+        log = get_logger(__name__)
+        rutas = cargar_env()
+        if args.listar:
+            return 0 if listar(rutas) else 1
+        log.info('Inicializando proceso con rutas: %s', rutas)
+        setup_logging(rutas['LOG_DIR'])
+        logging.info("----- INICIO DEL PROCESO DE SWAPS -----")
+
+        if args.servir:
+            ok = servir(rutas, args.profile)
+        elif args.vigilar:
+            ok = vigilar(rutas, args.profile, args.force, args.pendientes)
+        elif args.lote:
+            ok = procesar_lote(rutas, args.workers, args.profile, args.force)
+        else:
+            _, estado, _ = procesar_fecha(rutas, perfil=args.profile, forzar=args.force)
+            ok = estado != 'ERROR'
+
+        logging.info("----- FIN DEL PROCESO -----")
+        return 0 if ok else 1
 
     except Exception:
         logging.exception('Error no controlado en main()')
         raise
+    finally:
+        detener_logging()  # vacía la cola de logging antes de salir, también con error
+
+if __name__ == "__main__":
+    raise SystemExit(main())
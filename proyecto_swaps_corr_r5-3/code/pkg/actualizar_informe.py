@@ -1,53 +1,85 @@
 import os
+import numpy as np
 import pandas as pd
 import logging
 from pkg.utils import safe_read_csv, safe_to_csv
+from pkg.cache import leer_csv_cacheado
+from pkg.esquemas import leer_para_reescribir, opciones_lectura
+from pkg.metricas import etapa
+from pkg.catalogo import catalogo, nombre_salida
 from logger import get_logger
 log = get_logger(__name__)
 
-def actualizar_informe(input_dir, output_dir, flujos_csv, fecha):
+def calcular_cupones(df_flujo):
+    """Agrupa los flujos procesados por contrato (cod_emp como texto) y devuelve
+    cupon/cupon_1 = suma de der_vp/obl_vp en millones, redondeada a 6 decimales.
+
+    Las filas se ordenan una sola vez por contrato y cada grupo se suma como un
+    segmento contiguo con el mismo orden y algoritmo de `Series.sum`, de modo que
+    los redondeos coinciden con el cálculo fila a fila.
+    """
+    codigos, contratos = pd.factorize(df_flujo['cod_emp'].astype(str).str.strip())
+    orden = np.argsort(codigos, kind='stable')
+    conteo = np.bincount(codigos, minlength=len(contratos))
+    fines = np.cumsum(conteo)
+    segmentos = list(zip((fines - conteo).tolist(), fines.tolist()))
+
+    cupones = pd.DataFrame(index=contratos)
+    for origen, destino in (('der_vp', 'cupon'), ('obl_vp', 'cupon_1')):
+        valores = df_flujo[origen].fillna(0).to_numpy()[orden]
+        sumas = np.array([valores[a:b].sum() for a, b in segmentos], dtype=float)
+        cupones[destino] = (sumas / 1_000_000).round(6)
+    return cupones
+
+def actualizar_informe(input_dir, output_dir, flujos_csv, fecha, df_flujo=None, metricas=None):
+    """Actualiza cupon/cupon_1 del Informe R5 de `fecha` con los flujos procesados.
+    Si se recibe df_flujo (entrega en memoria desde procesar_swaps) no se lee el
+    archivo de flujos de output_dir; si no, se lee flujos_csv como en una ejecución aislada.
+    metricas: pkg.metricas.Metricas opcional donde se registran las etapas.
+    Retorna True si el informe se actualizó, None si la fecha no tiene Informe_R5_GBO en
+    input_dir y False si la actualización falló."""
     log.info('actualizar_informe iniciado')
     try:
-        informe_pattern = f"Informe_R5_GBO_{fecha[2:8]}.csv"
-        archivos = os.listdir(input_dir)
-        informe_csv = [f for f in archivos if f == informe_pattern]
+        informe_csv = catalogo(input_dir).archivos(fecha)["informe"]
         if not informe_csv:
-            logging.warning(f"No existe archivo de informe {informe_pattern}.")
-            return False
-        informe_csv = informe_csv[0]
+            logging.warning(f"No existe archivo de informe Informe_R5_GBO_{fecha[2:8]}.csv.")
+            return None
         logging.info(f"Archivo de informe encontrado: {informe_csv}")
 
         flujo_path = os.path.join(output_dir, flujos_csv)
         informe_path = os.path.join(input_dir, informe_csv)
 
-        if not os.path.exists(flujo_path):
+        if df_flujo is None and not os.path.exists(flujo_path):
             logging.error(f"No existe el archivo de flujos procesado: {flujo_path}.")
             return False
         if not os.path.exists(informe_path):
             logging.error(f"No existe el archivo de informe R5 de entrada: {informe_path}.")
             return False
 
-        df_flujo = safe_read_csv(flujo_path, sep=';', encoding='latin1')
-        df_informe = safe_read_csv(informe_path, sep=';', encoding='latin1')
+        # Del archivo de flujos solo se necesitan cod_emp, der_vp y obl_vp
+        if df_flujo is None:
+            with etapa(metricas, "lectura_flujos_procesados") as m:
+                df_flujo = safe_read_csv(flujo_path, **opciones_lectura(flujo_path, 'flujos', 'actualizar_informe'))
+                m["filas_salida"] = df_flujo.shape[0]
+        with etapa(metricas, "lectura_informe") as m:
+            df_informe = leer_para_reescribir(informe_path, 'informe', 'actualizar_informe', leer_csv_cacheado)
+            m["filas_salida"] = df_informe.shape[0]
 
         # FORZAR float ANTES DE MODIFICAR
         df_informe['cupon'] = df_informe['cupon'].astype(float)
         df_informe['cupon_1'] = df_informe['cupon_1'].astype(float)
 
-        for i, row in df_informe.iterrows():
-            codigo = str(row['codigo_operacion']).strip()
-            registros = df_flujo[df_flujo['cod_emp'].astype(str).str.strip() == codigo]
-            if not registros.empty:
-                cupon = registros['der_vp'].fillna(0).sum() / 1_000_000
-                cupon_1 = registros['obl_vp'].fillna(0).sum() / 1_000_000
-                df_informe.at[i, 'cupon'] = round(cupon, 6)
-                df_informe.at[i, 'cupon_1'] = round(cupon_1, 6)
-            else:
-                df_informe.at[i, 'cupon'] = 0
-                df_informe.at[i, 'cupon_1'] = 0
-
-        output_path = os.path.join(output_dir, informe_csv)
-        safe_to_csv(df_informe, output_path, sep=';', index=False, encoding='latin1')
+        # Cruce vectorizado: sumas por contrato en una pasada; sin flujos => 0
+        with etapa(metricas, "agregacion", df_flujo.shape[0]) as m:
+            cupones = calcular_cupones(df_flujo)
+            codigos = df_informe['codigo_operacion'].astype(str).str.strip()
+            df_informe['cupon'] = codigos.map(cupones['cupon']).fillna(0).astype(float)
+            df_informe['cupon_1'] = codigos.map(cupones['cupon_1']).fillna(0).astype(float)
+            m["filas_salida"] = df_informe.shape[0]
+
+        output_path = os.path.join(output_dir, nombre_salida(informe_csv))
+        with etapa(metricas, "escritura_informe", df_informe.shape[0]):
+            safe_to_csv(df_informe, output_path, sep=';', index=False, encoding='latin1')
         logging.info(f"Informe R5 actualizado guardado en {output_path}.")
         return True
 
@@ -0,0 +1,112 @@
+# code/pkg/cache.py
+"""Caché local de entradas ya parseadas (formato Feather).
+
+Cada entrada se indexa por la huella del archivo de origen (ruta + tamaño + mtime +
+hash del contenido) y por los argumentos de lectura, de modo que una re-ejecución
+sobre los mismos insumos carga el DataFrame tipado sin volver a parsear el CSV.
+El directorio se acota a CACHE_MAX_BYTES eliminando las entradas menos usadas (LRU).
+Se activa definiendo CACHE_DIR en el .env y requiere pyarrow; sin él se lee el CSV.
+"""
+from __future__ import annotations
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from file_path import ensure_dir, _abs_from_code_root
+from logger import get_logger
+from pkg.utils import safe_read_csv, get_config
+
+try:
+    import pyarrow  # noqa: F401  (requerido por to_feather / read_feather)
+except Exception:  # sin pyarrow la caché queda desactivada
+    pyarrow = None
+
+log = get_logger(__name__)
+
+# Subir si cambia la forma de parsear los insumos, para invalidar entradas antiguas
+CACHE_VERSION = 1
+_BLOQUE_HASH = 1 << 20
+
+
+def huella_archivo(path) -> str:
+    """Huella del archivo: ruta absoluta, tamaño, mtime y hash del contenido."""
+    p = Path(path).resolve()
+    st = p.stat()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{p}|{st.st_size}|{st.st_mtime_ns}|".encode("utf-8"))
+    with open(p, "rb") as f:
+        for bloque in iter(lambda: f.read(_BLOQUE_HASH), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def directorio_cache() -> Path | None:
+    """Directorio de caché configurado, o None si está desactivada."""
+    raw = get_config("CACHE_DIR", "")
+    if not raw or pyarrow is None:
+        return None
+    return ensure_dir(_abs_from_code_root(raw), "CACHE_DIR", create=True)
+
+
+def _clave(path, kwargs) -> str:
+    firma = f"{CACHE_VERSION}|{huella_archivo(path)}|{sorted(kwargs.items())!r}"
+    return hashlib.blake2b(firma.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _desde_feather(entrada: Path, dtype=None) -> pd.DataFrame:
+    """Carga una entrada con los mismos dtypes que devuelve read_csv con `dtype`."""
+    df = pd.read_feather(entrada)
+    # Arrow devuelve None en columnas de texto; read_csv deja NaN
+    for col in df.select_dtypes(include="object").columns:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    # read_feather devuelve string[python] donde se pidió string[pyarrow]: se restauran los pedidos
+    if isinstance(dtype, dict):
+        pedidos = {c: t for c, t in dtype.items() if c in df.columns}
+    else:
+        pedidos = dict.fromkeys(df.columns, dtype) if dtype is not None else {}
+    distintos = {c: t for c, t in pedidos.items() if df[c].dtype != pd.api.types.pandas_dtype(t)}
+    return df.astype(distintos) if distintos else df
+
+
+def _desalojar(directorio: Path, max_bytes: int) -> None:
+    """Elimina las entradas menos usadas (mtime más antiguo) hasta quedar bajo max_bytes."""
+    entradas = sorted(directorio.glob("*.feather"), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in entradas)
+    for p in entradas:
+        if total <= max_bytes:
+            break
+        total -= p.stat().st_size
+        p.unlink(missing_ok=True)
+        log.info("Caché: entrada desalojada %s", p.name)
+
+
+def leer_csv_cacheado(path, **kwargs) -> pd.DataFrame:
+    """Igual que safe_read_csv, reutilizando el DataFrame parseado si el archivo no cambió."""
+    directorio = directorio_cache()
+    if directorio is None or kwargs.get("chunksize"):
+        return safe_read_csv(path, **kwargs)
+
+    entrada = directorio / f"{_clave(path, kwargs)}.feather"
+    if entrada.exists():
+        try:
+            df = _desde_feather(entrada, kwargs.get("dtype"))
+            os.utime(entrada)  # marca de uso para el LRU
+            log.info("Caché: acierto para %s", os.path.basename(path))
+            return df
+        except Exception as e:
+            log.warning("Caché: entrada ilegible %s (%s); se vuelve a parsear", entrada.name, e)
+            entrada.unlink(missing_ok=True)
+
+    df = safe_read_csv(path, **kwargs)
+    tmp = entrada.with_suffix(".tmp")
+    try:
+        df.to_feather(tmp)
+        os.replace(tmp, entrada)
+        _desalojar(directorio, int(get_config("CACHE_MAX_BYTES", "2147483648")))
+    except Exception as e:  # p.ej. columnas con tipos mixtos no representables en Arrow
+        log.warning("Caché: no se pudo guardar %s (%s)", os.path.basename(path), e)
+        tmp.unlink(missing_ok=True)
+    return df
@@ -0,0 +1,172 @@
+# code/pkg/catalogo.py
+"""Catálogo de archivos de entrada por fecha.
+
+Recorre INPUT_DIR una sola vez con os.scandir, reconoce los archivos del proceso por su
+nombre y los agrupa por fecha (aaaammdd):
+    flujos_swap_gbo_aaaammdd.csv   -> 'flujos'
+    COL_ESTIM_FLOWS_ddmmaaaa.dat   -> 'dat'
+    Informe_R5_GBO_aammdd.csv      -> 'informe'
+cada uno también comprimido (.gz, .xz, .bz2 o .zip con un único archivo), p.ej.
+flujos_swap_gbo_aaaammdd.csv.gz; los lectores lo descomprimen en streaming. Las salidas
+llevan el nombre sin la extensión de compresión de la entrada, más la de SALIDA_COMPRESION
+si se comprimen (nombre_salida).
+
+El catálogo se reutiliza mientras no cambie el mtime del directorio (que cambia al crear,
+borrar o renombrar archivos), así que las etapas consultan los archivos de una fecha en
+O(1) sin volver a listar carpetas con miles de archivos históricos. Como el mtime tiene
+resolución limitada, un archivo creado en el mismo instante que el escaneo no lo cambia:
+si el mtime del directorio estaba a menos de MARGEN_MTIME_NS del escaneo, ese catálogo no
+se reutiliza ("racy mtime", como el índice de git).
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from datetime import datetime
+
+from logger import get_logger
+from pkg.utils import separar_compresion, sufijo_salida
+
+log = get_logger(__name__)
+
+# (tipo, prefijo, extensión)
+PATRONES = (
+    ("flujos", "flujos_swap_gbo", ".csv"),
+    ("dat", "COL_ESTIM_FLOWS", ".dat"),
+    ("informe", "Informe_R5_GBO", ".csv"),
+)
+
+
+def nombre_salida(nombre: str) -> str:
+    """Nombre del archivo de salida para una entrada: sin la extensión de compresión de la
+    entrada y con la de SALIDA_COMPRESION ('flujos_..._20250910.csv.zip' -> '....csv.gz')."""
+    return separar_compresion(nombre)[0] + sufijo_salida()
+
+
+def extraer_fecha(nombre):
+    """Extrae la fecha del nombre de archivo y la retorna en (aaaa, mm, dd)"""
+    base = separar_compresion(os.path.basename(nombre))[0]
+    if "flujos_swap_gbo" in base:
+        fecha = base.split("_")[-1].split(".")[0]
+        return fecha[:4], fecha[4:6], fecha[6:8]
+    if "COL_ESTIM_FLOWS" in base:
+        fecha = base.split("_")[-1].split(".")[0]
+        return fecha[4:8], fecha[2:4], fecha[0:2]
+    if "Informe_R5_GBO" in base:
+        fecha = base.split("_")[-1].split(".")[0]
+        return "20" + fecha[0:2], fecha[2:4], fecha[4:6]
+    return None, None, None
+
+
+def _fecha_valida(partes) -> str | None:
+    fecha = "".join(p or "" for p in partes)
+    try:
+        datetime.strptime(fecha, "%Y%m%d")
+    except ValueError:
+        return None
+    return fecha if len(fecha) == 8 else None
+
+
+def tipo_archivo(nombre: str) -> str | None:
+    nombre = separar_compresion(nombre)[0]
+    for tipo, prefijo, extension in PATRONES:
+        if nombre.startswith(prefijo) and nombre.endswith(extension):
+            return tipo
+    return None
+
+
+class Archivo:
+    """Nombre, tamaño y mtime de un archivo de entrada al momento del escaneo."""
+
+    def __init__(self, nombre: str, tamano: int, mtime_ns: int):
+        self.nombre = nombre
+        self.tamano = tamano
+        self.mtime_ns = mtime_ns
+
+
+class Catalogo:
+    """Archivos de entrada de un directorio agrupados por fecha."""
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self.por_fecha: dict[str, dict[str, Archivo]] = {}
+
+    def archivos(self, fecha: str) -> dict:
+        """{'flujos': nombre | None, 'dat': nombre | None, 'informe': nombre | None} de la fecha."""
+        grupo = self.por_fecha.get(fecha, {})
+        return {tipo: grupo[tipo].nombre if tipo in grupo else None for tipo, _, _ in PATRONES}
+
+    def metadatos(self, fecha: str, tipo: str) -> Archivo | None:
+        return self.por_fecha.get(fecha, {}).get(tipo)
+
+    def fechas_completas(self) -> list:
+        """Fechas con el par flujos/.dat, ordenadas."""
+        return sorted(f for f, grupo in self.por_fecha.items() if "flujos" in grupo and "dat" in grupo)
+
+    def ultima_fecha(self) -> str | None:
+        completas = self.fechas_completas()
+        return completas[-1] if completas else None
+
+
+def escanear(input_dir) -> Catalogo:
+    """Construye el catálogo con una pasada de os.scandir."""
+    catalogo = Catalogo(os.path.abspath(input_dir))
+    with os.scandir(input_dir) as entradas:
+        for entrada in entradas:
+            tipo = tipo_archivo(entrada.name)
+            if tipo is None or not entrada.is_file():
+                continue
+            fecha = _fecha_valida(extraer_fecha(entrada.name))
+            if fecha is None:
+                log.warning(f"Archivo con fecha no reconocible en el nombre, se ignora: {entrada.name}")
+                continue
+            grupo = catalogo.por_fecha.setdefault(fecha, {})
+            previo = grupo.get(tipo)
+            if previo is not None:
+                # más de un archivo del mismo tipo y fecha: se usa siempre el primero por nombre
+                elegido = min(previo.nombre, entrada.name)
+                log.warning(f"Varios archivos '{tipo}' para {fecha}: {previo.nombre}, {entrada.name}; se usa {elegido}")
+                if elegido == previo.nombre:
+                    continue
+            st = entrada.stat()
+            grupo[tipo] = Archivo(entrada.name, st.st_size, st.st_mtime_ns)
+    return catalogo
+
+
+_CATALOGOS: dict = {}  # ruta absoluta -> (mtime_ns del directorio, reutilizable, Catalogo)
+MARGEN_MTIME_NS = 2_000_000_000
+_lock = threading.Lock()
+
+
+def catalogo(input_dir) -> Catalogo:
+    """Catálogo de input_dir, reutilizado mientras el directorio no cambie."""
+    ruta = os.path.abspath(input_dir)
+    mtime = os.stat(ruta).st_mtime_ns
+    with _lock:
+        cacheado = _CATALOGOS.get(ruta)
+        if cacheado is not None and cacheado[0] == mtime and cacheado[1]:
+            return cacheado[2]
+    # un cambio en el mismo tick del mtime no se vería: solo se confía en mtimes ya "viejos"
+    reutilizable = time.time_ns() - mtime >= MARGEN_MTIME_NS
+    nuevo = escanear(ruta)
+    with _lock:
+        _CATALOGOS[ruta] = (mtime, reutilizable, nuevo)
+    log.info(f"Catálogo de {ruta}: {len(nuevo.por_fecha)} fechas, {len(nuevo.fechas_completas())} con flujos y .dat")
+    return nuevo
+
+
+def descubrir_fechas(input_dir):
+    """Agrupa por fecha (aaaammdd) los archivos de entrada de input_dir.
+    Retorna {fecha: {'flujos': ..., 'dat': ..., 'informe': ... o None}} solo para las
+    fechas que tienen el par flujos/.dat completo, ordenado por fecha."""
+    cat = catalogo(input_dir)
+    return {fecha: cat.archivos(fecha) for fecha in cat.fechas_completas()}
+
+
+def invalidar(input_dir=None) -> None:
+    """Descarta el catálogo cacheado (todos si input_dir es None)."""
+    with _lock:
+        if input_dir is None:
+            _CATALOGOS.clear()
+        else:
+            _CATALOGOS.pop(os.path.abspath(input_dir), None)
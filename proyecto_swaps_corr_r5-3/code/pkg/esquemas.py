@@ -0,0 +1,109 @@
+# code/pkg/esquemas.py
+"""Esquemas declarados de los archivos de entrada.
+
+Cada esquema fija el tipo de las columnas que el proceso usa y cada etapa puede
+proyectar solo las columnas que necesita; las columnas no declaradas se leen como
+texto (Arrow si está pyarrow).
+
+Las lecturas de archivos que la etapa reescribe completos (los flujos en procesar_swaps,
+el informe en actualizar_informe) no fijan el tipo de las columnas declaradas: read_csv
+los infiere como siempre, así la salida conserva el formato del archivo (1000 sigue
+siendo 1000 y no 1000.0, 0.050 se escribe 0.05 como antes). Con leer_para_reescribir, las
+columnas que el proceso no toca (no declaradas) se leen como texto Arrow: ocupan mucho
+menos que object, se parsean más rápido y se reescriben igual; solo las que podrían ser
+números o booleanos (p.ej. una tasa 0.050, que read_csv reescribiría 0.05) se vuelven a
+leer con inferencia.
+"""
+from __future__ import annotations
+from pkg.utils import safe_read_csv
+
+try:
+    import pyarrow  # noqa: F401
+    TEXTO = "string[pyarrow]"
+except Exception:  # sin pyarrow, texto como object
+    TEXTO = "object"
+
+ESQUEMAS = {
+    # flujos_swap_gbo_aaaammdd.csv
+    "flujos": {
+        "cod_emp": TEXTO,
+        "fecha_cobro": TEXTO,
+        "der_vp": "float64",
+        "obl_vp": "float64",
+        "der_intereses": "float64",
+        "obl_intereses": "float64",
+    },
+    # COL_ESTIM_FLOWS_ddmmaaaa.dat
+    "dat": {
+        "M_CONTRACT_": "float64",
+        "M_DATE": "category",
+        "M_DISCFLOWC": "float64",
+        "M_FLOW_COL": "float64",
+    },
+    # Informe_R5_GBO_aammdd.csv
+    "informe": {
+        "codigo_operacion": TEXTO,
+        "cupon": "float64",
+        "cupon_1": "float64",
+    },
+}
+
+# Lecturas de archivos que se reescriben completos: tipos inferidos por read_csv
+SE_REESCRIBEN = {("procesar_swaps", "flujos"), ("actualizar_informe", "informe")}
+
+# Columnas que cada etapa necesita (None = todas, porque el archivo se reescribe)
+PROYECCIONES = {
+    ("procesar_swaps", "flujos"): None,
+    ("procesar_swaps", "dat"): list(ESQUEMAS["dat"]),
+    ("actualizar_informe", "flujos"): ["cod_emp", "der_vp", "obl_vp"],
+    ("actualizar_informe", "informe"): None,
+}
+
+
+# Texto que read_csv podría inferir como número o booleano (dígitos, signo, punto,
+# exponente, inf/infinity/nan, true/false); con cualquier otro carácter la columna es texto
+_POSIBLE_NUMERO = r"[\s0-9+\-.aefilnrstuyAEFILNRSTUY]*"
+
+
+def opciones_lectura(path, archivo: str, etapa: str, sep: str = ";", encoding: str = "latin1",
+                     pasantes_texto: bool = False) -> dict:
+    """Argumentos de read_csv (sep, encoding, usecols, dtype) para `archivo` en `etapa`.
+
+    Lee solo la cabecera para fijar el tipo de todas las columnas: las declaradas
+    según ESQUEMAS y el resto como texto; sin `dtype` si la etapa reescribe el archivo
+    (SE_REESCRIBEN), salvo con `pasantes_texto`, que fija como texto las no declaradas
+    (ver leer_para_reescribir). Las columnas proyectadas que no existan se omiten;
+    el error aparece, como antes, al usarlas.
+    """
+    esquema = ESQUEMAS[archivo]
+    columnas = list(safe_read_csv(path, sep=sep, encoding=encoding, nrows=0).columns)
+    proyeccion = PROYECCIONES.get((etapa, archivo))
+    if proyeccion is not None:
+        columnas = [c for c in columnas if c in proyeccion]
+    opciones = {"sep": sep, "encoding": encoding, "usecols": columnas}
+    if (etapa, archivo) not in SE_REESCRIBEN:
+        opciones["dtype"] = {c: esquema.get(c, TEXTO) for c in columnas}
+    elif pasantes_texto:
+        opciones["dtype"] = {c: TEXTO for c in columnas if c not in esquema}
+    return opciones
+
+
+def leer_para_reescribir(path, archivo: str, etapa: str, leer=safe_read_csv):
+    """Lee completo un archivo que la etapa reescribe, con el mismo resultado al escribirlo
+    que la lectura con tipos inferidos: las columnas declaradas se infieren y las que el
+    proceso no toca quedan como texto Arrow, salvo las que read_csv habría leído como
+    números o booleanos, que se vuelven a leer (solo esas) con inferencia.
+    `leer` es safe_read_csv o pkg.cache.leer_csv_cacheado."""
+    opciones = opciones_lectura(path, archivo, etapa, pasantes_texto=True)
+    df = leer(path, **opciones)
+    ambiguas = []
+    for columna in opciones.get("dtype", {}):
+        valores = df[columna].dropna()
+        if len(valores) and valores.str.fullmatch(_POSIBLE_NUMERO).all():
+            ambiguas.append(columna)
+    if ambiguas:
+        inferir = {k: v for k, v in opciones.items() if k != "dtype"}
+        inferidas = leer(path, **dict(inferir, usecols=ambiguas))
+        for columna in ambiguas:
+            df[columna] = inferidas[columna]
+    return df
@@ -0,0 +1,450 @@
+# code/pkg/incremental.py
+"""Modo incremental de procesar_swaps (INCREMENTAL=1 en el .env).
+
+Tras cada ejecución se guarda en INCREMENTAL_DIR el estado de la fecha procesada (archivos
+propios de cada fecha, para que los procesos de --lote no se pisen):
+la tabla de estimaciones del .dat (por contrato y fecha), y por cada fila escrita el hash
+de su línea de entrada, su clave, sus importes para el informe y su posición en el archivo
+de salida. Con ese estado, la ejecución siguiente:
+
+1. compara el lookup del .dat de hoy con el anterior y obtiene las claves
+   (M_CONTRACT_, M_DATE) cuyas estimaciones cambiaron, aparecieron o desaparecieron;
+2. copia tal cual de la salida anterior las líneas de flujos idénticas a las de ayer
+   cuya clave no cambió y cuya fecha_cobro sigue siendo posterior a la fecha de hoy;
+3. descarta sin parsear las líneas que ya se descartaron por fecha en una fecha anterior;
+4. parsea, filtra y cruza solo el resto, con las mismas funciones del modo completo.
+
+Los tipos de las columnas los infiere read_csv sobre el archivo entero (un importe con
+decimales o vacío en cualquier fila hace float a toda la columna), así que el estado
+guarda además, por línea y columna, la clase de su texto (entero, decimal, nulo, booleano
+u otro) y si recibió decimales del .dat. Con eso se obtiene el tipo de cada columna sin
+parsear las líneas reutilizadas; si difiere del de la salida anterior, sus líneas no se
+pueden copiar y se recalculan.
+
+El resultado es idéntico byte a byte al del modo completo. Si el estado no sirve (otra
+versión del código, otros ajustes, cabecera distinta, salida anterior modificada) o el
+archivo de flujos tiene comillas, el cruce se hace completo por este mismo camino y se
+deja el estado para la fecha siguiente. La base es el estado más reciente no posterior a la
+fecha procesada; los anteriores a esa base se podan. Requiere pyarrow (estado en formato Feather) y
+salidas sin comprimir (SALIDA_COMPRESION=ninguna): las líneas reutilizadas se copian por
+posición desde la salida anterior.
+"""
+from __future__ import annotations
+import hashlib
+import io
+import json
+import mmap
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from logger import get_logger
+from pkg import manifiesto
+from pkg.esquemas import ESQUEMAS, opciones_lectura
+from pkg.metricas import etapa
+from pkg.salida import EscrituraAtomica
+from pkg.utils import abrir_binario, get_config, detectar_encoding, safe_read_csv, sufijo_salida
+
+try:
+    import pyarrow  # noqa: F401  (requerido por to_feather / read_feather)
+except Exception:  # sin pyarrow el modo incremental queda desactivado
+    pyarrow = None
+
+log = get_logger(__name__)
+
+ESTADO_VERSION = 3
+# Clase del texto de un campo (bits, por línea y columna); RECIBE_DECIMALES: el cruce le
+# asignó una estimación no entera (promueve a float una columna entera)
+ENTERO, DECIMAL, NULO, BOOLEANO, OTRO, RECIBE_DECIMALES = 1, 2, 4, 8, 16, 32
+_ENTERO = r"\s*[+-]?\d{1,18}\s*"
+_BOOLEANOS = ["True", "TRUE", "true", "False", "FALSE", "false"]
+_COLUMNAS = ["cod_emp", "fecha_cobro"] + [c for c in ESQUEMAS["flujos"] if c not in ("cod_emp", "fecha_cobro")]
+
+
+def activo(chunksize: int = 0) -> bool:
+    """INCREMENTAL=1 y se puede usar. En modo streaming (chunksize > 0) no aplica: el modo
+    incremental lee el archivo de flujos completo en memoria."""
+    if get_config("INCREMENTAL", "0").lower() not in ("1", "true", "si", "sí"):
+        return False
+    if chunksize and chunksize > 0:
+        log.info("INCREMENTAL=1 no aplica con FLUJOS_CHUNK_ROWS > 0; se procesa en modo streaming.")
+        return False
+    if pyarrow is None:
+        log.warning("INCREMENTAL=1 pero pyarrow no está instalado; se procesa en modo completo.")
+        return False
+    if sufijo_salida():
+        log.warning("INCREMENTAL=1 no aplica con SALIDA_COMPRESION; se procesa en modo completo.")
+        return False
+    return True
+
+
+def directorio_estado(output_dir) -> str:
+    return get_config("INCREMENTAL_DIR", "") or os.path.join(output_dir, "incremental")
+
+
+def _hashes(lineas: list) -> np.ndarray:
+    """Hash de 128 bits por línea, como matriz (n, 2) de uint64."""
+    digestos = b"".join(hashlib.blake2b(l, digest_size=16).digest() for l in lineas)
+    return np.frombuffer(digestos, dtype=np.uint64).reshape(-1, 2)
+
+
+def _buscar(anteriores: np.ndarray, actuales: np.ndarray) -> np.ndarray:
+    """Posición en `anteriores` de cada hash de `actuales` (-1 si no está). Se indexa por la
+    primera mitad del hash y se confirma con la segunda; con repetidos basta la primera aparición."""
+    indice = pd.Index(anteriores[:, 0])
+    unicas = np.flatnonzero(~indice.duplicated())
+    pos = indice[unicas].get_indexer(actuales[:, 0])
+    ok = pos >= 0
+    pos[ok] = unicas[pos[ok]]
+    ok[ok] = anteriores[pos[ok], 1] == actuales[ok, 1]
+    pos[~ok] = -1
+    return pos
+
+
+def _estados(directorio) -> list:
+    """Fechas con estado guardado en el directorio (estado_<fecha>.json), ordenadas."""
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return []
+    return sorted(n[len("estado_"):-len(".json")] for n in nombres
+                  if n.startswith("estado_") and n.endswith(".json"))
+
+
+def _elegir_estado(fechas: list, fecha: str) -> str | None:
+    """La fecha guardada más reciente que no sea posterior a `fecha` (si no hay, la más reciente)."""
+    anteriores = [f for f in fechas if f <= fecha]
+    return (anteriores or fechas or [None])[-1]
+
+
+def _cargar_estado(directorio, cabecera: bytes, output_dir, fecha: str) -> dict | None:
+    base = _elegir_estado(_estados(directorio), fecha)
+    if base is None:
+        return None
+    try:
+        with open(os.path.join(directorio, f"estado_{base}.json"), encoding="utf-8") as f:
+            estado = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning(f"Incremental: estado ilegible ({e}); se procesa completo")
+        return None
+    motivo = None
+    if estado.get("version") != ESTADO_VERSION or estado.get("version_codigo") != manifiesto.version_codigo() \
+            or estado.get("ajustes") != manifiesto.ajustes():
+        motivo = "cambió el código o los ajustes"
+    elif estado.get("cabecera") != hashlib.blake2b(cabecera, digest_size=16).hexdigest():
+        motivo = "cambió la cabecera del archivo de flujos"
+    else:
+        salida = os.path.join(output_dir, estado["salida"])
+        try:
+            st = os.stat(salida)
+            if (st.st_size, st.st_mtime_ns) != (estado["tamano"], estado["mtime_ns"]):
+                motivo = f"{estado['salida']} fue modificado"
+        except OSError:
+            motivo = f"no existe {estado['salida']}"
+    if motivo:
+        log.info(f"Incremental: el estado de {estado.get('fecha')} no es reutilizable ({motivo})")
+        return None
+    sufijo = estado["fecha"]
+    try:
+        estado["lookup"] = pd.read_feather(os.path.join(directorio, f"lookup_{sufijo}.feather")).set_index(["_cod", "_fecha"])
+        estado["filas"] = pd.read_feather(os.path.join(directorio, f"filas_{sufijo}.feather"))
+        estado["descartadas"] = pd.read_feather(os.path.join(directorio, f"descartadas_{sufijo}.feather"))
+    except FileNotFoundError:
+        # otro proceso del lote lo reemplazó o lo podó mientras se leía
+        log.info(f"Incremental: el estado de {sufijo} ya no está completo; se procesa completo")
+        return None
+    estado["ruta_salida"] = salida
+    return estado
+
+
+def _guardar_estado(directorio, fecha, cabecera, output_path, lookup, filas, descartadas, tipos, base=None) -> None:
+    """Guarda el estado de `fecha` en archivos propios de esa fecha, de modo que los procesos
+    de --lote (una fecha cada uno) no se pisen, y poda los estados anteriores a `base`
+    (la fecha cuyo estado se usó), que ya no sirven de base a ninguna fecha posterior."""
+    os.makedirs(directorio, exist_ok=True)
+    lookup.reset_index().to_feather(os.path.join(directorio, f"lookup_{fecha}.feather"))
+    filas.to_feather(os.path.join(directorio, f"filas_{fecha}.feather"))
+    descartadas.to_feather(os.path.join(directorio, f"descartadas_{fecha}.feather"))
+    st = os.stat(output_path)
+    estado = {
+        "version": ESTADO_VERSION,
+        "fecha": fecha,
+        "version_codigo": manifiesto.version_codigo(),
+        "ajustes": manifiesto.ajustes(),
+        "cabecera": hashlib.blake2b(cabecera, digest_size=16).hexdigest(),
+        "salida": os.path.basename(output_path),
+        "tamano": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "tipos": tipos,
+    }
+    tmp = os.path.join(directorio, f"estado_{fecha}.json.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(directorio, f"estado_{fecha}.json"))
+    if base is None or base > fecha:
+        return
+    for vieja in _estados(directorio):
+        if vieja >= base or vieja == fecha:
+            continue
+        # primero el .json: sin él, la fecha deja de ser candidata antes de borrar sus datos
+        for nombre in [f"estado_{vieja}.json"] + [f"{t}_{vieja}.feather" for t in ("lookup", "filas", "descartadas")]:
+            try:
+                os.remove(os.path.join(directorio, nombre))
+            except FileNotFoundError:
+                pass
+
+
+def claves_cambiadas(anterior: pd.DataFrame, actual: pd.DataFrame) -> pd.MultiIndex:
+    """Claves (contrato, fecha) cuyas estimaciones difieren entre dos lookups (NaN = NaN)."""
+    claves = anterior.index.union(actual.index)
+    a = anterior.reindex(claves)
+    b = actual.reindex(claves, columns=anterior.columns)
+    iguales = ((a == b) | (a.isna() & b.isna())).all(axis=1).to_numpy()
+    return claves[~iguales]
+
+
+def _parsear(cabecera, lineas, opciones, encoding):
+    """Las líneas dadas con los tipos que infiere read_csv y como texto crudo."""
+    datos = b"\n".join([cabecera] + lineas) + b"\n"
+    opciones = dict(opciones, encoding=encoding)
+    df = safe_read_csv(io.BytesIO(datos), **opciones)
+    texto = safe_read_csv(io.BytesIO(datos), **dict(opciones, dtype=str))
+    return df, texto
+
+
+def _clases(texto: pd.DataFrame) -> np.ndarray:
+    """Bits de clase (ENTERO, DECIMAL, ...) de cada campo, matriz (filas, columnas) de uint8."""
+    clases = np.full(texto.shape, OTRO, dtype=np.uint8)
+    for j, columna in enumerate(texto.columns):
+        serie = texto[columna]
+        nulo = serie.isna().to_numpy()
+        valores = serie.fillna("")
+        entero = valores.str.fullmatch(_ENTERO).to_numpy(dtype=bool)
+        booleano = valores.isin(_BOOLEANOS).to_numpy()
+        resto = ~(nulo | entero | booleano)
+        decimal = np.zeros(len(serie), dtype=bool)
+        if resto.any():
+            decimal[resto] = pd.to_numeric(valores[resto], errors="coerce").notna().to_numpy()
+        clases[decimal, j] = DECIMAL
+        clases[entero, j] = ENTERO
+        clases[booleano, j] = BOOLEANO
+        clases[nulo, j] = NULO
+    return clases
+
+
+def _clase_de_bits(bits: int, promocion: bool = True) -> str:
+    """Clase (ver procesar_swaps.clase_tipo) que read_csv da a una columna con esos bits."""
+    if bits & OTRO or (bits & BOOLEANO and bits & (ENTERO | DECIMAL | NULO)):
+        return "o"
+    if bits & BOOLEANO:
+        return "b"
+    if bits & (DECIMAL | NULO) or (promocion and bits & RECIBE_DECIMALES):
+        return "f"
+    return "i" if bits & ENTERO else "o"
+
+
+def _tipos(columnas, bits: np.ndarray) -> dict:
+    """{columna: clase} de la salida para las líneas con esos bits (fecha_cobro se convierte aparte)."""
+    union = np.bitwise_or.reduce(bits, axis=0) if len(bits) else np.zeros(len(columnas), dtype=np.uint8)
+    return {c: _clase_de_bits(int(b)) for c, b in zip(columnas, union) if c != "fecha_cobro"}
+
+
+def _convertir(df, texto, tipos: dict):
+    """Lleva las columnas de un subconjunto de líneas a los tipos del archivo completo."""
+    from pkg.procesar_swaps import clase_tipo  # evita importación circular
+    vacio = {"i": "int64", "f": "float64", "b": "bool", "o": object}
+    for columna, tipo in tipos.items():
+        actual = clase_tipo(df[columna].dtype)
+        if actual == tipo:
+            continue
+        if df.empty:
+            df[columna] = df[columna].astype(vacio[tipo])
+        elif tipo == "f" and actual == "i" and (df[columna].abs() < 2 ** 53).all():
+            df[columna] = df[columna].astype("float64")
+        elif tipo == "o":
+            df[columna] = texto[columna]
+        else:
+            raise ValueError(f"Incremental: {columna} es {actual} en las líneas nuevas y {tipo} en el archivo")
+    return df
+
+
+def _cruzar(df, fecha_base, lookup):
+    """Filtra y cruza como el modo completo. Retorna (df procesado, posiciones de las filas conservadas)."""
+    from pkg.procesar_swaps import aplicar_lookup, filtrar_por_fecha  # evita importación circular
+    df, _ = filtrar_por_fecha(df, fecha_base)
+    df = aplicar_lookup(df, lookup)
+    return df, df.index.to_numpy()
+
+
+def _recibe_decimales(df, fecha_base, lookup) -> dict:
+    """{columna: posiciones de las filas conservadas a las que el cruce asigna decimales}."""
+    from pkg.procesar_swaps import DESTINOS, columna_decimales, cruzar_lookup, filtrar_por_fecha  # evita importación circular
+    filtrado, _ = filtrar_por_fecha(df.copy(), fecha_base)
+    cruce = cruzar_lookup(filtrado, lookup)
+    posiciones = {}
+    for destino in DESTINOS:
+        decimales = cruce[columna_decimales(destino)].eq(True).to_numpy()  # NaN: la fila no cruza
+        posiciones[destino] = filtrado.index.to_numpy()[decimales]
+    return posiciones
+
+
+def procesar_incremental(flujo_path, df_dat, fecha, fecha_base, output_path, metricas=None):
+    """Escribe output_path reutilizando la salida de la fecha anterior cuando es posible.
+
+    Retorna un DataFrame con cod_emp, der_vp y obl_vp de las filas escritas (lo que usa
+    actualizar_informe), o None si este modo no aplica y debe usarse el modo completo.
+    """
+    t0 = time.perf_counter()
+    output_dir = os.path.dirname(output_path)
+    directorio = directorio_estado(output_dir)
+    with etapa(metricas, "lectura_flujos") as m:
+        with abrir_binario(flujo_path) as f:
+            contenido = f.read()
+        if b'"' in contenido:
+            log.info("Incremental: el archivo de flujos tiene comillas; se procesa en modo completo")
+            return None
+        cabecera, _, cuerpo = contenido.partition(b"\n")
+        del contenido
+        lineas = [l for l in cuerpo.split(b"\n") if l.strip(b"\r")]
+        del cuerpo
+        m["filas_salida"] = len(lineas)
+    if not lineas:
+        return None
+    opciones = opciones_lectura(flujo_path, "flujos", "procesar_swaps")
+    if any(c not in opciones["usecols"] for c in _COLUMNAS):
+        log.info("Incremental: faltan columnas del esquema de flujos; se procesa en modo completo")
+        return None
+    encoding = detectar_encoding(flujo_path, opciones["encoding"])
+
+    columnas = opciones["usecols"]
+    marcas = [f"t{j}" for j in range(len(columnas))]  # columnas de bits de clase en el estado
+
+    with etapa(metricas, "delta", len(lineas)) as m:
+        from pkg.procesar_swaps import clase_tipo, construir_lookup  # evita importación circular
+        lookup = construir_lookup(df_dat)
+        hashes = _hashes(lineas)
+        estado = _cargar_estado(directorio, cabecera, output_dir, fecha)
+        n = len(lineas)
+        previa = np.full(n, -1)
+        descartar = np.zeros(n, dtype=bool)
+        bits = np.zeros((n, len(columnas)), dtype=np.uint8)
+        if estado is not None:
+            filas = estado["filas"]
+            previa = _buscar(filas[["h1", "h2"]].to_numpy(), hashes)
+            encontrada = previa >= 0
+            # la línea ya se escribió ayer: se reutiliza si su clave no cambió y sigue vigente
+            cambiadas = claves_cambiadas(estado["lookup"], lookup)
+            p = previa[encontrada]
+            claves = pd.MultiIndex.from_arrays([filas["cod"].to_numpy()[p], filas["fecha"].to_numpy()[p]])
+            vigente = (filas["fecha"].to_numpy()[p] > np.datetime64(fecha_base)) & ~claves.isin(cambiadas)
+            previa[np.flatnonzero(encontrada)[~vigente]] = -1
+            bits[previa >= 0] = filas[marcas].to_numpy()[previa[previa >= 0]]
+            if estado["fecha"] <= fecha:
+                # descartada por fecha en una fecha anterior: también lo está hoy
+                descartadas = estado["descartadas"]
+                pos = _buscar(descartadas[["h1", "h2"]].to_numpy(), hashes)
+                descartar = (pos >= 0) & (previa < 0)
+                bits[descartar] = descartadas[marcas].to_numpy()[pos[descartar]]
+        reusar = previa >= 0
+        m["filas_salida"] = int(reusar.sum())
+
+    def parsear(pendientes):
+        """Parsea las líneas pendientes y anota en `bits` sus clases y las que reciben decimales."""
+        df, texto = _parsear(cabecera, [lineas[i] for i in pendientes], opciones, encoding)
+        clases = _clases(texto)
+        union = np.bitwise_or.reduce(clases, axis=0) if len(clases) else None
+        for j, columna in enumerate(columnas):
+            if union is not None and columna != "fecha_cobro" \
+                    and _clase_de_bits(int(union[j]), promocion=False) != clase_tipo(df[columna].dtype):
+                raise ValueError(f"Incremental: clases de texto de {columna} no coinciden con read_csv")
+        for destino, filas_decimales in _recibe_decimales(df, fecha_base, lookup).items():
+            clases[filas_decimales, columnas.index(destino)] |= RECIBE_DECIMALES
+        bits[pendientes] = clases
+        return df, texto
+
+    with etapa(metricas, "cruce", int((~reusar & ~descartar).sum())) as m:
+        pendientes = np.flatnonzero(~reusar & ~descartar)
+        df, texto = parsear(pendientes)
+        tipos = _tipos(columnas, bits)
+        if reusar.any() and tipos != estado.get("tipos"):
+            log.info(f"Incremental: los tipos de columna cambiaron ({estado.get('tipos')} -> {tipos}); "
+                     "las líneas de la salida anterior se recalculan")
+            previa[:] = -1
+            reusar[:] = False
+            pendientes = np.flatnonzero(~descartar)
+            df, texto = parsear(pendientes)
+            tipos = _tipos(columnas, bits)
+        df_nuevo, conservadas = _cruzar(_convertir(df, texto, tipos), fecha_base, lookup)
+        if any(clase_tipo(df_nuevo[c].dtype) != t for c, t in tipos.items()):
+            raise ValueError(f"Incremental: tipos de salida distintos de los esperados {tipos}")
+        conservadas = pendientes[conservadas]
+        m["filas_salida"] = len(conservadas)
+
+    with etapa(metricas, "escritura_flujos") as m:
+        texto = df_nuevo.to_csv(sep=";", index=False).encode("latin1")
+        fines_nuevo = np.flatnonzero(np.frombuffer(texto, dtype=np.uint8) == 10) + 1
+        cabecera_salida, inicios_nuevo = texto[:fines_nuevo[0]], fines_nuevo[:-1]
+        fines_nuevo = fines_nuevo[1:]
+
+        # filas de salida en el orden de entrada: reutilizadas (tramo de la salida anterior) o nuevas
+        escritas = np.sort(np.concatenate([np.flatnonzero(reusar), conservadas]))
+        es_previa = reusar[escritas]
+        previas = estado["filas"].iloc[previa[escritas[es_previa]]] if es_previa.any() else None
+        inicio = np.empty(len(escritas), dtype=np.int64)
+        fin = np.empty(len(escritas), dtype=np.int64)
+        inicio[~es_previa], fin[~es_previa] = inicios_nuevo, fines_nuevo
+        if previas is not None:
+            inicio[es_previa], fin[es_previa] = previas["inicio"].to_numpy(), previas["fin"].to_numpy()
+
+        # tramos contiguos de un mismo origen se copian de una vez
+        corte = np.ones(len(escritas), dtype=bool)
+        corte[1:] = (es_previa[1:] != es_previa[:-1]) | (inicio[1:] != fin[:-1])
+        tramos = np.flatnonzero(corte)
+        finales = np.append(tramos[1:], len(escritas)) - 1
+        with EscrituraAtomica(output_path) as f:
+            f.write(cabecera_salida)
+            anterior = None
+            try:
+                if previas is not None:
+                    with open(estado["ruta_salida"], "rb") as fa:
+                        anterior = mmap.mmap(fa.fileno(), 0, access=mmap.ACCESS_READ)
+                for a, b in zip(tramos.tolist(), finales.tolist()):
+                    f.write((anterior if es_previa[a] else texto)[inicio[a]:fin[b]])
+            finally:
+                if anterior is not None:
+                    anterior.close()
+        m["filas_entrada"] = len(escritas)
+
+    # estado de la fecha: por fila escrita, hash de la línea, clave, importes del informe y posición
+    columnas = {
+        "cod": df_nuevo["cod_emp"].astype(float).to_numpy(),
+        "fecha": pd.to_datetime(df_nuevo["fecha_cobro"]).to_numpy(dtype="datetime64[ns]"),
+        # como lo normaliza calcular_cupones
+        "cod_emp": df_nuevo["cod_emp"].astype(str).to_numpy(dtype=object),
+        "der_vp": df_nuevo["der_vp"].to_numpy(dtype=float),
+        "obl_vp": df_nuevo["obl_vp"].to_numpy(dtype=float),
+    }
+    filas = pd.DataFrame({"h1": hashes[escritas, 0], "h2": hashes[escritas, 1]})
+    filas[marcas] = bits[escritas]
+    for col, nuevos in columnas.items():
+        valores = np.empty(len(escritas), dtype=nuevos.dtype)
+        valores[~es_previa] = nuevos
+        if previas is not None:
+            valores[es_previa] = previas[col].to_numpy(dtype=nuevos.dtype)
+        filas[col] = valores
+    longitudes = fin - inicio
+    filas["fin"] = len(cabecera_salida) + np.cumsum(longitudes)
+    filas["inicio"] = filas["fin"] - longitudes
+    descartadas_hoy = np.setdiff1d(np.arange(n), escritas, assume_unique=True)
+    descartadas = pd.DataFrame({"h1": hashes[descartadas_hoy, 0], "h2": hashes[descartadas_hoy, 1]})
+    descartadas[marcas] = bits[descartadas_hoy]
+    _guardar_estado(directorio, fecha, cabecera, output_path, lookup, filas, descartadas, tipos,
+                    estado["fecha"] if estado is not None else None)
+
+    log.info(f"Incremental: {int(es_previa.sum())} filas reutilizadas, {len(pendientes)} recalculadas, "
+             f"{int(descartar.sum())} descartadas sin parsear ({time.perf_counter() - t0:.2f} s)")
+    return filas[["cod_emp", "der_vp", "obl_vp"]].copy()
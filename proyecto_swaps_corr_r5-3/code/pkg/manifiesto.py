@@ -0,0 +1,161 @@
+# code/pkg/manifiesto.py
+"""Manifiesto de ejecución por fecha (OUTPUT_DIR/run_manifest_<fecha>.json).
+
+Registra el hash del contenido de los insumos (flujos, .dat e informe), la versión del
+código, los ajustes que influyen en la salida y el tamaño/mtime de los archivos generados
+(de los comprimidos, también la compresión y el tamaño sin comprimir).
+Si una nueva ejecución encuentra los mismos insumos, código y ajustes, y las salidas
+siguen intactas, main.py la omite (salvo con --force).
+
+Para que la comprobación tome milisegundos, el hash de un insumo se reutiliza del
+manifiesto anterior cuando su tamaño y mtime no cambiaron (como hace git con su índice);
+solo los archivos modificados se vuelven a leer completos.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from logger import get_logger
+from pkg.utils import abrir_binario, compresion_de, get_config
+
+log = get_logger(__name__)
+
+_BLOQUE_HASH = 1 << 20
+_CODE_DIR = Path(__file__).resolve().parents[1]
+# Variables del .env que cambian el contenido o el nombre de las salidas
+AJUSTES = ("CSV_ENGINE", "SALIDA_COMPRESION")
+_version_codigo = None
+
+
+def hash_contenido(path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(_BLOQUE_HASH), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def version_codigo() -> str:
+    """Hash de los fuentes .py de code/ (se calcula una vez por proceso)."""
+    global _version_codigo
+    if _version_codigo is None:
+        h = hashlib.blake2b(digest_size=16)
+        for p in sorted(_CODE_DIR.rglob("*.py")):
+            h.update(str(p.relative_to(_CODE_DIR)).encode("utf-8"))
+            h.update(p.read_bytes())
+        _version_codigo = h.hexdigest()
+    return _version_codigo
+
+
+def ajustes() -> dict:
+    from importlib import metadata  # ~20 ms: solo al comparar o guardar un manifiesto
+
+    valores = {clave: get_config(clave, "") for clave in AJUSTES}
+    valores["pandas"] = metadata.version("pandas")  # sin importar pandas: la omisión no lo necesita
+    return valores
+
+
+def _ruta(output_dir, fecha) -> str:
+    return os.path.join(output_dir, f"run_manifest_{fecha}.json")
+
+
+def cargar(output_dir, fecha) -> dict | None:
+    try:
+        with open(_ruta(output_dir, fecha), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning(f"Manifiesto de {fecha} ilegible ({e}); se ignora")
+        return None
+
+
+def huellas_entradas(input_dir, archivos: dict, previo: dict | None = None) -> dict:
+    """{'flujos': {...}, 'dat': {...}, 'informe': {...} | None} con archivo, tamaño, mtime y hash.
+    `archivos` es la entrada de descubrir_fechas para la fecha."""
+    anteriores = (previo or {}).get("entradas", {})
+    huellas = {}
+    for tipo, nombre in archivos.items():
+        if nombre is None:
+            huellas[tipo] = None
+            continue
+        st = os.stat(os.path.join(input_dir, nombre))
+        anterior = anteriores.get(tipo) or {}
+        if (anterior.get("archivo"), anterior.get("tamano"), anterior.get("mtime_ns")) == (nombre, st.st_size, st.st_mtime_ns):
+            contenido = anterior["hash"]
+        else:
+            contenido = hash_contenido(os.path.join(input_dir, nombre))
+        huellas[tipo] = {"archivo": nombre, "tamano": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": contenido}
+    return huellas
+
+
+def tamano_sin_comprimir(path) -> int:
+    """Bytes descomprimidos de una salida: los que anotó pkg.salida al escribirla en este
+    proceso o, si no, los que resultan de descomprimirla en streaming."""
+    from pkg import salida  # importa numpy: solo al guardar, después de procesar
+
+    st = os.stat(path)
+    anotados = salida.tamanos(path)
+    if anotados is not None and anotados[1] == st.st_size:
+        return anotados[0]
+    total = 0
+    with abrir_binario(path) as f:
+        for bloque in iter(lambda: f.read(_BLOQUE_HASH), b""):
+            total += len(bloque)
+    return total
+
+
+def huellas_salidas(output_dir, nombres) -> dict:
+    salidas = {}
+    for nombre in nombres:
+        path = os.path.join(output_dir, nombre)
+        st = os.stat(path)
+        salidas[nombre] = {"tamano": st.st_size, "mtime_ns": st.st_mtime_ns}
+        compresion = compresion_de(nombre)
+        if compresion:
+            salidas[nombre].update(compresion=compresion, tamano_sin_comprimir=tamano_sin_comprimir(path))
+    return salidas
+
+
+def _hashes(entradas: dict) -> dict:
+    return {tipo: h and h["hash"] for tipo, h in entradas.items()}
+
+
+def vigente(previo: dict | None, entradas: dict, output_dir) -> bool:
+    """True si `previo` corresponde a los mismos insumos, código y ajustes y sus salidas siguen intactas."""
+    if previo is None or previo.get("estado") not in ("OK", "SIN_INFORME"):
+        return False
+    if previo.get("version_codigo") != version_codigo() or previo.get("ajustes") != ajustes():
+        return False
+    if _hashes(previo.get("entradas", {})) != _hashes(entradas):
+        return False
+    for nombre, esperado in previo.get("salidas", {}).items():
+        try:
+            st = os.stat(os.path.join(output_dir, nombre))
+        except OSError:
+            return False
+        if (st.st_size, st.st_mtime_ns) != (esperado["tamano"], esperado["mtime_ns"]):
+            return False
+    return True
+
+
+def guardar(output_dir, fecha, entradas: dict, salidas, estado: str) -> str:
+    """Escribe el manifiesto de una ejecución terminada (reemplazo atómico, ver pkg.salida)."""
+    manifiesto = {
+        "fecha": fecha,
+        "estado": estado,
+        "creado": datetime.now().isoformat(timespec="seconds"),
+        "version_codigo": version_codigo(),
+        "ajustes": ajustes(),
+        "entradas": entradas,
+        "salidas": huellas_salidas(output_dir, salidas),
+    }
+    from pkg.salida import EscrituraAtomica  # importa numpy: solo al guardar, después de procesar
+    path = _ruta(output_dir, fecha)
+    # temporal propio del proceso (.<nombre>.<pid>.tmp): --lote y --servir/--vigilar pueden guardar la misma fecha
+    with EscrituraAtomica(path) as f:
+        f.write(json.dumps(manifiesto, ensure_ascii=False, indent=2).encode("utf-8"))
+    return path
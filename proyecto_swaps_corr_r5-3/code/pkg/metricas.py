@@ -0,0 +1,206 @@
+# code/pkg/metricas.py
+"""Métricas por etapa del proceso: tiempo de pared, CPU, filas y filas/s.
+
+Uso:
+    metricas = Metricas()
+    with etapa(metricas, "lectura_flujos") as m:
+        df = ...
+        m["filas_salida"] = len(df)
+    metricas.guardar(output_dir, fecha)   # run_metrics_<fecha>.json
+
+Todas las funciones aceptan metricas=None, en cuyo caso no se mide nada. Una etapa que
+se repite (p.ej. por bloques en modo streaming) acumula tiempos y filas.
+Con METRICAS_MEMORIA=1 (o Metricas(memoria=True)) se registra además, por etapa, el pico
+de tracemalloc, las líneas que más memoria asignaron y el máximo de RSS del proceso
+(VmHWM de /proc/self/status); se guardan en run_memoria_<fecha>.json. Ralentiza el
+proceso: solo para diagnóstico. tracemalloc se detiene al terminar la ejecución
+(guardar o terminar), para no ralentizar lo que siga en un proceso residente.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from logger import get_logger
+from pkg.utils import get_config
+
+log = get_logger(__name__)
+
+TOP_ASIGNACIONES = 5  # líneas de código con más memoria asignada que se reportan por etapa
+_IGNORAR_TRAZAS = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"))
+
+
+def _estado_proceso() -> dict:
+    """VmRSS y VmHWM (máximo de RSS) del proceso en bytes; vacío si no hay /proc (no Linux)."""
+    valores = {}
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for linea in f:
+                clave, _, resto = linea.partition(":")
+                if clave in ("VmRSS", "VmHWM"):
+                    valores[clave] = int(resto.split()[0]) * 1024
+    except OSError:
+        pass
+    return valores
+
+
+def _reiniciar_hwm() -> bool:
+    """Reinicia VmHWM para medir el máximo de RSS de una etapa (Linux >= 4.0)."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _asignaciones(antes, despues) -> list:
+    """Líneas con más memoria nueva retenida entre dos snapshots de tracemalloc."""
+    cambios = despues.filter_traces(_IGNORAR_TRAZAS).compare_to(antes.filter_traces(_IGNORAR_TRAZAS), "lineno")
+    return [
+        {"sitio": f"{c.traceback[0].filename}:{c.traceback[0].lineno}", "bytes": c.size_diff, "bloques": c.count_diff}
+        for c in cambios[:TOP_ASIGNACIONES] if c.size_diff > 0
+    ]
+
+
+class Metricas:
+    """Acumula las etapas medidas de una ejecución (una fecha)."""
+
+    def __init__(self, memoria: bool | None = None, perfil=None):
+        if memoria is None:
+            memoria = get_config("METRICAS_MEMORIA", "0").lower() in ("1", "true", "si", "sí")
+        self.memoria = memoria
+        self.perfil = perfil  # pkg.perfil.Perfil opcional: perfila la etapa que indique
+        # solo se detiene el tracemalloc que inició esta ejecución
+        self._traza_propia = memoria and not tracemalloc.is_tracing()
+        if self._traza_propia:
+            tracemalloc.start()
+        self.inicio = datetime.now()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.etapas: dict[str, dict] = {}
+        self.memoria_etapas: dict[str, dict] = {}
+
+    def registrar(self, nombre: str, pared: float, cpu: float, filas_entrada=None, filas_salida=None,
+                  memoria: dict | None = None) -> None:
+        with self._lock:
+            e = self.etapas.setdefault(nombre, {
+                "llamadas": 0, "pared_s": 0.0, "cpu_s": 0.0, "filas_entrada": None, "filas_salida": None,
+            })
+            e["llamadas"] += 1
+            e["pared_s"] += pared
+            e["cpu_s"] += cpu
+            for clave, valor in (("filas_entrada", filas_entrada), ("filas_salida", filas_salida)):
+                if valor is not None:
+                    e[clave] = (e[clave] or 0) + int(valor)
+            filas = e["filas_entrada"] if e["filas_entrada"] is not None else e["filas_salida"]
+            e["filas_por_s"] = round(filas / e["pared_s"], 1) if filas is not None and e["pared_s"] > 0 else None
+            if memoria is not None:
+                self._registrar_memoria(nombre, memoria)
+
+    def _registrar_memoria(self, nombre: str, memoria: dict) -> None:
+        # de una etapa repetida se conserva la llamada con mayor pico (y sus asignaciones)
+        previa = self.memoria_etapas.get(nombre)
+        if previa is None or memoria["pico_tracemalloc_bytes"] > previa["pico_tracemalloc_bytes"]:
+            if previa is not None:
+                memoria["rss_hwm_bytes"] = max(memoria.get("rss_hwm_bytes") or 0, previa.get("rss_hwm_bytes") or 0)
+            self.memoria_etapas[nombre] = memoria
+        else:
+            previa["rss_hwm_bytes"] = max(memoria.get("rss_hwm_bytes") or 0, previa.get("rss_hwm_bytes") or 0)
+
+    def como_dict(self, fecha=None) -> dict:
+        return {
+            "fecha": fecha,
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "total_s": round(time.perf_counter() - self._t0, 6),
+            "etapas": {
+                nombre: {k: round(v, 6) if isinstance(v, float) else v for k, v in e.items()}
+                for nombre, e in self.etapas.items()
+            },
+        }
+
+    def resumen(self, fecha=None) -> str:
+        partes = [f"Métricas {fecha or ''}: total {time.perf_counter() - self._t0:.2f} s"]
+        for nombre, e in self.etapas.items():
+            detalle = f"{nombre} {e['pared_s']:.2f} s"
+            if e.get("filas_por_s") is not None:
+                filas = e["filas_entrada"] if e["filas_entrada"] is not None else e["filas_salida"]
+                detalle += f" ({filas} filas, {e['filas_por_s']:.0f} filas/s)"
+            partes.append(detalle)
+        return " | ".join(partes)
+
+    def terminar(self) -> None:
+        """Fin de la ejecución: detiene tracemalloc si lo inició esta instancia."""
+        if self._traza_propia:
+            tracemalloc.stop()
+            self._traza_propia = False
+
+    def guardar(self, output_dir, fecha=None) -> str:
+        """Escribe run_metrics_<fecha>.json en output_dir, deja el resumen en el log y termina la ejecución."""
+        try:
+            path = os.path.join(output_dir, f"run_metrics_{fecha or 'sin_fecha'}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.como_dict(fecha), f, ensure_ascii=False, indent=2)
+            log.info(self.resumen(fecha))
+            if self.memoria:
+                self.guardar_memoria(output_dir, fecha)
+            return path
+        finally:
+            self.terminar()
+
+    def resumen_memoria(self, fecha=None) -> str:
+        partes = [f"Memoria {fecha or ''}"]
+        for nombre, m in self.memoria_etapas.items():
+            detalle = f"{nombre} pico {m['pico_tracemalloc_bytes'] / 1e6:.1f} MB"
+            if m.get("rss_hwm_bytes"):
+                detalle += f", RSS máx {m['rss_hwm_bytes'] / 1e6:.1f} MB"
+            if m["asignaciones"]:
+                detalle += f" ({m['asignaciones'][0]['sitio']})"
+            partes.append(detalle)
+        return " | ".join(partes)
+
+    def guardar_memoria(self, output_dir, fecha=None) -> str:
+        """Escribe run_memoria_<fecha>.json en output_dir y deja el resumen en el log."""
+        path = os.path.join(output_dir, f"run_memoria_{fecha or 'sin_fecha'}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"fecha": fecha, "etapas": self.memoria_etapas}, f, ensure_ascii=False, indent=2)
+        log.info(self.resumen_memoria(fecha))
+        return path
+
+
+@contextmanager
+def etapa(metricas: Metricas | None, nombre: str, filas_entrada=None):
+    """Mide el bloque como la etapa `nombre`. El dict entregado admite 'filas_entrada'
+    y 'filas_salida' si solo se conocen al terminar."""
+    datos = {"filas_entrada": filas_entrada, "filas_salida": None}
+    if metricas is None:
+        yield datos
+        return
+    if metricas.memoria:
+        # picos globales al proceso: con etapas concurrentes (escritura en hilo) se solapan
+        antes = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        hwm = _reiniciar_hwm()
+    perfilar = metricas.perfil is not None and metricas.perfil.aplica_a(nombre)
+    t0, c0 = time.perf_counter(), time.process_time()
+    try:
+        with metricas.perfil.medir() if perfilar else nullcontext():
+            yield datos
+    finally:
+        pared, cpu = time.perf_counter() - t0, time.process_time() - c0
+        memoria = None
+        if metricas.memoria:
+            proceso = _estado_proceso()
+            memoria = {
+                "pico_tracemalloc_bytes": tracemalloc.get_traced_memory()[1],
+                # sin clear_refs, VmHWM es el máximo desde el inicio del proceso
+                "rss_hwm_bytes": proceso.get("VmHWM"),
+                "rss_hwm_de_etapa": hwm,
+                "rss_bytes": proceso.get("VmRSS"),
+                "asignaciones": _asignaciones(antes, tracemalloc.take_snapshot()),
+            }
+        metricas.registrar(nombre, pared, cpu, datos["filas_entrada"], datos["filas_salida"], memoria)
@@ -0,0 +1,95 @@
+# code/pkg/perfil.py
+"""Perfilado con cProfile de toda la ejecución o de una etapa (main.py --profile).
+
+Genera en LOG_DIR, etiquetados con la fecha procesada:
+    perfil_<fecha>.pstats   estadísticas de cProfile (python -m pstats, snakeviz, ...)
+    perfil_<fecha>.folded   pilas colapsadas "f1;f2;f3 muestras" para flamegraph.pl o speedscope
+
+cProfile no guarda pilas completas, así que las pilas colapsadas se obtienen muestreando
+(cada INTERVALO_MUESTREO segundos) las pilas de todos los hilos mientras el perfil está activo.
+"""
+from __future__ import annotations
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from logger import get_logger
+
+log = get_logger(__name__)
+
+INTERVALO_MUESTREO = 0.005  # segundos entre muestras de pila
+TODO = "todo"  # --profile sin etapa: perfila la ejecución completa
+
+
+def _nombre_marco(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Perfil:
+    """Acumula cProfile y muestras de pila de las secciones medidas con `medir`.
+    `etapa` es el nombre de la etapa a perfilar (ver pkg.metricas.etapa) o TODO."""
+
+    def __init__(self, etapa: str = TODO):
+        self.etapa = etapa
+        self._perfiles: list[cProfile.Profile] = []
+        self._pilas: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def aplica_a(self, nombre: str) -> bool:
+        return self.etapa == nombre
+
+    def _muestrear(self, parar: threading.Event, propio: int) -> None:
+        while not parar.wait(INTERVALO_MUESTREO):
+            nombres = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                pila = []
+                while frame is not None:
+                    pila.append(_nombre_marco(frame))
+                    frame = frame.f_back
+                pila.append(nombres.get(ident, f"hilo-{ident}"))
+                with self._lock:
+                    self._pilas[";".join(reversed(pila))] += 1
+
+    @contextmanager
+    def medir(self):
+        """Perfila el bloque en el hilo actual (cProfile) y muestrea todos los hilos."""
+        perfil = cProfile.Profile()
+        parar = threading.Event()
+        muestreo = threading.Thread(target=lambda: self._muestrear(parar, muestreo.ident),
+                                    name="perfil-muestreo", daemon=True)
+        muestreo.start()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            parar.set()
+            muestreo.join()
+            with self._lock:
+                self._perfiles.append(perfil)
+
+    def guardar(self, log_dir, fecha=None) -> tuple[str, str] | None:
+        """Escribe perfil_<fecha>[_<etapa>].pstats y .folded en log_dir; None si no se midió nada."""
+        import pstats  # solo al guardar: no pesa en el arranque de main.py
+
+        if not self._perfiles:
+            log.warning(f"Perfil solicitado para la etapa '{self.etapa}', pero no se ejecutó.")
+            return None
+        sufijo = "" if self.etapa == TODO else f"_{self.etapa}"
+        base = os.path.join(log_dir, f"perfil_{fecha or 'sin_fecha'}{sufijo}")
+        # varias secciones (etapa repetida por bloques) se combinan en un solo .pstats
+        estadisticas = pstats.Stats(self._perfiles[0])
+        for perfil in self._perfiles[1:]:
+            estadisticas.add(perfil)
+        estadisticas.dump_stats(base + ".pstats")
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for pila, muestras in sorted(self._pilas.items()):
+                f.write(f"{pila} {muestras}\n")
+        log.info(f"Perfil guardado en {base}.pstats y {base}.folded ({sum(self._pilas.values())} muestras)")
+        return base + ".pstats", base + ".folded"
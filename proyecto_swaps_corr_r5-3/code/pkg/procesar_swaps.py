@@ -2,96 +2,284 @@ import os
 import pandas as pd
 import logging
 from datetime import datetime
-from pkg.utils import safe_read_csv, safe_to_csv
+from concurrent.futures import Future, ThreadPoolExecutor
+from pkg.utils import safe_read_csv, safe_to_csv, get_config
+from pkg.salida import EscrituraAtomica, escribir_csv
+from pkg.cache import leer_csv_cacheado
+from pkg.esquemas import leer_para_reescribir, opciones_lectura
+from pkg.metricas import etapa
+from pkg.catalogo import catalogo, descubrir_fechas, extraer_fecha, nombre_salida  # noqa: F401  (se reexportan)
+from pkg import incremental
 from logger import get_logger
 log = get_logger(__name__)
 
-def extraer_fecha(nombre):
-    """Extrae la fecha del nombre de archivo y la retorna en (aaaa, mm, dd)"""
-    base = os.path.basename(nombre)
-    if "flujos_swap_gbo" in base:
-        fecha = base.split("_")[-1].split(".")[0]
-        return fecha[:4], fecha[4:6], fecha[6:8]
-    if "COL_ESTIM_FLOWS" in base:
-        fecha = base.split("_")[-1].split(".")[0]
-        return fecha[4:8], fecha[2:4], fecha[0:2]
-    return None, None, None
-
-def procesar_swaps(input_dir, output_dir):
+# Reglas de negocio: (columna del .dat, columna destino en flujos, signo requerido)
+REGLAS_ESTIMACION = (
+    ("M_DISCFLOWC", "der_vp", 1),
+    ("M_DISCFLOWC", "obl_vp", -1),
+    ("M_FLOW_COL", "der_intereses", 1),
+    ("M_FLOW_COL", "obl_intereses", -1),
+)
+
+DESTINOS = tuple(destino for _, destino, _ in REGLAS_ESTIMACION)
+
+def columna_decimales(destino: str) -> str:
+    """Columna del lookup que marca si alguna fila aplicable a la clave traía decimales."""
+    return f"{destino}_decimales"
+
+def construir_lookup(df_dat):
+    """Construye la tabla de estimaciones indexada por (contrato, fecha).
+
+    Cada columna destino conserva el último valor del .dat que cumple su regla
+    de signo (misma semántica "última fila gana" que el recorrido fila a fila).
+    Junto a cada destino, columna_decimales(destino) indica si alguna de esas filas
+    tenía decimales: en el recorrido fila a fila esa asignación ya promovía a float
+    una columna entera, aunque una fila posterior la sobrescribiera con un entero.
+    """
+    lookup = pd.DataFrame({
+        "_cod": df_dat["M_CONTRACT_"].astype(float),
+        "_fecha": pd.to_datetime(df_dat["M_DATE"].astype(str), format="%d/%m/%Y", errors="coerce"),
+    })
+    agregaciones = {}
+    for origen, destino, signo in REGLAS_ESTIMACION:
+        valores = df_dat[origen]
+        cumple = valores > 0 if signo > 0 else valores < 0
+        lookup[destino] = valores.astype(float).abs().where(cumple)
+        lookup[columna_decimales(destino)] = (lookup[destino] % 1 != 0) & cumple
+        agregaciones[destino] = "last"
+        agregaciones[columna_decimales(destino)] = "any"
+    # groupby descarta claves nulas y `last` ignora NaN: por columna gana la última fila que aplica
+    return lookup.groupby(["_cod", "_fecha"], sort=False).agg(agregaciones)
+
+def cruzar_lookup(df_flujo, lookup):
+    """Estimaciones del lookup para cada fila de flujos (NaN donde no aplica ninguna)."""
+    claves = pd.MultiIndex.from_arrays([
+        df_flujo["cod_emp"].astype(float),
+        pd.to_datetime(df_flujo["fecha_cobro"], errors="coerce"),
+    ])
+    return lookup.reindex(claves)
+
+def aplicar_lookup(df_flujo, lookup):
+    """Cruza los flujos contra la tabla de estimaciones y aplica las reglas por columna."""
+    cruce = cruzar_lookup(df_flujo, lookup)
+    for destino in DESTINOS:
+        valores = cruce[destino].to_numpy()
+        mask = ~pd.isna(valores)
+        if not mask.any():
+            continue
+        # Igual que la asignación celda a celda: una columna entera se promueve si alguna
+        # fila del .dat que se le asignó traía decimales (aunque otra posterior la sobrescriba)
+        if destino in df_flujo.columns and pd.api.types.is_integer_dtype(df_flujo[destino]) \
+                and cruce[columna_decimales(destino)].to_numpy()[mask].astype(bool).any():
+            df_flujo[destino] = df_flujo[destino].astype(float)
+        df_flujo.loc[mask, destino] = valores[mask]
+    return df_flujo
+
+def filtrar_por_fecha(df_flujo, fecha_base):
+    """Conserva los flujos con fecha_cobro posterior a fecha_base.
+    Retorna (df_filtrado, filas_eliminadas); filas_eliminadas es None si no existe la columna."""
+    if 'fecha_cobro' not in df_flujo.columns:
+        return df_flujo, None
+    df_flujo['fecha_cobro'] = pd.to_datetime(
+        df_flujo['fecha_cobro'],
+        format='%d/%m/%Y',
+        errors='coerce'
+    ).dt.date
+    filas_antes = df_flujo.shape[0]
+    df_flujo = df_flujo[df_flujo['fecha_cobro'] > fecha_base].copy()
+    return df_flujo, filas_antes - df_flujo.shape[0]
+
+def _log_filtrado(eliminadas, fecha_base):
+    if eliminadas is None:
+        logging.warning("No se encontró la columna 'fecha_cobro' en el archivo de flujos. No se aplicó filtrado por fecha.")
+    else:
+        logging.info(f"Filtrado por fecha: se eliminaron {eliminadas} filas con fecha_cobro <= {fecha_base}")
+
+def clase_tipo(dtype) -> str:
+    """Clase de un dtype inferido por read_csv: 'i'/'u' enteros, 'f' float, 'b' bool, 'o' otro."""
+    return {"i": "i", "u": "u", "f": "f", "b": "b"}.get(dtype.kind, "o")
+
+def tipo_comun(clases) -> str:
+    """dtype que read_csv infiere para una columna leída entera cuyas partes dieron `clases`:
+    enteros con decimales o nulos -> float64; cualquier otra mezcla -> texto."""
+    return "float64" if set(clases) <= {"i", "f"} else "str"
+
+class _TiposDistintos(Exception):
+    """Los bloques del modo streaming infirieron tipos distintos: {columna: dtype común}."""
+
+class _SinFilas(Exception):
+    """El archivo de flujos no tiene filas: el temporal se descarta y la salida anterior queda intacta."""
+
+def _procesar_por_bloques(flujo_path, lookup, fecha_base, output_path, chunksize, metricas=None):
+    """Modo streaming: lee los flujos en bloques de `chunksize` filas, filtra y cruza
+    cada bloque contra el lookup del .dat y lo anexa al archivo de salida (un único
+    temporal que se renombra al final, ver pkg.salida).
+    La memoria queda acotada por el tamaño del bloque y del lookup.
+    Retorna el número de filas leídas del archivo de flujos; con 0 no se escribe nada.
+
+    Los tipos se infieren por bloque, como en la lectura completa. Si una columna sale
+    con tipos distintos en bloques distintos (enteros en uno y decimales o nulos en otro),
+    el archivo escrito no se publica y se repite la pasada fijando a esas columnas el
+    tipo que les daría la lectura completa, así la salida es la misma en ambos modos.
+    """
+    opciones = opciones_lectura(flujo_path, 'flujos', 'procesar_swaps')
+    try:
+        return _escribir_bloques(flujo_path, opciones, lookup, fecha_base, output_path, chunksize, metricas)
+    except _TiposDistintos as e:
+        forzados = e.args[0]
+        logging.info(f"Modo streaming: tipos distintos entre bloques en {sorted(forzados)}; se repite con {forzados}")
+        return _escribir_bloques(flujo_path, dict(opciones, dtype=forzados), lookup, fecha_base, output_path,
+                                 chunksize, metricas)
+    except _SinFilas:
+        return 0
+
+def _escribir_bloques(flujo_path, opciones, lookup, fecha_base, output_path, chunksize, metricas):
+    filas_leidas = 0
+    eliminadas_total = 0
+    primero = True
+    clases = {}
+    lector = iter(safe_read_csv(flujo_path, chunksize=chunksize, **opciones))
+    # todos los bloques van al mismo temporal: el archivo final aparece completo o no aparece
+    with EscrituraAtomica(output_path) as salida:
+        while True:
+            with etapa(metricas, "lectura_flujos") as m:
+                bloque = next(lector, None)
+                m["filas_salida"] = 0 if bloque is None else bloque.shape[0]
+            if bloque is None:
+                break
+            filas_leidas += bloque.shape[0]
+            with etapa(metricas, "filtro_fecha", bloque.shape[0]) as m:
+                bloque, eliminadas = filtrar_por_fecha(bloque, fecha_base)
+                m["filas_salida"] = bloque.shape[0]
+            if eliminadas is None:
+                eliminadas_total = None
+            elif eliminadas_total is not None:
+                eliminadas_total += eliminadas
+            with etapa(metricas, "cruce", bloque.shape[0]):
+                bloque = aplicar_lookup(bloque, lookup)
+            with etapa(metricas, "escritura_flujos", bloque.shape[0]):
+                escribir_csv(bloque, salida, sep=';', encoding='latin1', header=primero)
+            primero = False
+            for columna, dtype in bloque.dtypes.items():
+                clases.setdefault(columna, set()).add(clase_tipo(dtype))
+        if not filas_leidas:
+            raise _SinFilas()  # descarta el temporal
+        distintos = {c: tipo_comun(k) for c, k in clases.items() if len(k) > 1}
+        if distintos and "dtype" not in opciones:
+            raise _TiposDistintos(distintos)  # descarta el temporal
+    _log_filtrado(eliminadas_total, fecha_base)
+    logging.info(f"Modo streaming: {filas_leidas} filas leídas en bloques de {chunksize}")
+    return filas_leidas
+
+def _escribir_flujos(df_flujo, output_path, metricas=None):
+    with etapa(metricas, "escritura_flujos", df_flujo.shape[0]):
+        safe_to_csv(df_flujo, output_path, sep=';', index=False, encoding='latin1')
+    logging.info(f"Archivo de flujos modificado guardado en {output_path}")
+    return output_path
+
+def procesar_swaps(input_dir, output_dir, chunksize=None, fecha=None, en_memoria=False, metricas=None):
+    """Cruza flujos_swap_gbo con COL_ESTIM_FLOWS y escribe el archivo de flujos modificado.
+
+    chunksize: filas por bloque para el modo streaming; None toma FLUJOS_CHUNK_ROWS
+    del .env y 0 procesa el archivo completo en memoria.
+    fecha: aaaammdd del par a procesar; None toma la fecha más reciente con flujos y .dat.
+    en_memoria: si es True retorna (flujo_csv, fecha, df_flujo, escritura): el DataFrame
+    procesado para entregarlo a actualizar_informe sin releer el CSV, y el Future de la
+    escritura del CSV, que corre en un hilo aparte. En modo streaming df_flujo es None y
+    el archivo ya está escrito. Con INCREMENTAL=1 (ver pkg.incremental) la salida se arma
+    reutilizando la de la fecha anterior y df_flujo trae solo cod_emp, der_vp y obl_vp.
+    metricas: pkg.metricas.Metricas opcional donde se registran las etapas.
+    """
     log.info('procesar_swaps iniciado')
+    fallo = (None, None, None, None) if en_memoria else (None, None)
     try:
-        archivos = os.listdir(input_dir)
-        flujo_csv = [f for f in archivos if f.startswith("flujos_swap_gbo") and f.endswith(".csv")]
-        dat = [f for f in archivos if f.startswith("COL_ESTIM_FLOWS") and f.endswith(".dat")]
+        with etapa(metricas, "descubrimiento") as m:
+            cat = catalogo(input_dir)
+            fecha_str = fecha or cat.ultima_fecha()
+            archivos = cat.archivos(fecha_str)
+            flujo_entrada, dat = archivos["flujos"], archivos["dat"]
+            flujo_csv = nombre_salida(flujo_entrada) if flujo_entrada else None
+            m["filas_entrada"] = len(cat.por_fecha)
 
         if not flujo_csv or not dat:
-            logging.error("No se encontraron archivos de flujos o estimaciones en input/")
-            return None, None
-
-        flujo_csv = flujo_csv[0]
-        dat = dat[0]
-
-        a1, m1, d1 = extraer_fecha(flujo_csv)
-        a2, m2, d2 = extraer_fecha(dat)
-        if not (a1 == a2 and m1 == m2 and d1 == d2):
-            logging.error(f"Fechas no coinciden entre archivos: {flujo_csv} y {dat}")
-            return None, None
+            logging.error("No se encontraron archivos de flujos o estimaciones en input/"
+                          + (f" para la fecha {fecha}" if fecha else ""))
+            return fallo
 
-        fecha_str = f"{a1}{m1}{d1}"
         fecha_base = datetime.strptime(fecha_str, "%Y%m%d").date()
 
-        df_flujo = safe_read_csv(os.path.join(input_dir, flujo_csv), sep=';', encoding='latin1')
-        df_dat = safe_read_csv(os.path.join(input_dir, dat), sep=';', encoding='latin1')
-
-        if df_flujo.empty or df_dat.empty:
-            logging.error("Algún archivo está vacío.")
-            return None, None
-
-        # === Filtrar registros según fecha_cobro ===
-        if 'fecha_cobro' in df_flujo.columns:
-            df_flujo['fecha_cobro'] = pd.to_datetime(
-                df_flujo['fecha_cobro'],
-                format='%d/%m/%Y',
-                errors='coerce'
-            ).dt.date
-            filas_antes = df_flujo.shape[0]
-            df_flujo = df_flujo[df_flujo['fecha_cobro'] > fecha_base].copy()
-            filas_despues = df_flujo.shape[0]
-            logging.info(f"Filtrado por fecha: se eliminaron {filas_antes - filas_despues} filas con fecha_cobro <= {fecha_base}")
-        else:
-            logging.warning("No se encontró la columna 'fecha_cobro' en el archivo de flujos. No se aplicó filtrado por fecha.")
-
-        # === PROCESAMIENTO ROBUSTO ===
-        for i, row in df_dat.iterrows():
-            # Convertir tipos para la comparación
-            cod_emp_flujo = df_flujo['cod_emp'].astype(float)
-            m_contract_row = float(row['M_CONTRACT_'])
-
-            fecha_flujo = pd.to_datetime(df_flujo['fecha_cobro'], errors='coerce')
-            fecha_row = pd.to_datetime(str(row['M_DATE']), format='%d/%m/%Y', errors='coerce')
-
-            # Comparar ambos como float y datetime
-            matches = (cod_emp_flujo == m_contract_row) & (fecha_flujo == fecha_row)
-            idxs = df_flujo.index[matches]
-            for idx in idxs:
-                if row['M_DISCFLOWC'] > 0:
-                    df_flujo.at[idx, 'der_vp'] = float(row['M_DISCFLOWC'])
-                elif row['M_DISCFLOWC'] < 0:
-                    df_flujo.at[idx, 'obl_vp'] = abs(float(row['M_DISCFLOWC']))
-                if row['M_FLOW_COL'] > 0:
-                    df_flujo.at[idx, 'der_intereses'] = float(row['M_FLOW_COL'])
-                elif row['M_FLOW_COL'] < 0:
-                    df_flujo.at[idx, 'obl_intereses'] = abs(float(row['M_FLOW_COL']))
+        if chunksize is None:
+            chunksize = int(get_config("FLUJOS_CHUNK_ROWS", "0") or 0)
 
+        flujo_path = os.path.join(input_dir, flujo_entrada)
+        dat_path = os.path.join(input_dir, dat)
+        with etapa(metricas, "lectura_dat") as m:
+            df_dat = leer_csv_cacheado(dat_path, **opciones_lectura(dat_path, 'dat', 'procesar_swaps'))
+            m["filas_salida"] = df_dat.shape[0]
         os.makedirs(output_dir, exist_ok=True)
         output_path = os.path.join(output_dir, flujo_csv)
-        safe_to_csv(df_flujo, output_path, sep=';', index=False, encoding='latin1')
-        logging.info(f"Archivo de flujos modificado guardado en {output_path}")
+
+        if not df_dat.empty and incremental.activo(chunksize):
+            try:
+                df_flujo = incremental.procesar_incremental(flujo_path, df_dat, fecha_str, fecha_base, output_path, metricas)
+            except Exception:
+                logging.exception("Error en el modo incremental; se procesa en modo completo")
+                df_flujo = None
+            if df_flujo is not None:
+                logging.info(f"Archivo de flujos modificado guardado en {output_path}")
+                if en_memoria:
+                    escritura = Future()
+                    escritura.set_result(output_path)
+                    return flujo_csv, fecha_str, df_flujo, escritura
+                return flujo_csv, fecha_str
+
+        if chunksize > 0:
+            if df_dat.empty:
+                logging.error("Algún archivo está vacío.")
+                return fallo
+            lookup = construir_lookup(df_dat)
+            filas = _procesar_por_bloques(flujo_path, lookup, fecha_base, output_path, chunksize, metricas)
+            if not filas:
+                logging.error("Algún archivo está vacío.")
+                return fallo
+            logging.info(f"Archivo de flujos modificado guardado en {output_path}")
+            if en_memoria:
+                escritura = Future()
+                escritura.set_result(output_path)
+                return flujo_csv, fecha_str, None, escritura
+        else:
+            with etapa(metricas, "lectura_flujos") as m:
+                df_flujo = leer_para_reescribir(flujo_path, 'flujos', 'procesar_swaps', leer_csv_cacheado)
+                m["filas_salida"] = df_flujo.shape[0]
+
+            if df_flujo.empty or df_dat.empty:
+                logging.error("Algún archivo está vacío.")
+                return fallo
+
+            # === Filtrar registros según fecha_cobro ===
+            with etapa(metricas, "filtro_fecha", df_flujo.shape[0]) as m:
+                df_flujo, eliminadas = filtrar_por_fecha(df_flujo, fecha_base)
+                m["filas_salida"] = df_flujo.shape[0]
+            _log_filtrado(eliminadas, fecha_base)
+
+            # === PROCESAMIENTO VECTORIZADO ===
+            with etapa(metricas, "cruce", df_flujo.shape[0]) as m:
+                lookup = construir_lookup(df_dat)
+                df_flujo = aplicar_lookup(df_flujo, lookup)
+                m["filas_salida"] = df_flujo.shape[0]
+
+            if en_memoria:
+                # df_flujo no se modifica después: el hilo de escritura y el informe solo lo leen
+                pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="escritura_flujos")
+                escritura = pool.submit(_escribir_flujos, df_flujo, output_path, metricas)
+                pool.shutdown(wait=False)
+                return flujo_csv, fecha_str, df_flujo, escritura
+            _escribir_flujos(df_flujo, output_path, metricas)
         return flujo_csv, fecha_str
 
     except Exception as e:
         logging.exception(f"Error procesando flujos: {e}")
-        return None, None
+        return fallo
 
 
 
@@ -0,0 +1,290 @@
+# code/pkg/salida.py
+"""Escritura de los archivos de OUTPUT_DIR.
+
+Cada archivo se escribe en un temporal oculto de la misma carpeta (.<nombre>.<pid>.tmp) con
+un buffer de SALIDA_BUFFER_BYTES, se hace fsync y recién entonces se renombra sobre el destino
+(os.replace, atómico dentro del mismo sistema de archivos). Si el proceso muere a mitad de la
+escritura queda el archivo anterior intacto (o ninguno), nunca uno truncado que un proceso
+posterior tome como bueno. SALIDA_FSYNC=0 omite el fsync (más rápido, menos durable).
+
+Un destino .gz/.xz/.bz2 (SALIDA_COMPRESION, ver catalogo.nombre_salida) se comprime en
+streaming: lo escrito se acumula en tramos de COMPRESION_TRAMO que un hilo aparte comprime
+y escribe en el temporal, así la compresión (zlib y lzma liberan el GIL) se solapa con la
+serialización del CSV. tamanos(destino) devuelve los bytes sin comprimir y comprimidos de
+lo último escrito en este proceso, para el manifiesto.
+
+SALIDA_CSV_MOTOR=pyarrow serializa los DataFrames con el escritor CSV de Arrow, bastante más
+rápido que DataFrame.to_csv con muchas columnas float, dejando el mismo texto que pandas:
+mismo separador y encoding, floats con la representación más corta de Python (913.0,
+1e+20, 2.5e-05), nulos vacíos y encabezado escrito por pandas. Lo que Arrow no puede
+reproducir igual se escribe con pandas: columnas que no son números, texto o datetime.date
+(datetime64, categorías, enteros con nulos), índice, opciones extra de to_csv, archivos de una
+sola columna y tramos con valores que requieren comillas.
+"""
+from __future__ import annotations
+import io
+import os
+import queue
+import threading
+
+import numpy as np
+
+from logger import get_logger
+from pkg.utils import compresion_de, get_config
+
+log = get_logger(__name__)
+
+FILAS_POR_TRAMO = 250_000
+COMPRESION_TRAMO = 1 << 20
+# Nivel por defecto (SALIDA_COMPRESION_NIVEL lo cambia). Desde el preset 2 xz usa el buscador
+# lento: en los flujos, 3 tarda 8 veces lo que 1 para un archivo apenas 3% menor
+_NIVELES = {"gzip": 6, "xz": 1, "bz2": 9}
+_tamanos: dict = {}  # ruta absoluta -> (bytes sin comprimir, bytes en disco)
+
+
+class EscrituraAtomica:
+    """Context manager: abre un temporal en la carpeta de `destino` y lo renombra sobre
+    `destino` al salir sin error (con error, lo borra). Entrega un archivo binario, que
+    comprime en otro hilo si `destino` termina en .gz, .xz o .bz2."""
+
+    def __init__(self, destino, buffer_bytes: int | None = None, fsync: bool | None = None):
+        self.destino = os.fspath(destino)
+        carpeta, nombre = os.path.split(os.path.abspath(self.destino))
+        self.carpeta = carpeta
+        self.tmp = os.path.join(carpeta, f".{nombre}.{os.getpid()}.tmp")
+        self.buffer_bytes = int(buffer_bytes or get_config("SALIDA_BUFFER_BYTES", str(8 * 1024 * 1024)))
+        self.fsync = fsync if fsync is not None else get_config("SALIDA_FSYNC", "1") == "1"
+        self.compresion = compresion_de(self.destino)
+        self._f = None
+        self._comprimido = None
+
+    def __enter__(self):
+        os.makedirs(self.carpeta, exist_ok=True)
+        self._f = open(self.tmp, "wb", buffering=self.buffer_bytes)
+        if self.compresion is None:
+            return self._f
+        try:
+            self._comprimido = _Comprimido(self._f, self.compresion)
+        except BaseException:
+            self._f.close()
+            _borrar(self.tmp)
+            raise
+        return self._comprimido
+
+    def __exit__(self, tipo, valor, tb):
+        try:
+            if self._comprimido is not None:
+                self._comprimido.terminar(tipo is None)
+            if tipo is None:
+                self._f.flush()
+                if self.fsync:
+                    os.fsync(self._f.fileno())
+            self._f.close()
+        except BaseException:
+            if not self._f.closed:
+                try:
+                    self._f.close()
+                except OSError:
+                    pass
+            _borrar(self.tmp)
+            raise
+        if tipo is not None:
+            _borrar(self.tmp)
+            return False
+        en_disco = os.path.getsize(self.tmp)
+        sin_comprimir = self._comprimido.escritos if self._comprimido is not None else en_disco
+        os.replace(self.tmp, self.destino)
+        _tamanos[os.path.abspath(self.destino)] = (sin_comprimir, en_disco)
+        if self.fsync:
+            _fsync_carpeta(self.carpeta)
+        return False
+
+
+def tamanos(destino) -> tuple | None:
+    """(bytes sin comprimir, bytes en disco) de la última escritura de `destino` en este
+    proceso, o None si no se escribió aquí."""
+    return _tamanos.get(os.path.abspath(os.fspath(destino)))
+
+
+class _Comprimido(io.BufferedIOBase):
+    """Archivo de escritura que comprime en un hilo aparte hacia `crudo`.
+
+    write() solo acumula; cada COMPRESION_TRAMO bytes el tramo pasa por una cola acotada
+    (el que serializa espera si la compresión se atrasa, sin acumular memoria) al hilo que
+    comprime y escribe. terminar() vacía la cola y escribe el final del formato."""
+
+    def __init__(self, crudo, compresion: str):
+        nivel = int(get_config("SALIDA_COMPRESION_NIVEL", "") or _NIVELES[compresion])
+        if compresion == "gzip":
+            import zlib
+            self._compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)  # 31: cabecera gzip, mtime 0
+        elif compresion == "xz":
+            import lzma
+            self._compresor = lzma.LZMACompressor(preset=nivel)
+        elif compresion == "bz2":
+            import bz2
+            self._compresor = bz2.BZ2Compressor(nivel)
+        else:
+            raise ValueError(f"No se pueden escribir salidas con compresión {compresion!r}")
+        self._crudo = crudo
+        self._pendiente = bytearray()
+        self._cola = queue.Queue(maxsize=4)
+        self._error = None
+        self.escritos = 0
+        self._hilo = threading.Thread(target=self._comprimir, name="compresion", daemon=True)
+        self._hilo.start()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, datos) -> int:
+        if self._error is not None:
+            raise self._error
+        self._pendiente += datos
+        self.escritos += len(datos)
+        if len(self._pendiente) >= COMPRESION_TRAMO:
+            self._cola.put(bytes(self._pendiente))
+            self._pendiente.clear()
+        return len(datos)
+
+    def _comprimir(self) -> None:
+        while (tramo := self._cola.get()) is not None:
+            if self._error is not None:
+                continue  # se sigue vaciando la cola para no bloquear a quien escribe
+            try:
+                self._crudo.write(self._compresor.compress(tramo))
+            except BaseException as e:
+                self._error = e
+
+    def terminar(self, completo: bool = True) -> None:
+        """Espera al hilo; si `completo`, comprime lo pendiente y cierra el formato."""
+        if self._hilo.is_alive():
+            if completo and self._pendiente:
+                self._cola.put(bytes(self._pendiente))
+            self._pendiente.clear()
+            self._cola.put(None)
+            self._hilo.join()
+        if not completo:
+            return
+        if self._error is not None:
+            raise self._error
+        self._crudo.write(self._compresor.flush())
+
+
+def _borrar(ruta) -> None:
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+def _fsync_carpeta(carpeta) -> None:
+    """Persiste el rename (entrada de directorio); no disponible en Windows."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(carpeta, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# === Serialización CSV con Arrow ===
+
+def _floats_como_texto(valores):
+    """float64 -> texto Arrow idéntico a repr() de Python (lo que escribe pandas); NaN -> nulo."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    texto = pc.cast(pa.array(valores, type=pa.float64()), pa.string())
+    # Arrow escribe 913 y pandas 913.0
+    entero = pc.invert(pc.match_substring_regex(texto, r"[.ena]"))
+    texto = pc.if_else(entero, pc.binary_join_element_wise(texto, ".0", ""), texto)
+    # Arrow cambia a notación exponencial con otros umbrales que repr: esos pocos valores se
+    # formatean con repr (repr usa exponente desde 1e16 y por debajo de 1e-4)
+    absolutos = np.abs(valores)
+    raros = (np.isfinite(absolutos) & (absolutos >= 1e10)) | ((absolutos > 0) & (absolutos < 1e-4))
+    if raros.any():
+        texto = pc.replace_with_mask(texto, pa.array(raros),
+                                     pa.array([repr(float(v)) for v in valores[raros]], pa.string()))
+    nulos = np.isnan(valores)
+    if nulos.any():
+        texto = pc.if_else(pa.array(nulos), pa.scalar(None, pa.string()), texto)
+    return texto
+
+
+def _columna_arrow(serie):
+    """Columna Arrow que se escribe igual que con pandas, o None si no hay garantía."""
+    import pyarrow as pa
+
+    dtype = serie.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind == "f":
+        return _floats_como_texto(serie.to_numpy(dtype=np.float64))
+    if isinstance(dtype, np.dtype) and dtype.kind in "iu":
+        return pa.array(serie.to_numpy())
+    if dtype.kind == "O" or str(dtype).startswith("string"):
+        try:
+            arr = pa.array(serie, from_pandas=True)
+        except (pa.ArrowException, TypeError, ValueError):
+            return None
+        # texto, o datetime.date (fecha_cobro tras el filtro): Arrow y pandas escriben aaaa-mm-dd
+        if (pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type) or pa.types.is_null(arr.type)
+                or pa.types.is_date32(arr.type)):
+            return arr
+    return None
+
+
+def _escribir_arrow(df, f, sep: str, encoding: str, header: bool) -> bool:
+    """Escribe df con Arrow; False (sin escribir nada) si alguna columna no es compatible."""
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+
+    if df.shape[1] < 2:
+        return False  # una fila con un único campo vacío: pandas escribe "" y Arrow nada
+    columnas = []
+    for i in range(df.shape[1]):
+        columna = _columna_arrow(df.iloc[:, i])
+        if columna is None:
+            return False
+        columnas.append(columna)
+    tabla = pa.table(columnas, names=[f"c{i}" for i in range(len(columnas))])
+    opciones = pcsv.WriteOptions(include_header=False, delimiter=sep, quoting_style="none")
+    utf8 = encoding.lower().replace("_", "-") in ("utf-8", "utf8")
+
+    if header:
+        f.write(df.head(0).to_csv(sep=sep, index=False).encode(encoding))
+    for inicio in range(0, tabla.num_rows, FILAS_POR_TRAMO):
+        try:
+            destino = pa.BufferOutputStream()
+            pcsv.write_csv(tabla.slice(inicio, FILAS_POR_TRAMO), destino, opciones)
+            datos = destino.getvalue().to_pybytes()
+        except pa.ArrowInvalid:
+            # valores con separador, comillas o saltos de línea: pandas los entrecomilla
+            datos = df.iloc[inicio:inicio + FILAS_POR_TRAMO].to_csv(sep=sep, index=False, header=False)
+            f.write(datos.encode(encoding))
+            continue
+        f.write(datos if utf8 else datos.decode("utf-8").encode(encoding))
+    return True
+
+
+def _serializar(df, f, sep, encoding, header, index, motor, opciones) -> None:
+    if motor == "pyarrow" and not index and not opciones and isinstance(header, bool):
+        from pkg import utils
+        if utils._pa is None:
+            log.warning("SALIDA_CSV_MOTOR=pyarrow pero pyarrow no está instalado; se usa pandas.")
+        elif _escribir_arrow(df, f, sep, encoding, header):
+            return
+    df.to_csv(f, sep=sep, encoding=encoding, header=header, index=index, **opciones)
+
+
+def escribir_csv(df, destino, sep: str = ",", encoding: str = "utf-8", header=True, index: bool = False,
+                 motor: str | None = None, **opciones) -> None:
+    """Escribe df como CSV. `destino` es una ruta (escritura atómica, ver EscrituraAtomica) o
+    un archivo binario ya abierto, p.ej. para escribir por bloques dentro de un mismo
+    `with EscrituraAtomica(ruta) as f`. motor: 'pandas' o 'pyarrow' (None: SALIDA_CSV_MOTOR)."""
+    motor = (motor or get_config("SALIDA_CSV_MOTOR", "pandas")).lower()
+    if hasattr(destino, "write"):
+        _serializar(df, destino, sep, encoding, header, index, motor, opciones)
+        return
+    with EscrituraAtomica(destino) as f:
+        _serializar(df, f, sep, encoding, header, index, motor, opciones)
@@ -0,0 +1,145 @@
+# code/pkg/servicio.py
+"""Servicio local (main.py --servir) para procesar una fecha bajo demanda.
+
+Servidor HTTP mínimo de la biblioteca estándar, en localhost o en un socket Unix
+(SERVICIO_SOCKET), que mantiene pandas y la configuración cargados entre pedidos:
+
+    POST /procesar   {"fecha": "20250910", "forzar": false}
+        -> 200 {"fecha", "estado", "detalle", "salidas": {...}, "etapas": {...}, "duracion_s"}
+        -> 404 si no hay flujos/.dat de la fecha, 500 si terminó en ERROR
+    GET  /salud      -> 200 {"estado": "ok", "en_curso": n}
+
+Como mucho SERVICIO_MAX_CONCURRENTES fechas se procesan a la vez; un pedido que no
+consigue turno en SERVICIO_ESPERA segundos recibe 503. Dos pedidos de la misma fecha
+nunca corren en paralelo (escriben los mismos archivos).
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logger import get_logger
+from pkg.utils import get_config
+
+log = get_logger(__name__)
+
+_FECHA = re.compile(r"^\d{8}$")
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    server_version = "swaps-r5"
+
+    def log_message(self, formato, *args):
+        log.debug("Servicio: " + formato, *args)
+
+    def _responder(self, codigo: int, cuerpo: dict) -> None:
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path == "/salud":
+            self._responder(200, {"estado": "ok", "en_curso": self.server.en_curso})
+        else:
+            self._responder(404, {"error": f"ruta desconocida: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/procesar":
+            self._responder(404, {"error": f"ruta desconocida: {self.path}"})
+            return
+        try:
+            largo = int(self.headers.get("Content-Length") or 0)
+            pedido = json.loads(self.rfile.read(largo) or b"{}")
+            fecha = str(pedido["fecha"])
+        except (ValueError, KeyError, TypeError):
+            self._responder(400, {"error": 'se espera JSON {"fecha": "aaaammdd"}'})
+            return
+        if not _FECHA.match(fecha):
+            self._responder(400, {"error": f"fecha inválida: {fecha}"})
+            return
+        codigo, cuerpo = self.server.atender(fecha, bool(pedido.get("forzar", False)))
+        self._responder(codigo, cuerpo)
+
+
+class _Servidor:
+    """Estado compartido por los hilos: límite de concurrencia y un lock por fecha."""
+
+    def iniciar_estado(self, procesar, max_concurrentes: int, espera: float) -> None:
+        self.procesar = procesar
+        self.espera = espera
+        self.turnos = threading.BoundedSemaphore(max_concurrentes)
+        self.en_curso = 0
+        self._lock = threading.Lock()
+        self._por_fecha: dict[str, threading.Lock] = {}
+
+    def atender(self, fecha: str, forzar: bool) -> tuple[int, dict]:
+        t0 = time.perf_counter()
+        if not self.turnos.acquire(timeout=self.espera):
+            return 503, {"fecha": fecha, "error": "servicio ocupado, reintente más tarde"}
+        try:
+            with self._lock:
+                candado = self._por_fecha.setdefault(fecha, threading.Lock())
+                self.en_curso += 1
+            with candado:
+                cuerpo = self.procesar(fecha, forzar)
+        except FileNotFoundError as e:
+            return 404, {"fecha": fecha, "estado": "ERROR", "detalle": str(e)}
+        except Exception as e:
+            log.exception(f"Servicio: error procesando {fecha}")
+            return 500, {"fecha": fecha, "estado": "ERROR", "detalle": str(e)}
+        finally:
+            with self._lock:
+                self.en_curso -= 1
+            self.turnos.release()
+        cuerpo["duracion_s"] = round(time.perf_counter() - t0, 6)
+        log.info(f"Servicio: {fecha} -> {cuerpo.get('estado')} en {cuerpo['duracion_s']:.3f} s")
+        return (500 if cuerpo.get("estado") == "ERROR" else 200), cuerpo
+
+
+class ServidorTCP(_Servidor, ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class ServidorUnix(_Servidor, ThreadingHTTPServer):
+    daemon_threads = True
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)  # HTTPServer.server_bind espera (host, puerto)
+        self.server_name, self.server_port = "localhost", 0
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def crear_servidor(procesar, host=None, puerto=None, socket_path=None, max_concurrentes=None, espera=None):
+    """Crea (sin arrancar) el servidor. procesar(fecha, forzar) -> dict con el resultado."""
+    socket_path = socket_path if socket_path is not None else get_config("SERVICIO_SOCKET", "")
+    max_concurrentes = int(max_concurrentes or get_config("SERVICIO_MAX_CONCURRENTES", "1"))
+    espera = float(espera if espera is not None else get_config("SERVICIO_ESPERA", "600"))
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # socket de una ejecución anterior
+        servidor = ServidorUnix(socket_path, _Manejador)
+        direccion = f"unix:{socket_path}"
+    else:
+        host = host or get_config("SERVICIO_HOST", "127.0.0.1")
+        puerto = int(puerto if puerto is not None else get_config("SERVICIO_PUERTO", "8765"))
+        servidor = ServidorTCP((host, puerto), _Manejador)
+        direccion = f"http://{host}:{servidor.server_address[1]}"
+    servidor.iniciar_estado(procesar, max_concurrentes, espera)
+    servidor.direccion = direccion
+    log.info(f"Servicio escuchando en {direccion} (máx. {max_concurrentes} fechas a la vez)")
+    return servidor
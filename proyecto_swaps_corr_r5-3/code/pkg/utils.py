@@ -1,68 +1,219 @@
-from file_path import load_paths
 # code/pkg/utils.py
 from __future__ import annotations
+from file_path import load_paths
+from logger import cargar_dotenv
 from pathlib import Path
+import importlib
 import os
 import logging
-from logging.handlers import RotatingFileHandler
-from dotenv import load_dotenv
-rutas = load_paths()
 
-# Carga central del .env (idempotente)
-ENV_PATH = Path(__file__).resolve().parents[1] / ".env"  # /code/.env
-load_dotenv(ENV_PATH)
+# Nada pesado al importar: .env, rutas, pandas y pyarrow se cargan en el primer uso,
+# para que los subcomandos livianos de main.py (--validar, --listar) arranquen rápido.
 
 def cargar_env() -> dict:
     """Devuelve las rutas y variables base desde .env (con valores por defecto).
     Normaliza las rutas relativas ../ respecto a /code en file_path.load_paths()."""
-    rutas = {
+    # No normalizamos aquí; lo hace file_path.load_paths()
+    rutas = load_paths()
+    return {
         "INPUT_DIR": rutas['INPUT_DIR'],
         "OUTPUT_DIR": rutas['OUTPUT_DIR'],
         "LOG_DIR": rutas['LOG_DIR'],
     }
-    # No normalizamos aquí; lo hace file_path.load_paths()
-    return rutas
 
 def setup_logging(log_dir: str | None = None):
-    """Compat: configura logging usando variables del .env.
+    """Compat: configura logging usando variables del .env (ver logger.configurar_logging).
     Si no se pasa log_dir, usa LOG_DIR del .env.
     """
-    from logger import get_logger  # evita dependencia circular
-    # Instancia el logger raíz para configurar handlers según .env
-    root_logger = get_logger()  # aplica rotación y consola
+    from logger import configurar_logging  # evita dependencia circular
+    root_logger = configurar_logging()  # idempotente: un solo handler en el logger raíz
     if log_dir:
         # Asegura que exista (por si se invoca con ruta específica)
         Path(log_dir).mkdir(parents=True, exist_ok=True)
     return root_logger
 
 def get_config(key: str, default=None):
+    cargar_dotenv()
     return os.getenv(key, default)
 
 
 # === Helpers de IO CSV robustos ===
-import pandas as _pd
+# pandas y pyarrow (motor CSV multihilo opcional) se importan al primer acceso a
+# utils._pd / utils._pa; pyarrow queda en None si no está instalado.
+_DIFERIDOS = {"_pd": "pandas", "_pa": "pyarrow"}
 
-def safe_read_csv(path, **kwargs):
-    """Intenta leer CSV con utf-8 y hace fallback a latin1 si falla."""
-    encs = [kwargs.pop("encoding", None), "utf-8", "latin1"]
-    tried = []
-    for enc in encs:
-        if not enc:
-            continue
+def __getattr__(nombre):
+    if nombre not in _DIFERIDOS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    try:
+        modulo = importlib.import_module(_DIFERIDOS[nombre])
+    except ImportError:
+        if nombre == "_pd":
+            raise
+        modulo = None
+    globals()[nombre] = modulo
+    return modulo
+
+def _diferido(nombre):
+    return globals()[nombre] if nombre in globals() else __getattr__(nombre)
+
+# Opciones de read_csv que el motor pyarrow no soporta: esas lecturas usan el motor C
+_OPCIONES_SOLO_C = ("chunksize", "iterator", "nrows", "skiprows", "skipfooter", "low_memory", "converters")
+
+def motor_csv(kwargs: dict) -> str:
+    """Motor de parseo para read_csv: `engine` explícito o CSV_ENGINE del .env ('c' por defecto).
+    Con 'pyarrow' cae al motor C si pyarrow no está instalado o la lectura usa opciones no soportadas."""
+    motor = (kwargs.pop("engine", None) or get_config("CSV_ENGINE", "c")).lower()
+    if motor != "pyarrow":
+        return motor
+    if _diferido("_pa") is None:
+        logging.getLogger(__name__).warning("CSV_ENGINE=pyarrow pero pyarrow no está instalado; se usa el motor C.")
+        return "c"
+    if any(k in kwargs for k in _OPCIONES_SOLO_C):
+        return "c"
+    return motor
+
+# === Entradas comprimidas ===
+# Extensión -> compresión; read_csv la infiere igual desde la ruta y descomprime en streaming
+COMPRESIONES = {".gz": "gzip", ".xz": "xz", ".bz2": "bz2", ".zip": "zip"}
+
+def separar_compresion(nombre: str) -> tuple:
+    """'flujos_swap_gbo_20250910.csv.gz' -> ('flujos_swap_gbo_20250910.csv', 'gzip'); sin compresión, (nombre, None)."""
+    raiz, extension = os.path.splitext(nombre)
+    compresion = COMPRESIONES.get(extension.lower())
+    return (raiz, compresion) if compresion else (nombre, None)
+
+def compresion_de(path) -> str | None:
+    return separar_compresion(os.fspath(path))[1]
+
+def abrir_binario(path):
+    """Abre un archivo de entrada para lectura binaria, descomprimiendo en streaming
+    (sin archivos temporales) según la extensión. Un .zip debe tener un único archivo."""
+    compresion = compresion_de(path)
+    if compresion is None:
+        return open(path, "rb")
+    if compresion == "gzip":
+        import gzip
+        return gzip.open(path, "rb")
+    if compresion == "xz":
+        import lzma
+        return lzma.open(path, "rb")
+    if compresion == "bz2":
+        import bz2
+        return bz2.open(path, "rb")
+    import zipfile
+    with zipfile.ZipFile(path) as z:  # el miembro abierto mantiene el archivo abierto
+        miembros = [i for i in z.infolist() if not i.is_dir()]
+        if len(miembros) != 1:
+            raise ValueError(f"{path}: se esperaba un único archivo dentro del .zip y hay {len(miembros)}")
+        return z.open(miembros[0])
+
+# === Salidas comprimidas ===
+# SALIDA_COMPRESION -> extensión de los CSV de output/ (pkg.salida comprime según la extensión)
+SUFIJOS_SALIDA = {"gzip": ".gz", "xz": ".xz"}
+
+def sufijo_salida() -> str:
+    """Extensión que SALIDA_COMPRESION (gzip, xz o ninguna) agrega a los archivos de salida."""
+    compresion = get_config("SALIDA_COMPRESION", "ninguna").lower()
+    if compresion in ("", "ninguna"):
+        return ""
+    if compresion not in SUFIJOS_SALIDA:
+        raise ValueError(f"SALIDA_COMPRESION debe ser gzip, xz o ninguna (no {compresion!r})")
+    return SUFIJOS_SALIDA[compresion]
+
+# === Detección de encoding por muestra ===
+import codecs
+import time
+
+_MUESTRA_ENCODING = 64 * 1024  # bytes leídos al inicio, en medio y al final del archivo
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+_ENCODINGS_DETECTADOS: dict = {}  # (ruta, tamaño, mtime_ns, preferido) -> encoding
+
+def _muestras(path) -> list:
+    """Bloques acotados del inicio, el medio y el final del archivo.
+    Comprimido, solo el inicio descomprimido: saltar al medio obligaría a descomprimir todo."""
+    if compresion_de(path):
+        with abrir_binario(path) as f:
+            return [f.read(3 * _MUESTRA_ENCODING)]
+    tamano = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if tamano <= 3 * _MUESTRA_ENCODING:
+            return [f.read()]
+        bloques = []
+        for pos in (0, tamano // 2, tamano - _MUESTRA_ENCODING):
+            f.seek(pos)
+            bloques.append(f.read(_MUESTRA_ENCODING))
+        return bloques
+
+def _decodifica(bloques: list, encoding: str) -> bool:
+    es_utf8 = codecs.lookup(encoding).name == "utf-8"
+    for i, bloque in enumerate(bloques):
+        if es_utf8 and i > 0:
+            # un bloque intermedio puede empezar a mitad de un carácter multibyte
+            corte = 0
+            while corte < 3 and corte < len(bloque) and 0x80 <= bloque[corte] <= 0xBF:
+                corte += 1
+            bloque = bloque[corte:]
         try:
-            return _pd.read_csv(path, encoding=enc, **kwargs)
-        except Exception as e:
-            tried.append((enc, str(e)))
-    # último intento sin encoding explícito
+            codecs.getincrementaldecoder(encoding)().decode(bloque, final=False)
+        except UnicodeDecodeError:
+            return False
+    return True
+
+def detectar_encoding(path, preferido: str | None = None) -> str:
+    """Elige el encoding de un archivo a partir de una muestra acotada de bytes:
+    BOM si existe; si no, `preferido` si la muestra lo decodifica; si no, utf-8 si la
+    muestra es utf-8 válido; y latin1 en último caso. Se cachea por ruta + tamaño + mtime."""
+    st = os.stat(path)
+    clave = (os.path.abspath(path), st.st_size, st.st_mtime_ns, preferido)
+    if clave in _ENCODINGS_DETECTADOS:
+        return _ENCODINGS_DETECTADOS[clave]
+
+    t0 = time.perf_counter()
+    bloques = _muestras(path)
+    encoding = next((enc for bom, enc in _BOMS if bloques[0].startswith(bom)), None)
+    if encoding is None:
+        candidatos = [preferido] if preferido else []
+        candidatos += ["utf-8"]
+        encoding = next((enc for enc in candidatos if _decodifica(bloques, enc)), "latin1")
+    _ENCODINGS_DETECTADOS[clave] = encoding
+    logging.getLogger(__name__).info(
+        "Encoding de %s: %s (detectado en %.1f ms)",
+        os.path.basename(path), encoding, (time.perf_counter() - t0) * 1000)
+    return encoding
+
+def safe_read_csv(path, **kwargs):
+    """Lee un CSV detectando el encoding una sola vez (ver detectar_encoding), con el
+    encoding recibido como preferencia, y lo parsea una única vez.
+    El motor de parseo se elige con motor_csv (C o pyarrow multihilo)."""
+    kwargs["engine"] = motor_csv(kwargs)
+    preferido = kwargs.pop("encoding", None)
+    es_ruta = isinstance(path, (str, os.PathLike))
+    encoding = detectar_encoding(path, preferido) if es_ruta and os.path.isfile(path) else preferido
+    pd = _diferido("_pd")
     try:
-        return _pd.read_csv(path, **kwargs)
+        return pd.read_csv(path, encoding=encoding, **kwargs)
+    except UnicodeDecodeError as e:
+        # la muestra no vio el byte inválido: latin1 decodifica cualquier byte
+        if encoding == "latin1":
+            raise RuntimeError(f"No se pudo leer CSV {path}. Error final: {e}")
+        logging.getLogger(__name__).warning(
+            "%s no es %s completo (%s); se relee con latin1", os.path.basename(str(path)), encoding, e)
+        return pd.read_csv(path, encoding="latin1", **kwargs)
     except Exception as e:
-        raise RuntimeError(f"No se pudo leer CSV {path}. Intentos: {tried}. Error final: {e}")
+        raise RuntimeError(f"No se pudo leer CSV {path}. Encoding: {encoding}. Error final: {e}")
 
 def safe_to_csv(df, path, **kwargs):
-    """Escribe CSV garantizando carpeta y usando utf-8 por defecto."""
+    """Escribe CSV garantizando carpeta y usando utf-8 por defecto.
+    La escritura es atómica (temporal + rename, ver pkg.salida.escribir_csv), salvo con
+    mode='a', que anexa al archivo existente."""
+    from pkg.salida import escribir_csv  # evita dependencia circular
     p = Path(path)
-    p.parent.mkdir(parents=True, exist_ok=True)
     if "encoding" not in kwargs:
         kwargs["encoding"] = "utf-8"
-    df.to_csv(p, index=False, **kwargs)
+    kwargs.setdefault("index", False)
+    if kwargs.pop("mode", "w") != "w":
+        p.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(p, mode="a", **kwargs)
+        return
+    escribir_csv(df, p, **kwargs)
@@ -0,0 +1,122 @@
+# code/pkg/vigilancia.py
+"""Modo vigilancia (main.py --vigilar): proceso residente que sondea INPUT_DIR.
+
+Cada VIGILAR_INTERVALO segundos se consulta el catálogo de entradas (pkg.catalogo, que
+solo vuelve a listar la carpeta si cambió) y, para cada fecha con flujos y .dat, se toma
+tamaño y mtime de sus archivos. Cuando esos valores no cambian durante VIGILAR_ESTABLE
+segundos (el sistema de origen terminó de copiarlos) se procesa la fecha en este mismo
+proceso, con pandas ya importado. Una fecha vuelve a procesarse solo si sus archivos
+cambian (p.ej. llega el Informe_R5_GBO después de los flujos). Las fechas ya presentes al
+arrancar se toman como procesadas con la firma que tienen en ese momento, salvo con
+existentes=True (main.py --vigilar --pendientes), que también las procesa. Una fecha que
+termina en ERROR no se da por procesada: se reintenta con los mismos archivos tras
+VIGILAR_REINTENTO segundos, duplicando la espera en cada fallo (hasta REINTENTO_MAX_S).
+
+Se usa sondeo en lugar de inotify porque funciona igual en carpetas de red y no requiere
+dependencias; con el catálogo cacheado, cada sondeo es un stat del directorio más un
+stat por archivo de las fechas pendientes.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+
+from logger import get_logger
+from pkg.catalogo import catalogo
+from pkg.utils import get_config
+
+log = get_logger(__name__)
+
+REINTENTO_MAX_S = 3600.0
+
+
+def _firma(input_dir, archivos: dict):
+    """(nombre, tamaño, mtime) de los archivos de una fecha, o None si alguno desapareció."""
+    firma = []
+    for tipo in sorted(archivos):
+        nombre = archivos[tipo]
+        if nombre is None:
+            firma.append((tipo, None))
+            continue
+        try:
+            st = os.stat(os.path.join(input_dir, nombre))
+        except OSError:
+            return None
+        firma.append((tipo, nombre, st.st_size, st.st_mtime_ns))
+    return tuple(firma)
+
+
+class Vigilante:
+    """Detecta fechas completas y estables en input_dir y llama a procesar(fecha)."""
+
+    def __init__(self, input_dir, procesar, intervalo: float | None = None, estable: float | None = None,
+                 existentes: bool = False, reintento: float | None = None):
+        self.input_dir = input_dir
+        self.procesar = procesar
+        self.intervalo = float(intervalo if intervalo is not None else get_config("VIGILAR_INTERVALO", "5"))
+        self.estable = float(estable if estable is not None else get_config("VIGILAR_ESTABLE", "10"))
+        self.reintento = float(reintento if reintento is not None else get_config("VIGILAR_REINTENTO", "30"))
+        self.vistas: dict = {}       # fecha -> (firma, instante en que se vio por primera vez)
+        self.procesadas: dict = {}   # fecha -> firma procesada
+        self.fallidas: dict = {}     # fecha -> (firma, intentos fallidos, instante del próximo intento)
+        self.parar = threading.Event()
+        if not existentes:
+            # solo fechas nuevas: las presentes al arrancar se procesan si luego cambian sus archivos
+            cat = catalogo(input_dir)
+            for fecha in cat.fechas_completas():
+                firma = _firma(input_dir, cat.archivos(fecha))
+                if firma is not None:
+                    self.procesadas[fecha] = firma
+            log.info(f"Vigilancia: {len(self.procesadas)} fechas ya presentes al arrancar se omiten")
+
+    def sondear(self) -> list:
+        """Una pasada: procesa las fechas listas y retorna [(fecha, resultado, latencia_s)]."""
+        ahora = time.monotonic()
+        cat = catalogo(self.input_dir)
+        eventos = []
+        for fecha in cat.fechas_completas():
+            firma = _firma(self.input_dir, cat.archivos(fecha))
+            if firma is None or self.procesadas.get(fecha) == firma:
+                continue
+            vista = self.vistas.get(fecha)
+            if vista is None or vista[0] != firma:
+                self.vistas[fecha] = (firma, ahora)
+                vista = self.vistas[fecha]
+            if ahora - vista[1] < self.estable:
+                continue
+            fallida = self.fallidas.get(fecha)
+            if fallida is not None and fallida[0] == firma and ahora < fallida[2]:
+                continue
+            disparo = time.monotonic()
+            log.info(f"Vigilancia: {fecha} completa y estable; se procesa")
+            try:
+                resultado = self.procesar(fecha)
+            except Exception as e:  # el proceso residente no debe caerse por una fecha
+                log.exception(f"Vigilancia: error procesando {fecha}")
+                resultado = (fecha, 'ERROR', str(e))
+            fin = time.monotonic()
+            self.vistas.pop(fecha, None)
+            if resultado[1] == 'ERROR':
+                # un fallo transitorio (archivo bloqueado, copia incompleta) se reintenta con espera creciente
+                intentos = fallida[1] + 1 if fallida is not None and fallida[0] == firma else 1
+                espera = min(self.reintento * 2 ** (intentos - 1), REINTENTO_MAX_S)
+                self.fallidas[fecha] = (firma, intentos, fin + espera)
+                log.warning(f"Vigilancia: {fecha} falló ({intentos} intento/s); se reintenta en {espera:g} s")
+            else:
+                self.procesadas[fecha] = firma
+                self.fallidas.pop(fecha, None)
+            log.info(f"Vigilancia: {fecha} -> {resultado[1]} en {fin - disparo:.3f} s desde el disparo "
+                     f"({fin - vista[1]:.3f} s desde que se detectó)")
+            eventos.append((fecha, resultado, fin - disparo))
+        return eventos
+
+    def ejecutar(self) -> None:
+        """Sondea hasta que se active self.parar."""
+        log.info(f"Vigilancia de {self.input_dir} cada {self.intervalo:g} s (estabilidad {self.estable:g} s)")
+        while not self.parar.is_set():
+            try:
+                self.sondear()
+            except Exception:
+                log.exception("Vigilancia: error en el sondeo")
+            self.parar.wait(self.intervalo)
+        log.info("Vigilancia detenida")
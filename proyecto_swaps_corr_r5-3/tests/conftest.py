@@ -0,0 +1,11 @@
+# tests/conftest.py
+import os
+import tempfile
+from pathlib import Path
+
+# Los módulos de code/ resuelven rutas y logger al importarse: se apuntan a un directorio temporal
+_TMP = Path(tempfile.mkdtemp(prefix="swaps_tests_"))
+for _key in ("INPUT_DIR", "OUTPUT_DIR", "LOG_DIR"):
+    _dir = _TMP / _key.split("_")[0].lower()
+    _dir.mkdir(parents=True, exist_ok=True)
+    os.environ[_key] = str(_dir)
@@ -0,0 +1,59 @@
+# tests/test_actualizar_informe.py
+import pandas as pd
+from pkg.actualizar_informe import calcular_cupones
+
+
+def test_cupones_por_contrato_coinciden_con_suma_por_filtro():
+    df_flujo = pd.DataFrame({
+        "cod_emp": [10, 20, 10, 10, 30],
+        "der_vp": [1_500_000.0, None, 250_000.123456789, 0.1, None],
+        "obl_vp": [None, 2_000_000.0, 1.0, None, None],
+    })
+
+    cupones = calcular_cupones(df_flujo)
+
+    for codigo in ("10", "20", "30"):
+        registros = df_flujo[df_flujo["cod_emp"].astype(str).str.strip() == codigo]
+        assert cupones.loc[codigo, "cupon"] == round(registros["der_vp"].fillna(0).sum() / 1_000_000, 6)
+        assert cupones.loc[codigo, "cupon_1"] == round(registros["obl_vp"].fillna(0).sum() / 1_000_000, 6)
+    assert cupones.loc["10", "cupon"] == 1.750000
+
+
+def test_flujos_vacios_no_generan_cupones():
+    vacio = pd.DataFrame({"cod_emp": [], "der_vp": [], "obl_vp": []})
+    assert calcular_cupones(vacio).empty
+
+
+def test_entrega_en_memoria_equivale_a_releer_el_csv(tmp_path):
+    from pkg.procesar_swaps import procesar_swaps
+    from pkg.actualizar_informe import actualizar_informe
+
+    entrada = tmp_path / "input"
+    entrada.mkdir()
+    pd.DataFrame({
+        "cod_emp": [100, 100, 200],
+        "fecha_cobro": ["15/10/2025", "20/10/2025", "15/10/2025"],
+        "der_vp": [1_500_000.0, 2_000_000.0, 0.0],
+        "obl_vp": [0.0, 0.0, 750_000.0],
+    }).to_csv(entrada / "flujos_swap_gbo_20250910.csv", sep=";", index=False, encoding="latin1")
+    pd.DataFrame({
+        "M_CONTRACT_": [100, 200], "M_DATE": ["15/10/2025", "15/10/2025"],
+        "M_DISCFLOWC": [1_250_001.0, -500_000.25], "M_FLOW_COL": [0.0, 0.0],
+    }).to_csv(entrada / "COL_ESTIM_FLOWS_10092025.dat", sep=";", index=False, encoding="latin1")
+    pd.DataFrame({"codigo_operacion": [100, 200, 300], "cupon": [9, 9, 9], "cupon_1": [9, 9, 9]}).to_csv(
+        entrada / "Informe_R5_GBO_250910.csv", sep=";", index=False, encoding="latin1")
+
+    archivo = tmp_path / "archivo"
+    flujos_csv, fecha = procesar_swaps(str(entrada), str(archivo), chunksize=0)
+    assert actualizar_informe(str(entrada), str(archivo), flujos_csv, fecha)
+
+    memoria = tmp_path / "memoria"
+    flujos_csv, fecha, df_flujo, escritura = procesar_swaps(str(entrada), str(memoria), chunksize=0, en_memoria=True)
+    assert actualizar_informe(str(entrada), str(memoria), flujos_csv, fecha, df_flujo=df_flujo)
+    escritura.result()
+
+    for nombre in (flujos_csv, "Informe_R5_GBO_250910.csv"):
+        assert (memoria / nombre).read_bytes() == (archivo / nombre).read_bytes()
+    informe = pd.read_csv(memoria / "Informe_R5_GBO_250910.csv", sep=";")
+    assert informe["cupon"].tolist() == [3.250001, 0.0, 0.0]
+    assert informe["cupon_1"].tolist() == [0.0, 0.500000, 0.0]
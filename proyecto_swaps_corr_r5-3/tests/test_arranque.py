@@ -0,0 +1,37 @@
+# tests/test_arranque.py
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+CODE = Path(__file__).resolve().parents[1] / "code"
+PESADOS = ("pandas", "numpy", "pyarrow", "multiprocessing", "http.server")
+PRESUPUESTO_US = 300_000  # import main hoy ronda 90 ms; antes de la carga diferida, 700 ms
+
+
+def _importtime(*args, **env):
+    """Ejecuta python -X importtime en code/ y retorna ({módulo: acumulado_us}, stdout)."""
+    r = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=CODE, capture_output=True,
+                       text=True, env={**os.environ, **env}, check=True)
+    tiempos = {}
+    for linea in r.stderr.splitlines():
+        if linea.startswith("import time:") and "|" in linea:
+            _, acumulado, nombre = linea.split("|")
+            if acumulado.strip().isdigit():
+                tiempos[nombre.strip()] = int(acumulado)
+    return tiempos, r.stdout
+
+
+def test_import_main_dentro_del_presupuesto_y_sin_pandas():
+    tiempos, _ = _importtime("-c", "import main")
+    assert not [m for m in PESADOS if m in tiempos]
+    assert tiempos["main"] < PRESUPUESTO_US
+
+
+def test_listar_no_importa_pandas(tmp_path):
+    (tmp_path / "flujos_swap_gbo_20250910.csv").write_text("a")
+    (tmp_path / "COL_ESTIM_FLOWS_10092025.dat").write_text("b")
+    (tmp_path / "flujos_swap_gbo_20250911.csv").write_text("c")
+    tiempos, salida = _importtime("main.py", "--listar", INPUT_DIR=str(tmp_path))
+    assert not [m for m in PESADOS if m in tiempos]
+    assert salida.splitlines() == ["20250910  completa    flujos dat", "20250911  incompleta  flujos"]
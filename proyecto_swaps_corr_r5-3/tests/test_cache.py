@@ -0,0 +1,55 @@
+# tests/test_cache.py
+import pytest
+import pandas as pd
+
+pytest.importorskip("pyarrow")
+from pkg import cache  # noqa: E402
+
+
+def _csv(path, filas):
+    pd.DataFrame({"cod": range(filas), "txt": ["ñ", None] * (filas // 2)}).to_csv(
+        path, sep=";", index=False, encoding="latin1")
+
+
+def test_acierto_devuelve_el_mismo_dataframe(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path / "cache"))
+    origen = tmp_path / "entrada.csv"
+    _csv(origen, 10)
+
+    primero = cache.leer_csv_cacheado(origen, sep=";", encoding="latin1")
+    monkeypatch.setattr(cache, "safe_read_csv", lambda *a, **k: pytest.fail("no debía parsear"))
+    segundo = cache.leer_csv_cacheado(origen, sep=";", encoding="latin1")
+
+    pd.testing.assert_frame_equal(primero, segundo)
+    assert len(list((tmp_path / "cache").glob("*.feather"))) == 1
+
+
+def test_cambio_de_contenido_invalida_y_lru_acota_el_tamano(tmp_path, monkeypatch):
+    directorio = tmp_path / "cache"
+    monkeypatch.setenv("CACHE_DIR", str(directorio))
+    origen = tmp_path / "entrada.csv"
+    _csv(origen, 10)
+    cache.leer_csv_cacheado(origen, sep=";")
+    tamano = next(directorio.glob("*.feather")).stat().st_size
+    monkeypatch.setenv("CACHE_MAX_BYTES", str(tamano * 2))
+
+    for filas in (12, 14, 16):
+        _csv(origen, filas)
+        assert len(cache.leer_csv_cacheado(origen, sep=";")) == filas
+
+    entradas = list(directorio.glob("*.feather"))
+    assert sum(p.stat().st_size for p in entradas) <= tamano * 2
+    assert len(entradas) < 4
+
+
+def test_acierto_conserva_los_dtypes_pedidos(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path / "cache"))
+    origen = tmp_path / "entrada.csv"
+    _csv(origen, 10)
+    opciones = dict(sep=";", encoding="latin1", dtype={"cod": "float64", "txt": "string[pyarrow]"})
+
+    df_miss = cache.leer_csv_cacheado(origen, **opciones)
+    df_hit = cache.leer_csv_cacheado(origen, **opciones)
+
+    assert df_hit.dtypes.equals(df_miss.dtypes)
+    pd.testing.assert_frame_equal(df_hit, df_miss)
@@ -0,0 +1,63 @@
+# tests/test_catalogo.py
+import os
+from pkg import catalogo as cat
+
+
+def test_catalogo_agrupa_por_fecha_y_se_reutiliza(tmp_path, monkeypatch):
+    for nombre in ("flujos_swap_gbo_20250910.csv", "COL_ESTIM_FLOWS_10092025.dat", "Informe_R5_GBO_250910.csv",
+                   "flujos_swap_gbo_20250911.csv", "COL_ESTIM_FLOWS_11092025.dat",
+                   "flujos_swap_gbo_20250912.csv",                     # sin .dat
+                   "flujos_swap_gbo_2025xx12.csv", "otro.txt"):
+        (tmp_path / nombre).write_text("x")
+    hace_un_minuto = os.stat(tmp_path).st_mtime_ns - 60 * 10**9
+    os.utime(tmp_path, ns=(hace_un_minuto, hace_un_minuto))  # fuera de la ventana "racy"
+    cat.invalidar()
+
+    catalogo = cat.catalogo(tmp_path)
+
+    assert catalogo.fechas_completas() == ["20250910", "20250911"]
+    assert catalogo.ultima_fecha() == "20250911"
+    assert catalogo.archivos("20250910") == {
+        "flujos": "flujos_swap_gbo_20250910.csv",
+        "dat": "COL_ESTIM_FLOWS_10092025.dat",
+        "informe": "Informe_R5_GBO_250910.csv",
+    }
+    assert catalogo.archivos("20250911")["informe"] is None
+    assert catalogo.metadatos("20250910", "dat").tamano == 1
+
+    # sin cambios en el directorio no se vuelve a escanear
+    monkeypatch.setattr(cat, "escanear", lambda _: (_ for _ in ()).throw(AssertionError("re-escaneo")))
+    assert cat.catalogo(tmp_path) is catalogo
+    monkeypatch.undo()
+
+    (tmp_path / "COL_ESTIM_FLOWS_12092025.dat").write_text("x")
+    os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 1))  # por si el FS tiene baja resolución
+    assert cat.catalogo(tmp_path).ultima_fecha() == "20250912"
+
+
+def test_no_reutiliza_un_escaneo_con_mtime_reciente(tmp_path):
+    (tmp_path / "flujos_swap_gbo_20250910.csv").write_text("x")
+    (tmp_path / "COL_ESTIM_FLOWS_10092025.dat").write_text("x")
+    mtime = os.stat(tmp_path).st_mtime_ns
+    cat.invalidar()
+    assert cat.catalogo(tmp_path).fechas_completas() == ["20250910"]
+
+    # archivo creado en el mismo tick del mtime: el directorio parece no haber cambiado
+    (tmp_path / "flujos_swap_gbo_20250911.csv").write_text("x")
+    (tmp_path / "COL_ESTIM_FLOWS_11092025.dat").write_text("x")
+    os.utime(tmp_path, ns=(mtime, mtime))
+    assert cat.catalogo(tmp_path).fechas_completas() == ["20250910", "20250911"]
+
+
+def test_reconoce_entradas_comprimidas(tmp_path):
+    for nombre in ("flujos_swap_gbo_20250910.csv.gz", "COL_ESTIM_FLOWS_10092025.dat.zip",
+                   "Informe_R5_GBO_250910.csv.xz", "flujos_swap_gbo_20250911.csv.7z"):
+        (tmp_path / nombre).write_text("x")
+    cat.invalidar()
+
+    catalogo = cat.catalogo(tmp_path)
+
+    assert catalogo.fechas_completas() == ["20250910"]
+    assert catalogo.archivos("20250910")["dat"] == "COL_ESTIM_FLOWS_10092025.dat.zip"
+    assert cat.extraer_fecha("Informe_R5_GBO_250910.csv.xz") == ("2025", "09", "10")
+    assert cat.nombre_salida("flujos_swap_gbo_20250910.csv.gz") == "flujos_swap_gbo_20250910.csv"
@@ -0,0 +1,39 @@
+# tests/test_esquemas.py
+import pandas as pd
+from pkg.esquemas import opciones_lectura, TEXTO
+
+
+def test_proyeccion_y_tipos_declarados(tmp_path):
+    path = tmp_path / "flujos_swap_gbo_20250910.csv"
+    path.write_text("cod_emp;moneda;der_vp;obl_vp;tasa\n 0100;COP;1.5;2;0.050\n", encoding="latin1")
+
+    completo = opciones_lectura(path, "flujos", "procesar_swaps")
+    assert completo["usecols"] == ["cod_emp", "moneda", "der_vp", "obl_vp", "tasa"]
+    assert "dtype" not in completo   # se reescribe completo: tipos inferidos, formato de salida intacto
+
+    proyectado = opciones_lectura(path, "flujos", "actualizar_informe")
+    df = pd.read_csv(path, **proyectado)
+    assert list(df.columns) == ["cod_emp", "der_vp", "obl_vp"]
+    assert df["obl_vp"].dtype == "float64"
+
+    # en una etapa que no reescribe el archivo, las columnas no declaradas se leen como texto
+    informe = tmp_path / "Informe_R5_GBO_250910.csv"
+    informe.write_text("codigo_operacion;cupon;tasa\n 0100;1;0.050\n", encoding="latin1")
+    assert opciones_lectura(informe, "informe", "procesar_swaps")["dtype"]["tasa"] == TEXTO
+    assert "dtype" not in opciones_lectura(informe, "informe", "actualizar_informe")
+
+
+def test_leer_para_reescribir_deja_las_columnas_no_tocadas_como_texto(tmp_path):
+    from pkg.esquemas import leer_para_reescribir
+
+    path = tmp_path / "flujos_swap_gbo_20250910.csv"
+    path.write_text("cod_emp;moneda;der_vp;obl_vp;tasa;activo\n100;COP;1.5;2;0.050;True\n200;;3;4;1.10;False\n",
+                    encoding="latin1")
+
+    df = leer_para_reescribir(path, "flujos", "procesar_swaps")
+    inferido = pd.read_csv(path, sep=";", encoding="latin1")
+
+    assert df["moneda"].dtype == TEXTO                     # no se toca: texto Arrow
+    assert df["obl_vp"].dtype == "int64"                   # declarada: tipo inferido
+    assert df["tasa"].dtype == "float64" and df["activo"].dtype == bool   # podían ser números: se infieren
+    assert df.to_csv(sep=";", index=False) == inferido.to_csv(sep=";", index=False)
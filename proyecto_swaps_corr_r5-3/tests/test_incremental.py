@@ -0,0 +1,110 @@
+# tests/test_incremental.py
+import pytest
+import pandas as pd
+
+pytest.importorskip("pyarrow")
+
+from pkg.procesar_swaps import procesar_swaps  # noqa: E402
+
+
+def _escribir(entrada, fecha, flujos, dat):
+    entrada.mkdir(exist_ok=True)
+    pd.DataFrame(flujos, columns=["cod_emp", "fecha_cobro", "moneda", "der_vp", "obl_vp", "der_intereses",
+                                  "obl_intereses"]).to_csv(
+        entrada / f"flujos_swap_gbo_{fecha}.csv", sep=";", index=False, encoding="latin1")
+    pd.DataFrame(dat, columns=["M_CONTRACT_", "M_DATE", "M_DISCFLOWC", "M_FLOW_COL"]).to_csv(
+        entrada / f"COL_ESTIM_FLOWS_{fecha[6:8]}{fecha[4:6]}{fecha[:4]}.dat", sep=";", index=False, encoding="latin1")
+
+
+FLUJOS = [
+    [100, "15/10/2025", "COP", 1.0, 2.0, 3.0, 4.0],
+    [100, "15/11/2025", "COP", 1.5, 2.5, 3.5, 4.5],
+    [200, "15/10/2025", "USD", 1.0, 2.0, 3.0, 4.0],
+    [300, "11/09/2025", "UVR", 1.0, 2.0, 3.0, 4.0],   # vence el día 2
+    [400, "01/01/2020", "COP", 1.0, 2.0, 3.0, 4.0],   # vencido desde el día 1
+    [500, "fecha", "COP", 1.0, 2.0, 3.0, 4.0],
+]
+DAT = [
+    [100, "15/10/2025", 10.0, -5.0],
+    [200, "15/10/2025", -7.25, 6.0],
+    [300, "11/09/2025", 8.0, 1.0],
+]
+
+
+def test_incremental_equivale_al_modo_completo(tmp_path, monkeypatch, caplog):
+    monkeypatch.setenv("INCREMENTAL", "1")
+    monkeypatch.setenv("INCREMENTAL_DIR", str(tmp_path / "estado"))
+    inc, completo = tmp_path / "inc", tmp_path / "completo"
+
+    _escribir(tmp_path / "d1", "20250910", FLUJOS, DAT)
+    procesar_swaps(str(tmp_path / "d1"), str(inc))
+
+    # día 2: cambia la estimación de 200, se modifica una línea de 100 y se agrega un contrato
+    flujos = [list(f) for f in FLUJOS] + [[600, "15/12/2025", "COP", 9.0, 9.0, 9.0, 9.0]]
+    flujos[1][3] = 7.75
+    dat = [list(d) for d in DAT]
+    dat[1][2] = 3.5
+    _escribir(tmp_path / "d2", "20250911", flujos, dat)
+    df_inc = procesar_swaps(str(tmp_path / "d2"), str(inc), en_memoria=True)[2]
+    assert "1 filas reutilizadas, 4 recalculadas, 2 descartadas sin parsear" in caplog.text
+
+    monkeypatch.setenv("INCREMENTAL", "0")
+    procesar_swaps(str(tmp_path / "d2"), str(completo))
+
+    nombre = "flujos_swap_gbo_20250911.csv"
+    assert (inc / nombre).read_bytes() == (completo / nombre).read_bytes()
+    esperado = pd.read_csv(completo / nombre, sep=";", encoding="latin1")
+    assert df_inc["cod_emp"].tolist() == esperado["cod_emp"].astype(str).tolist()
+    assert df_inc["der_vp"].tolist() == esperado["der_vp"].tolist()
+
+
+def test_incremental_sigue_el_tipo_inferido_del_archivo_completo(tmp_path, monkeypatch):
+    monkeypatch.setenv("INCREMENTAL_DIR", str(tmp_path / "estado"))
+    enteros = [[100 + i, "15/10/2025", "COP", i, 2 * i, 3, 4] for i in range(6)]
+    con_decimal = [list(f) for f in enteros]
+    con_decimal[4][5] = 0.5                     # der_intereses pasa a float en todo el archivo
+    # der_vp recibe 2.5 en 101 (float en todo el archivo); obl_intereses de 100 recibe 5.0 (sigue entera)
+    dat = [[100, "15/10/2025", 10.0, -5.0], [101, "15/10/2025", 2.5, 1.0]]
+
+    for dia, (fecha, flujos) in enumerate([("20250910", enteros), ("20250911", con_decimal),
+                                           ("20250912", enteros), ("20250913", enteros)]):
+        _escribir(tmp_path / f"d{dia}", fecha, flujos, dat)
+        salidas = {}
+        for modo in ("1", "0"):
+            monkeypatch.setenv("INCREMENTAL", modo)
+            procesar_swaps(str(tmp_path / f"d{dia}"), str(tmp_path / modo))
+            salidas[modo] = (tmp_path / modo / f"flujos_swap_gbo_{fecha}.csv").read_text(encoding="latin1")
+        assert salidas["1"] == salidas["0"]
+        linea = salidas["0"].splitlines()[1]
+        assert linea == ("100;2025-10-15;COP;10.0;0;3.0;5" if flujos is con_decimal
+                         else "100;2025-10-15;COP;10.0;0;3;5")
+
+
+def test_estado_por_fecha_y_sin_incremental_en_streaming(tmp_path, monkeypatch, caplog):
+    monkeypatch.setenv("INCREMENTAL", "1")
+    estado = tmp_path / "estado"
+    monkeypatch.setenv("INCREMENTAL_DIR", str(estado))
+    _escribir(tmp_path / "d1", "20250910", FLUJOS, DAT)
+    _escribir(tmp_path / "d2", "20250911", FLUJOS, DAT)
+    _escribir(tmp_path / "d3", "20250912", FLUJOS, DAT)
+
+    # como en --lote: cada fecha deja su propio estado y una fecha anterior no borra el de otra
+    procesar_swaps(str(tmp_path / "d2"), str(tmp_path / "out"))
+    procesar_swaps(str(tmp_path / "d1"), str(tmp_path / "out"))
+    assert sorted(p.name for p in estado.glob("estado_*.json")) == ["estado_20250910.json", "estado_20250911.json"]
+    assert not list(estado.glob("*.tmp"))
+
+    # la fecha siguiente parte del estado más reciente y poda los anteriores a esa base
+    caplog.clear()
+    procesar_swaps(str(tmp_path / "d3"), str(tmp_path / "out"))
+    assert "Incremental: 3 filas reutilizadas" in caplog.text
+    assert sorted(p.name for p in estado.glob("estado_*.json")) == ["estado_20250911.json", "estado_20250912.json"]
+    assert not list(estado.glob("*_20250910.feather"))
+
+    # con FLUJOS_CHUNK_ROWS el modo incremental no se usa (leería el archivo completo)
+    caplog.clear()
+    procesar_swaps(str(tmp_path / "d3"), str(tmp_path / "streaming"), chunksize=2)
+    assert "se procesa en modo streaming" in caplog.text
+    assert "filas reutilizadas" not in caplog.text
+    assert (tmp_path / "streaming" / "flujos_swap_gbo_20250912.csv").read_bytes() == \
+        (tmp_path / "out" / "flujos_swap_gbo_20250912.csv").read_bytes()
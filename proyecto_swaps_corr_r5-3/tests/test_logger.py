@@ -0,0 +1,102 @@
+# tests/test_logger.py
+import logging
+import threading
+import time
+import logger
+
+
+class _Lento(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.hilos = []
+
+    def emit(self, record):
+        time.sleep(0.05)  # disco lento o rotación
+        self.hilos.append((threading.current_thread().name, record.getMessage()))
+
+
+def test_registrar_solo_encola_y_detener_vacia_la_cola(monkeypatch):
+    logger.detener_logging()
+    lento = _Lento()
+    monkeypatch.setattr(logger, "_destinos", [lento])
+    log = logger.get_logger("test_logger.cola")
+
+    t0 = time.perf_counter()
+    for i in range(5):
+        log.info("registro %d", i)
+    assert time.perf_counter() - t0 < 0.05          # el hilo que registra no espera la escritura
+    logger.detener_logging()
+
+    assert lento.hilos == [("logging", f"registro {i}") for i in range(5)]
+
+
+def test_argumentos_mutables_se_formatean_al_registrar(monkeypatch):
+    logger.detener_logging()
+    lento = _Lento()
+    monkeypatch.setattr(logger, "_destinos", [lento])
+    log = logger.get_logger("test_logger.mutables")
+
+    pendientes = ["a"]
+    log.info("bloqueo")                              # ocupa al hilo de logging
+    log.info("pendientes: %s", pendientes)
+    pendientes.append("b")                           # el llamador sigue usando la lista
+    try:
+        raise ValueError("roto")
+    except ValueError:
+        log.exception("fallo %d", 1)
+    logger.detener_logging()
+
+    mensajes = [m for _, m in lento.hilos]
+    assert mensajes[1] == "pendientes: ['a']"
+    assert mensajes[2].startswith("fallo 1\nTraceback") and mensajes[2].count("ValueError: roto") == 1
+
+
+class _Contador(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.mensajes = []
+
+    def emit(self, record):
+        self.mensajes.append(record.getMessage())
+
+
+def test_cada_registro_se_escribe_una_sola_vez(monkeypatch):
+    logger.detener_logging()
+    contador = _Contador()
+    monkeypatch.setattr(logger, "_destinos", [contador])
+    monkeypatch.setenv("LOG_NIVELES", "test_logger.ruidoso=WARNING")
+    from pkg.utils import setup_logging
+    for _ in range(3):                                  # configurar varias veces no duplica handlers
+        setup_logging()
+        log = logger.get_logger("test_logger.modulo")
+    ruidoso = logger.get_logger("test_logger.ruidoso.sub")
+
+    log.info("modulo")
+    logging.info("raiz")
+    ruidoso.info("filtrado por LOG_NIVELES")
+    ruidoso.warning("ruidoso")
+    logger.detener_logging()
+
+    assert contador.mensajes == ["modulo", "raiz", "ruidoso"]
+    assert logging.getLogger().handlers.count(logger._COLA_HANDLER) == 1
+    assert not log.handlers and not ruidoso.handlers
+
+
+def test_rota_por_tamano_y_por_dia_comprime_y_respeta_la_retencion(tmp_path):
+    import gzip
+    base = tmp_path / "swaps.log"
+    h = logger._ArchivoRotativo(base, max_bytes=200, diario=True, compresion="gzip", copias=3, dias=0)
+    h.setFormatter(logging.Formatter("%(message)s"))
+    registro = lambda texto: logging.LogRecord("t", logging.INFO, __file__, 1, texto, None, None)
+    for i in range(40):
+        h.handle(registro(f"linea {i:02d} " + "x" * 40))   # ~50 bytes: rota cada 4 líneas
+    h._corte = time.time() - 1                          # pasó la medianoche
+    h.handle(registro("dia siguiente"))
+    h.close()
+    logger.esperar_archivado()
+
+    rotados = sorted(p.name for p in tmp_path.iterdir() if p.name != "swaps.log")
+    assert len(rotados) == 3 and all(n.endswith(".gz") for n in rotados)
+    assert base.read_text() == "dia siguiente\n"
+    contenido = b"".join(gzip.open(tmp_path / n).read() for n in rotados).decode()
+    assert "linea 39" in contenido
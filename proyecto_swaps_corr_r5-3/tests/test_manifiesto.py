@@ -0,0 +1,91 @@
+# tests/test_manifiesto.py
+import os
+import pandas as pd
+import pytest
+from main import procesar_fecha
+
+
+def _insumos(entrada):
+    entrada.mkdir()
+    pd.DataFrame({
+        "cod_emp": [100, 200], "fecha_cobro": ["15/10/2025", "15/10/2025"],
+        "der_vp": [1.0, 2.0], "obl_vp": [3.0, 4.0],
+    }).to_csv(entrada / "flujos_swap_gbo_20250910.csv", sep=";", index=False, encoding="latin1")
+    pd.DataFrame({
+        "M_CONTRACT_": [100], "M_DATE": ["15/10/2025"], "M_DISCFLOWC": [5.0], "M_FLOW_COL": [6.0],
+    }).to_csv(entrada / "COL_ESTIM_FLOWS_10092025.dat", sep=";", index=False, encoding="latin1")
+    pd.DataFrame({"codigo_operacion": [100, 200], "cupon": [0.0, 0.0], "cupon_1": [0.0, 0.0]}).to_csv(
+        entrada / "Informe_R5_GBO_250910.csv", sep=";", index=False, encoding="latin1")
+
+
+def test_ejecucion_sin_cambios_se_omite_y_se_reprocesa_si_cambia_algo(tmp_path):
+    rutas = {"INPUT_DIR": str(tmp_path / "input"), "OUTPUT_DIR": str(tmp_path), "LOG_DIR": str(tmp_path)}
+    _insumos(tmp_path / "input")
+
+    assert procesar_fecha(rutas) == ("20250910", "OK", "flujos_swap_gbo_20250910.csv")
+    assert (tmp_path / "run_manifest_20250910.json").exists()
+    assert procesar_fecha(rutas) == ("20250910", "OK", "sin cambios")
+    assert procesar_fecha(rutas, forzar=True)[2] != "sin cambios"
+
+    # salida borrada o insumo modificado: se reprocesa
+    os.remove(tmp_path / "Informe_R5_GBO_250910.csv")
+    assert procesar_fecha(rutas)[2] != "sin cambios"
+    dat = tmp_path / "input" / "COL_ESTIM_FLOWS_10092025.dat"
+    dat.write_text(dat.read_text(encoding="latin1").replace("5.0", "7.0"), encoding="latin1")
+    assert procesar_fecha(rutas)[2] != "sin cambios"
+    assert procesar_fecha(rutas)[2] == "sin cambios"
+
+
+def test_fallo_al_escribir_el_informe_queda_en_error_y_se_reprocesa(tmp_path, monkeypatch):
+    from pkg import actualizar_informe
+    rutas = {"INPUT_DIR": str(tmp_path / "input"), "OUTPUT_DIR": str(tmp_path), "LOG_DIR": str(tmp_path)}
+    _insumos(tmp_path / "input")
+
+    def falla(*args, **kwargs):
+        raise PermissionError("output/ sin permiso de escritura")
+    with monkeypatch.context() as m:
+        m.setattr(actualizar_informe, "safe_to_csv", falla)
+        assert procesar_fecha(rutas)[1] == "ERROR"
+    assert not (tmp_path / "run_manifest_20250910.json").exists()
+
+    assert procesar_fecha(rutas) == ("20250910", "OK", "flujos_swap_gbo_20250910.csv")
+    assert (tmp_path / "Informe_R5_GBO_250910.csv").exists()
+
+
+def test_lote_con_informe_fallido_termina_con_codigo_distinto_de_cero(tmp_path, monkeypatch):
+    import main
+    from pkg import actualizar_informe
+    _insumos(tmp_path / "input")
+    for clave, carpeta in (("INPUT_DIR", "input"), ("OUTPUT_DIR", "."), ("LOG_DIR", ".")):
+        monkeypatch.setenv(clave, str(tmp_path / carpeta))
+
+    def falla(*args, **kwargs):
+        raise PermissionError("output/ sin permiso de escritura")
+    monkeypatch.setattr(actualizar_informe, "safe_to_csv", falla)
+    assert main.main(["--lote", "--workers", "1"]) == 1
+    assert main.main([]) == 1
+
+
+def test_guardar_usa_un_temporal_propio_del_proceso(tmp_path):
+    from pkg import manifiesto
+
+    # temporal a medio escribir de otro proceso (p.ej. --lote mientras corre --servir)
+    ajeno = tmp_path / ".run_manifest_20250910.json.1.tmp"
+    ajeno.write_text("{parcial")
+
+    path = manifiesto.guardar(tmp_path, "20250910", {}, [], "OK")
+
+    assert manifiesto.cargar(tmp_path, "20250910")["estado"] == "OK"
+    assert ajeno.read_text() == "{parcial"
+    assert sorted(p.name for p in tmp_path.iterdir()) == [ajeno.name, os.path.basename(path)]
+
+
+def test_workers_menor_que_uno_es_un_error_de_uso(capsys):
+    import main
+
+    assert main._parse_args(["--lote", "--workers", "2"]).workers == 2
+    for valor in ("0", "-1", "dos"):
+        with pytest.raises(SystemExit) as salida:
+            main._parse_args(["--lote", "--workers", valor])
+        assert salida.value.code == 2
+        assert "--workers" in capsys.readouterr().err
@@ -0,0 +1,55 @@
+# tests/test_metricas.py
+import json
+from pkg.metricas import Metricas, etapa
+
+
+def test_etapas_acumulan_y_se_guardan_en_json(tmp_path):
+    metricas = Metricas()
+    for filas in (100, 50):
+        with etapa(metricas, "lectura_flujos") as m:
+            m["filas_salida"] = filas
+    with etapa(metricas, "cruce", 150):
+        pass
+    with etapa(None, "sin_metricas"):
+        pass
+
+    path = metricas.guardar(tmp_path, "20250910")
+
+    datos = json.loads((tmp_path / "run_metrics_20250910.json").read_text(encoding="utf-8"))
+    assert path.endswith("run_metrics_20250910.json")
+    assert datos["fecha"] == "20250910"
+    assert list(datos["etapas"]) == ["lectura_flujos", "cruce"]
+    assert datos["etapas"]["lectura_flujos"]["llamadas"] == 2
+    assert datos["etapas"]["lectura_flujos"]["filas_salida"] == 150
+    assert datos["etapas"]["cruce"]["filas_entrada"] == 150
+    assert "cruce" in metricas.resumen("20250910")
+
+
+def test_memoria_registra_pico_sitios_y_json(tmp_path):
+    import tracemalloc
+    metricas = Metricas(memoria=True)
+    try:
+        with etapa(metricas, "reserva"):
+            retenido = bytearray(3_000_000)
+            temporal = bytearray(5_000_000)
+            del temporal
+        metricas.guardar(tmp_path, "20250910")
+        assert not tracemalloc.is_tracing()               # guardar cierra la ejecución
+    finally:
+        tracemalloc.stop()
+
+    memoria = metricas.memoria_etapas["reserva"]
+    assert memoria["pico_tracemalloc_bytes"] >= 8_000_000
+    assert memoria["asignaciones"][0]["bytes"] >= len(retenido)
+    assert "test_metricas.py:" in memoria["asignaciones"][0]["sitio"]
+    datos = json.loads((tmp_path / "run_memoria_20250910.json").read_text(encoding="utf-8"))
+    assert datos["etapas"]["reserva"]["pico_tracemalloc_bytes"] == memoria["pico_tracemalloc_bytes"]
+
+
+def test_metricas_memoria_se_lee_de_la_configuracion(monkeypatch):
+    import tracemalloc
+    monkeypatch.setenv("METRICAS_MEMORIA", "1")
+    metricas = Metricas()
+    assert metricas.memoria and tracemalloc.is_tracing()
+    metricas.terminar()
+    assert not tracemalloc.is_tracing()
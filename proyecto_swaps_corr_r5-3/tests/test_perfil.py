@@ -0,0 +1,34 @@
+# tests/test_perfil.py
+import pstats
+import time
+from pkg.metricas import Metricas, etapa
+from pkg.perfil import Perfil
+
+
+def _ocupado(segundos):
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        pass
+
+
+def test_perfil_de_etapa_escribe_pstats_y_pilas(tmp_path):
+    metricas = Metricas(perfil=Perfil("cruce"))
+    with etapa(metricas, "lectura_flujos"):
+        pass
+    for _ in range(2):
+        with etapa(metricas, "cruce"):
+            _ocupado(0.05)
+
+    pstats_path, folded_path = metricas.perfil.guardar(tmp_path, "20250910")
+
+    assert pstats_path.endswith("perfil_20250910_cruce.pstats")
+    funciones = {f[2] for f in pstats.Stats(pstats_path).stats}
+    assert "_ocupado" in funciones
+    lineas = open(folded_path, encoding="utf-8").read().splitlines()
+    assert lineas and all(l.rsplit(" ", 1)[1].isdigit() for l in lineas)
+    assert any("_ocupado (test_perfil.py" in l for l in lineas)
+
+
+def test_perfil_sin_etapa_ejecutada_no_escribe(tmp_path):
+    assert Perfil("inexistente").guardar(tmp_path, "20250910") is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,139 @@
+# tests/test_procesar_swaps.py
+import pandas as pd
+from pkg.procesar_swaps import construir_lookup, aplicar_lookup
+
+
+def _flujo(fechas):
+    df = pd.DataFrame({
+        "cod_emp": [100, 100, 200, 300],
+        "fecha_cobro": fechas,
+        "der_vp": [1.0, 1.0, 1.0, 1.0],
+        "obl_vp": [2, 2, 2, 2],
+        "der_intereses": [3.0, 3.0, 3.0, 3.0],
+        "obl_intereses": [4.0, 4.0, 4.0, 4.0],
+    })
+    df["fecha_cobro"] = pd.to_datetime(df["fecha_cobro"], format="%d/%m/%Y").dt.date
+    return df
+
+
+def test_reglas_de_signo_y_ultima_fila_gana():
+    df_flujo = _flujo(["15/10/2025", "15/11/2025", "15/10/2025", "15/10/2025"])
+    df_dat = pd.DataFrame({
+        "M_CONTRACT_": [100, 100, 100, 200, 200, 999],
+        "M_DATE": ["15/10/2025", "15/10/2025", "15/10/2025", "15/10/2025", "fecha", "15/10/2025"],
+        "M_DISCFLOWC": [10.0, -20.5, 0.0, 7.0, 8.0, 9.0],
+        "M_FLOW_COL": [5.0, None, 6.0, -1.5, 2.0, 3.0],
+    })
+
+    out = aplicar_lookup(df_flujo, construir_lookup(df_dat))
+
+    # contrato 100 / 15-10: der_vp de la 1a fila, obl_vp de la 2a, der_intereses de la última que aplica
+    assert out.loc[0, ["der_vp", "obl_vp", "der_intereses", "obl_intereses"]].tolist() == [10.0, 20.5, 6.0, 4.0]
+    # misma operación, otra fecha: sin cambios
+    assert out.loc[1, ["der_vp", "obl_vp", "der_intereses", "obl_intereses"]].tolist() == [1.0, 2.0, 3.0, 4.0]
+    # la fila con fecha inválida del .dat no cruza
+    assert out.loc[2, ["der_vp", "obl_vp", "der_intereses", "obl_intereses"]].tolist() == [7.0, 2.0, 3.0, 1.5]
+    assert out.loc[3, ["der_vp", "obl_vp", "der_intereses", "obl_intereses"]].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_columna_entera_se_conserva_sin_decimales():
+    df_flujo = _flujo(["15/10/2025"] * 4)
+    df_dat = pd.DataFrame({
+        "M_CONTRACT_": [300], "M_DATE": ["15/10/2025"], "M_DISCFLOWC": [-8.0], "M_FLOW_COL": [0.0],
+    })
+
+    out = aplicar_lookup(df_flujo, construir_lookup(df_dat))
+
+    assert out["obl_vp"].dtype == "int64"
+    assert out["obl_vp"].tolist() == [2, 2, 2, 8]
+
+
+def test_decimal_sobrescrito_por_un_entero_promueve_igual_la_columna():
+    # el recorrido fila a fila asignaba 2.5 (promueve a float) y luego 3: la columna queda float
+    df_flujo = _flujo(["15/10/2025"] * 4)
+    df_dat = pd.DataFrame({
+        "M_CONTRACT_": [300, 300], "M_DATE": ["15/10/2025"] * 2, "M_DISCFLOWC": [-2.5, -3.0], "M_FLOW_COL": [0.0, 0.0],
+    })
+
+    out = aplicar_lookup(df_flujo, construir_lookup(df_dat))
+
+    assert out["obl_vp"].dtype == "float64"
+    assert out["obl_vp"].tolist() == [2.0, 2.0, 2.0, 3.0]
+
+
+def test_modo_streaming_equivale_a_lectura_completa(tmp_path):
+    from pkg.procesar_swaps import procesar_swaps
+
+    entrada = tmp_path / "input"
+    entrada.mkdir()
+    pd.DataFrame({
+        "cod_emp": [100, 100, 200, 200, 300, 100, 200],
+        "fecha_cobro": ["15/10/2025", "01/09/2025", "15/10/2025", "xx", "20/10/2025", "20/10/2025", "20/10/2025"],
+        "der_vp": [1.5, 1.5, 1.5, 1.5, 1.5, 1.5, 1.5],
+        "obl_vp": [2.5] * 7,
+        "der_intereses": [3.5] * 7,
+        "obl_intereses": [4.5] * 7,
+    }).to_csv(entrada / "flujos_swap_gbo_20250910.csv", sep=";", index=False, encoding="latin1")
+    pd.DataFrame({
+        "M_CONTRACT_": [100, 200, 200, 100],
+        "M_DATE": ["15/10/2025", "15/10/2025", "20/10/2025", "20/10/2025"],
+        "M_DISCFLOWC": [10.25, -20.5, 30.75, -1.25],
+        "M_FLOW_COL": [-5.5, 6.5, 0.0, 2.25],
+    }).to_csv(entrada / "COL_ESTIM_FLOWS_10092025.dat", sep=";", index=False, encoding="latin1")
+
+    assert procesar_swaps(str(entrada), str(tmp_path / "completo"), chunksize=0)[0]
+    assert procesar_swaps(str(entrada), str(tmp_path / "bloques"), chunksize=2)[0]
+
+    completo = (tmp_path / "completo" / "flujos_swap_gbo_20250910.csv").read_bytes()
+    bloques = (tmp_path / "bloques" / "flujos_swap_gbo_20250910.csv").read_bytes()
+    assert bloques == completo
+    assert len(completo.splitlines()) == 6
+
+
+def test_importes_enteros_conservan_el_formato_en_modo_completo_y_streaming(tmp_path):
+    from pkg.procesar_swaps import procesar_swaps
+
+    entrada = tmp_path / "input"
+    entrada.mkdir()
+    (entrada / "flujos_swap_gbo_20250910.csv").write_text(
+        "cod_emp;fecha_cobro;der_vp;obl_vp;der_intereses;obl_intereses;tasa\n"
+        "100;15/10/2025;1000;0;5;-5;0.050\n"
+        "200;15/10/2025;7;8;9;10;2\n"
+        "300;15/10/2025;1;2;3;4;1\n"
+        "100;01/09/2025;1;2;3;;0.5\n", encoding="latin1")
+    (entrada / "COL_ESTIM_FLOWS_10092025.dat").write_text(
+        "M_CONTRACT_;M_DATE;M_DISCFLOWC;M_FLOW_COL\n"
+        "100;15/10/2025;12;0\n"
+        "300;15/10/2025;-2.5;0\n", encoding="latin1")
+
+    assert procesar_swaps(str(entrada), str(tmp_path / "completo"), chunksize=0)[0]
+    completo = (tmp_path / "completo" / "flujos_swap_gbo_20250910.csv").read_text(encoding="latin1")
+    # der_vp recibe un entero y der_intereses nada: siguen enteras; obl_vp recibe decimales y
+    # obl_intereses tiene un nulo (en una fila descartada): float; tasa se infiere como antes
+    assert completo == (
+        "cod_emp;fecha_cobro;der_vp;obl_vp;der_intereses;obl_intereses;tasa\n"
+        "100;2025-10-15;12;0.0;5;-5.0;0.05\n"
+        "200;2025-10-15;7;8.0;9;10.0;2.0\n"
+        "300;2025-10-15;1;2.5;3;4.0;1.0\n")
+    # en bloques de 1 fila cada bloque infiere distinto: se repite con los tipos de la lectura completa
+    for chunksize in (1, 2, 3):
+        assert procesar_swaps(str(entrada), str(tmp_path / f"b{chunksize}"), chunksize=chunksize)[0]
+        assert (tmp_path / f"b{chunksize}" / "flujos_swap_gbo_20250910.csv").read_text(encoding="latin1") == completo
+
+
+def test_streaming_sin_filas_conserva_la_salida_anterior(tmp_path):
+    from pkg.procesar_swaps import procesar_swaps
+
+    entrada, salida = tmp_path / "input", tmp_path / "output"
+    entrada.mkdir()
+    salida.mkdir()
+    columnas = ["cod_emp", "fecha_cobro", "der_vp", "obl_vp", "der_intereses", "obl_intereses"]
+    pd.DataFrame(columns=columnas).to_csv(entrada / "flujos_swap_gbo_20250910.csv", sep=";", index=False)
+    pd.DataFrame({"M_CONTRACT_": [100], "M_DATE": ["15/10/2025"], "M_DISCFLOWC": [1.0], "M_FLOW_COL": [2.0]}).to_csv(
+        entrada / "COL_ESTIM_FLOWS_10092025.dat", sep=";", index=False)
+    anterior = salida / "flujos_swap_gbo_20250910.csv"
+    anterior.write_bytes(b"cod_emp;fecha_cobro\n100;2025-10-15\n")
+
+    assert procesar_swaps(str(entrada), str(salida), chunksize=2)[0] is None
+    assert anterior.read_bytes() == b"cod_emp;fecha_cobro\n100;2025-10-15\n"
+    assert [p.name for p in salida.iterdir()] == [anterior.name]
@@ -0,0 +1,65 @@
+# tests/test_salida.py
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from pkg import salida, utils
+
+
+def test_error_a_mitad_de_la_escritura_conserva_el_archivo_anterior(tmp_path):
+    destino = tmp_path / "flujos.csv"
+    destino.write_text("anterior\n")
+    with pytest.raises(RuntimeError):
+        with salida.EscrituraAtomica(destino) as f:
+            f.write(b"a medio escribir")
+            raise RuntimeError("se cae el proceso")
+    assert destino.read_text() == "anterior\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["flujos.csv"]   # sin temporales
+
+    salida.escribir_csv(pd.DataFrame({"a": [1], "b": [2]}), destino, sep=";")
+    assert destino.read_text() == "a;b\n1;2\n"
+
+
+@pytest.mark.parametrize("variante", ["simple", "comillas", "bool"])
+def test_motor_pyarrow_escribe_lo_mismo_que_pandas(tmp_path, variante):
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({
+        "cod_emp": pd.array(["1127", "1076", None, "7", "8", "9"], dtype="string[pyarrow]"),
+        "nombre": ["ñandú", "op", "x", None, "", "b"],
+        "fecha_cobro": [datetime.date(2025, 10, 16), None, datetime.date(2026, 1, 2)] * 2,
+        "der_vp": [913.0, np.nan, 1e20, -0.0, 2.5e-05, 12345678901.5],
+        "obl_vp": [604572.91, 1e16, 1e15, 0.0001, -7.0, np.inf],
+        "n": np.arange(6),
+    })
+    if variante == "comillas":
+        df["nombre"] = ["ñandú", "op;x", 'co"mi', None, "", "b"]   # ese tramo lo entrecomilla pandas
+    if variante == "bool":
+        df["activo"] = [True, False] * 3            # Arrow escribe true/false: va por pandas
+    for motor in ("pandas", "pyarrow"):
+        salida.escribir_csv(df, tmp_path / f"{motor}.csv", sep=";", encoding="latin1", motor=motor)
+    assert (tmp_path / "pyarrow.csv").read_bytes() == (tmp_path / "pandas.csv").read_bytes()
+
+
+@pytest.mark.parametrize("sufijo", [".gz", ".xz"])
+def test_destino_comprimido_se_comprime_en_otro_hilo_con_el_mismo_texto(tmp_path, monkeypatch, sufijo):
+    monkeypatch.setattr(salida, "COMPRESION_TRAMO", 1000)   # varios tramos por la cola
+    df = pd.DataFrame({"cod_emp": np.arange(2000).astype(str), "der_vp": np.linspace(0, 1e6, 2000)})
+    salida.escribir_csv(df, tmp_path / "plano.csv", sep=";", encoding="latin1")
+    salida.escribir_csv(df, tmp_path / f"flujos.csv{sufijo}", sep=";", encoding="latin1")
+
+    plano = (tmp_path / "plano.csv").read_bytes()
+    with utils.abrir_binario(tmp_path / f"flujos.csv{sufijo}") as f:
+        assert f.read() == plano
+    en_disco = (tmp_path / f"flujos.csv{sufijo}").stat().st_size
+    assert salida.tamanos(tmp_path / f"flujos.csv{sufijo}") == (len(plano), en_disco)
+    assert en_disco < len(plano)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(["plano.csv", f"flujos.csv{sufijo}"])
+
+
+def test_nombre_de_salida_lleva_la_extension_de_salida_compresion(monkeypatch):
+    from pkg.catalogo import nombre_salida
+    monkeypatch.setenv("SALIDA_COMPRESION", "gzip")
+    assert nombre_salida("flujos_swap_gbo_20250910.csv.zip") == "flujos_swap_gbo_20250910.csv.gz"
+    monkeypatch.setenv("SALIDA_COMPRESION", "zstd")
+    with pytest.raises(ValueError):
+        nombre_salida("Informe_R5_GBO_250910.csv")
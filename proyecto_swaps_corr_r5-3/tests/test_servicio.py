@@ -0,0 +1,52 @@
+# tests/test_servicio.py
+import http.client
+import json
+import threading
+import time
+from pkg.servicio import crear_servidor
+
+
+def _pedido(servidor, metodo, ruta, cuerpo=None):
+    conexion = http.client.HTTPConnection("127.0.0.1", servidor.server_address[1], timeout=10)
+    conexion.request(metodo, ruta, body=json.dumps(cuerpo) if cuerpo is not None else None)
+    respuesta = conexion.getresponse()
+    return respuesta.status, json.loads(respuesta.read())
+
+
+def test_servicio_procesa_y_limita_concurrencia():
+    activos, maximo = [0], [0]
+    lock = threading.Lock()
+
+    def procesar(fecha, forzar):
+        if fecha == "20990101":
+            raise FileNotFoundError("sin insumos")
+        with lock:
+            activos[0] += 1
+            maximo[0] = max(maximo[0], activos[0])
+        time.sleep(0.05)
+        with lock:
+            activos[0] -= 1
+        return {"fecha": fecha, "estado": "OK", "salidas": {"flujos": f"/out/{fecha}.csv"}, "forzar": forzar}
+
+    servidor = crear_servidor(procesar, host="127.0.0.1", puerto=0, socket_path="", max_concurrentes=2, espera=5)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        assert _pedido(servidor, "GET", "/salud") == (200, {"estado": "ok", "en_curso": 0})
+        assert _pedido(servidor, "POST", "/procesar", {"fecha": "2025-09-10"})[0] == 400
+        assert _pedido(servidor, "POST", "/procesar", {"fecha": "20990101"})[0] == 404
+
+        resultados = []
+        pedidos = [threading.Thread(target=lambda f=f: resultados.append(
+            _pedido(servidor, "POST", "/procesar", {"fecha": f, "forzar": True}))) for f in
+            ("20250910", "20250911", "20250912", "20250913")]
+        for p in pedidos:
+            p.start()
+        for p in pedidos:
+            p.join()
+        assert sorted(r[1]["fecha"] for r in resultados) == ["20250910", "20250911", "20250912", "20250913"]
+        assert all(c == 200 and r["forzar"] and r["duracion_s"] > 0 for c, r in resultados)
+        assert maximo[0] <= 2
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
@@ -0,0 +1,81 @@
+# tests/test_utils.py
+from pkg import utils
+
+
+def test_motor_csv_desde_env_y_fallback(monkeypatch):
+    monkeypatch.setenv("CSV_ENGINE", "pyarrow")
+    monkeypatch.setattr(utils, "_pa", object())
+    assert utils.motor_csv({"sep": ";"}) == "pyarrow"
+    # lecturas por bloques o de cabecera no están soportadas por pyarrow
+    assert utils.motor_csv({"chunksize": 10}) == "c"
+    assert utils.motor_csv({"nrows": 0}) == "c"
+    # un engine explícito tiene prioridad sobre el .env
+    assert utils.motor_csv({"engine": "c"}) == "c"
+
+    monkeypatch.setattr(utils, "_pa", None)
+    assert utils.motor_csv({"sep": ";"}) == "c"
+
+
+def test_safe_read_csv_mismo_resultado_con_ambos_motores(tmp_path, monkeypatch):
+    import pytest
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "x.csv"
+    path.write_text("cod_emp;der_vp;nombre\n1;1.25;ñandú\n2;;op\n", encoding="latin1")
+    opciones = {"sep": ";", "encoding": "latin1", "dtype": {"cod_emp": "string[pyarrow]", "der_vp": "float64", "nombre": "string[pyarrow]"}}
+
+    c = utils.safe_read_csv(path, engine="c", **opciones)
+    pa = utils.safe_read_csv(path, engine="pyarrow", **opciones)
+
+    assert c.dtypes.tolist() == pa.dtypes.tolist()
+    assert c.equals(pa)
+
+
+def test_detectar_encoding_por_muestra(tmp_path, monkeypatch):
+    bom = tmp_path / "bom.csv"
+    bom.write_bytes(b"\xef\xbb\xbfa;b\n1;\xc3\xb1\n")
+    assert utils.detectar_encoding(bom, "latin1") == "utf-8-sig"
+
+    latin = tmp_path / "latin.csv"
+    latin.write_bytes(b"a;b\n1;\xf1\n")
+    assert utils.detectar_encoding(latin, "utf-8") == "latin1"
+    assert utils.detectar_encoding(latin) == "latin1"
+
+    # un byte inválido al final de un archivo grande se ve en la muestra de cola
+    grande = tmp_path / "grande.csv"
+    grande.write_bytes(b"a;b\n" + b"1;\xc3\xb1\n" * 100_000 + b"2;\xf1\n")
+    assert utils.detectar_encoding(grande, "utf-8") == "latin1"
+
+    # el resultado se cachea por ruta + tamaño + mtime: no se vuelve a muestrear
+    monkeypatch.setattr(utils, "_muestras", lambda path: (_ for _ in ()).throw(AssertionError("re-muestreo")))
+    assert utils.detectar_encoding(grande, "utf-8") == "latin1"
+
+
+def test_safe_read_csv_parsea_una_sola_vez(tmp_path, monkeypatch):
+    path = tmp_path / "x.csv"
+    path.write_bytes(b"cod;nombre\n1;\xf1and\xfa\n")
+    llamadas = []
+    original = utils._pd.read_csv
+    monkeypatch.setattr(utils._pd, "read_csv", lambda *a, **k: llamadas.append(k["encoding"]) or original(*a, **k))
+
+    df = utils.safe_read_csv(path, sep=";", encoding="utf-8")
+
+    assert llamadas == ["latin1"]
+    assert df.loc[0, "nombre"] == "ñandú"
+
+
+def test_lee_comprimidos_en_streaming_con_el_mismo_resultado(tmp_path):
+    import gzip
+    import zipfile
+    contenido = b"cod;nombre\n1;\xf1and\xfa\n2;op\n"
+    (tmp_path / "x.csv").write_bytes(contenido)
+    with gzip.open(tmp_path / "x.csv.gz", "wb") as f:
+        f.write(contenido)
+    with zipfile.ZipFile(tmp_path / "x.csv.zip", "w") as z:
+        z.writestr("x.csv", contenido)
+
+    plano = utils.safe_read_csv(tmp_path / "x.csv", sep=";", encoding="utf-8")
+    for nombre in ("x.csv.gz", "x.csv.zip"):
+        with utils.abrir_binario(tmp_path / nombre) as f:
+            assert f.read() == contenido
+        assert utils.detectar_encoding(tmp_path / nombre, "utf-8") == "latin1"
+        assert utils.safe_read_csv(tmp_path / nombre, sep=";", encoding="utf-8").equals(plano)
@@ -0,0 +1,67 @@
+# tests/test_vigilancia.py
+import time
+from pkg.vigilancia import Vigilante
+
+
+def test_procesa_fechas_completas_estables_una_vez(tmp_path):
+    llamadas = []
+    vigilante = Vigilante(tmp_path, lambda fecha: llamadas.append(fecha) or (fecha, "OK", ""), intervalo=0, estable=0.05)
+    (tmp_path / "flujos_swap_gbo_20250910.csv").write_text("a")
+    assert vigilante.sondear() == []                      # falta el .dat
+
+    (tmp_path / "COL_ESTIM_FLOWS_10092025.dat").write_text("b")
+    assert vigilante.sondear() == []                      # recién visto: aún no estable
+    time.sleep(0.06)
+    eventos = vigilante.sondear()
+    assert [e[0] for e in eventos] == ["20250910"] and eventos[0][1][1] == "OK"
+    assert vigilante.sondear() == []                      # ya procesada
+
+    (tmp_path / "Informe_R5_GBO_250910.csv").write_text("c")
+    vigilante.sondear()
+    time.sleep(0.06)
+    assert [e[0] for e in vigilante.sondear()] == ["20250910"]   # llegó el informe
+    assert llamadas == ["20250910", "20250910"]
+
+
+def test_error_en_una_fecha_no_detiene_la_vigilancia(tmp_path):
+    def falla(fecha):
+        raise ValueError("roto")
+    vigilante = Vigilante(tmp_path, falla, intervalo=0, estable=0)
+    (tmp_path / "flujos_swap_gbo_20250910.csv").write_text("a")
+    (tmp_path / "COL_ESTIM_FLOWS_10092025.dat").write_text("b")
+    assert vigilante.sondear()[0][1] == ("20250910", "ERROR", "roto")
+
+
+def test_fechas_presentes_al_arrancar_se_omiten_salvo_pendientes(tmp_path):
+    (tmp_path / "flujos_swap_gbo_20250910.csv").write_text("a")
+    (tmp_path / "COL_ESTIM_FLOWS_10092025.dat").write_text("b")
+    llamadas = []
+    procesar = lambda fecha: llamadas.append(fecha) or (fecha, "OK", "")
+
+    vigilante = Vigilante(tmp_path, procesar, intervalo=0, estable=0)
+    assert vigilante.sondear() == []                      # histórica: no se reprocesa
+
+    (tmp_path / "flujos_swap_gbo_20250911.csv").write_text("a")
+    (tmp_path / "COL_ESTIM_FLOWS_11092025.dat").write_text("b")
+    assert [e[0] for e in vigilante.sondear()] == ["20250911"]
+
+    assert [e[0] for e in Vigilante(tmp_path, procesar, intervalo=0, estable=0, existentes=True).sondear()] == \
+        ["20250910", "20250911"]
+    assert llamadas == ["20250911", "20250910", "20250911"]
+
+
+def test_fecha_con_error_se_reintenta_con_espera_creciente(tmp_path):
+    resultados = iter([("20250910", "ERROR", "bloqueado"), ("20250910", "ERROR", "bloqueado"), ("20250910", "OK", "")])
+    vigilante = Vigilante(tmp_path, lambda fecha: next(resultados), intervalo=0, estable=0, reintento=0.05)
+    (tmp_path / "flujos_swap_gbo_20250910.csv").write_text("a")
+    (tmp_path / "COL_ESTIM_FLOWS_10092025.dat").write_text("b")
+
+    assert vigilante.sondear()[0][1][1] == "ERROR"
+    assert vigilante.sondear() == []                      # espera 0.05 s antes de reintentar
+    time.sleep(0.06)
+    assert vigilante.sondear()[0][1][1] == "ERROR"
+    time.sleep(0.06)
+    assert vigilante.sondear() == []                      # segundo fallo: espera 0.1 s
+    time.sleep(0.05)
+    assert vigilante.sondear()[0][1][1] == "OK"
+    assert vigilante.sondear() == []                      # procesada con éxito